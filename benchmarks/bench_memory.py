@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Measures the memory footprint of the elaborated register model.
+
+A synthetic design containing many registers is compiled and elaborated.
+The memory retained by the elaborated component tree, and by a full set of
+Node objects for every field in the design, is reported as bytes per field.
+
+Components and nodes store their attributes in __slots__. For comparison, the
+same figures are estimated for a per-instance __dict__, as was used before.
+Each object is copied once with its current class and once as an equivalent
+object with a __dict__. The difference between the two is added to the
+measured figure.
+
+Usage:
+    python bench_memory.py [--regs N] [--fields M]
+"""
+import os
+import sys
+import argparse
+import copy
+import tempfile
+import tracemalloc
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(this_dir, ".."))
+
+from systemrdl import RDLCompiler, RDLWalker, RDLListener # pylint: disable=wrong-import-position
+
+#-------------------------------------------------------------------------------
+def generate_design(path, n_regs, n_fields):
+    """
+    Write a design where each register has a unique reset value for each of
+    its fields, so that no instances share their elaborated contents.
+    """
+    with open(path, "w") as f:
+        f.write("addrmap top {\n")
+        for i in range(n_regs):
+            f.write("    reg {\n")
+            for j in range(n_fields):
+                f.write("        field {} f%d[1] = %d;\n" % (j, (i >> (j % 16)) & 1))
+            f.write("    } r%d;\n" % i)
+        f.write("};\n")
+
+
+class NodeCollector(RDLListener):
+    def __init__(self):
+        self.nodes = []
+
+    def enter_Component(self, node):
+        self.nodes.append(node)
+
+
+def iter_components(inst):
+    yield inst
+    for child in inst.children:
+        yield from iter_components(child)
+
+
+def get_slot_values(obj):
+    values = {}
+    for cls in reversed(type(obj).__mro__):
+        for k in cls.__dict__.get("__slots__", []):
+            if hasattr(obj, k):
+                values[k] = getattr(obj, k)
+    return values
+
+
+_dict_classes = {}
+def to_dict_backed(obj):
+    """
+    Copy an object's attributes into an object that stores them in a
+    per-instance __dict__
+    """
+    cls = type(obj)
+    if cls not in _dict_classes:
+        _dict_classes[cls] = type(cls.__name__, (), {})
+    result = _dict_classes[cls]()
+    for k, v in get_slot_values(obj).items():
+        setattr(result, k, v)
+    return result
+
+
+def measure_copies(objs, copy_func):
+    """
+    Returns the number of bytes retained by copies of the objects.
+    Attribute values are shared with the originals, so only the size of the
+    objects themselves is measured.
+    """
+    tracemalloc.start()
+    snapshot_start = tracemalloc.take_snapshot()
+    copies = [copy_func(obj) for obj in objs]
+    snapshot_end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del copies
+    return diff_snapshots(snapshot_start, snapshot_end)
+
+
+def diff_snapshots(a, b):
+    return sum(stat.size_diff for stat in b.compare_to(a, "filename"))
+
+
+def measure(n_regs, n_fields):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "design.rdl")
+        generate_design(path, n_regs, n_fields)
+
+        rdlc = RDLCompiler()
+        rdlc.compile_file(path)
+
+        tracemalloc.start()
+        snapshot_start = tracemalloc.take_snapshot()
+        root = rdlc.elaborate("top")
+        snapshot_elab = tracemalloc.take_snapshot()
+
+        collector = NodeCollector()
+        RDLWalker(unroll=True).walk(root, collector)
+        snapshot_nodes = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+    components = list(iter_components(root.inst))
+    components_overhead = (
+        measure_copies(components, to_dict_backed)
+        - measure_copies(components, copy.copy)
+    )
+    nodes_overhead = (
+        measure_copies(collector.nodes, to_dict_backed)
+        - measure_copies(collector.nodes, copy.copy)
+    )
+
+    n_total = n_regs * n_fields
+    components_bytes = diff_snapshots(snapshot_start, snapshot_elab)
+    nodes_bytes = diff_snapshots(snapshot_elab, snapshot_nodes)
+    return {
+        "fields": n_total,
+        "components_bytes_per_field": components_bytes / n_total,
+        "nodes_bytes_per_field": nodes_bytes / n_total,
+        "dict_components_bytes_per_field": (components_bytes + components_overhead) / n_total,
+        "dict_nodes_bytes_per_field": (nodes_bytes + nodes_overhead) / n_total,
+    }
+
+#-------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--regs", type=int, default=500, help="Number of registers")
+    parser.add_argument("--fields", type=int, default=32, help="Fields per register")
+    options = parser.parse_args()
+
+    results = measure(options.regs, options.fields)
+    print("Fields: %d" % results["fields"])
+    print("%-12s %18s %18s" % ("bytes/field", "__dict__ (before)", "__slots__ (after)"))
+    for name in ("components", "nodes"):
+        print("%-12s %18.1f %18.1f" % (
+            name.capitalize(),
+            results["dict_%s_bytes_per_field" % name],
+            results["%s_bytes_per_field" % name],
+        ))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Times and memory-profiles each phase of compiling a synthetic design.
+
+A design is generated at a configurable scale and split across many include
+files. Registers and register files are parameterized, nested several levels
+deep, and receive dynamic property assignments.
+
+Each phase recorded by systemrdl.CompilerStats is measured separately:
+preprocessing, parsing, the RootVisitor and each elaboration walker pass.
+A full unrolled walk of the elaborated model is measured as the 'traverse'
+phase.
+
+Results are written as JSON so that they can be compared between revisions.
+
+Usage:
+    python bench_phases.py [--addrmaps N] [--regfiles M] [--regs K] [--fields F]
+                           [--depth D] [--dynamic A] [--array-size S]
+                           [--includes I] [--repeat R] [--no-memory]
+                           [-o results.json]
+"""
+import os
+import sys
+import json
+import platform
+import argparse
+import tempfile
+import collections
+
+this_dir = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, os.path.join(this_dir, ".."))
+
+# pylint: disable=wrong-import-position
+from systemrdl import RDLCompiler, RDLWalker, RDLListener, CompilerStats
+from systemrdl import __version__
+# pylint: enable=wrong-import-position
+
+#===============================================================================
+# Design generator
+#===============================================================================
+DesignConfig = collections.namedtuple(
+    "DesignConfig", [
+        "addrmaps", "regfiles", "regs", "fields", "depth", "dynamic",
+        "array_size", "includes",
+    ]
+)
+
+def generate_design(out_dir, cfg):
+    """
+    Write a synthetic design into out_dir.
+
+    Each addrmap block uses its own set of definitions:
+    - A register with cfg.fields 1-bit fields whose resets are derived from a
+      parameter.
+    - A chain of cfg.depth parameterized regfiles. The innermost contains
+      cfg.regs registers and an array of cfg.array_size registers. Each outer
+      level instantiates the previous one with a derived parameter value.
+    - An addrmap containing cfg.regfiles instances of the outermost regfile
+      and up to cfg.dynamic dynamic property assignments into its fields,
+      at most one per field.
+
+    Blocks are distributed evenly across cfg.includes files, which are
+    included by the top-level file.
+
+    Returns the path to the top-level file
+    """
+    regwidth = 8
+    while regwidth < cfg.fields:
+        regwidth *= 2
+
+    n_includes = max(1, min(cfg.includes, cfg.addrmaps))
+    incl_blocks = [[] for _ in range(n_includes)]
+    for i in range(cfg.addrmaps):
+        incl_blocks[i % n_includes].append(i)
+
+    for n, blocks in enumerate(incl_blocks):
+        with open(os.path.join(out_dir, "blocks_%d.rdl" % n), "w") as f:
+            for i in blocks:
+                _write_block(f, i, cfg, regwidth)
+
+    top_path = os.path.join(out_dir, "top.rdl")
+    with open(top_path, "w") as f:
+        for n in range(n_includes):
+            f.write('`include "blocks_%d.rdl"\n' % n)
+        f.write("\naddrmap top {\n")
+        for i in range(cfg.addrmaps):
+            f.write("    block_%d b%d;\n" % (i, i))
+        f.write("};\n")
+    return top_path
+
+
+def _write_block(f, i, cfg, regwidth):
+    # Register definition
+    f.write("reg reg_%d_t #(longint unsigned RESET = 0) {\n" % i)
+    f.write("    regwidth = %d;\n" % regwidth)
+    for j in range(cfg.fields):
+        f.write(
+            "    field {sw=rw; hw=r;} f%d[%d:%d] = (RESET >> %d) & 1'b1;\n"
+            % (j, j, j, j % 64)
+        )
+    f.write("};\n\n")
+
+    # Innermost regfile
+    f.write("regfile rf_%d_l0 #(longint unsigned BASE = 0) {\n" % i)
+    for k in range(cfg.regs):
+        f.write("    reg_%d_t #(.RESET(BASE + %d)) r%d;\n" % (i, k, k))
+    if cfg.array_size:
+        f.write("    reg_%d_t #(.RESET(BASE)) arr[%d];\n" % (i, cfg.array_size))
+    f.write("};\n\n")
+
+    # Outer regfiles
+    for d in range(1, cfg.depth):
+        f.write("regfile rf_%d_l%d #(longint unsigned BASE = 0) {\n" % (i, d))
+        f.write("    rf_%d_l%d #(.BASE(BASE * 2 + %d)) inner;\n" % (i, d - 1, d))
+        f.write("};\n\n")
+
+    # Addrmap block
+    f.write("addrmap block_%d {\n" % i)
+    for m in range(cfg.regfiles):
+        f.write("    rf_%d_l%d #(.BASE(%d)) rf%d;\n" % (i, cfg.depth - 1, m, m))
+    inner_path = ".inner" * (cfg.depth - 1)
+    if cfg.regfiles and cfg.regs and cfg.fields:
+        # Each field is assigned at most once, since properties can only be
+        # assigned once per scope
+        n_dynamic = min(cfg.dynamic, cfg.regfiles * cfg.regs * cfg.fields)
+        for a in range(n_dynamic):
+            m = a % cfg.regfiles
+            k = (a // cfg.regfiles) % cfg.regs
+            j = (a // (cfg.regfiles * cfg.regs)) % cfg.fields
+            if a % 2:
+                f.write(
+                    '    rf%d%s.r%d.f%d->desc = "Dynamic assignment %d";\n'
+                    % (m, inner_path, k, j, a)
+                )
+            else:
+                f.write(
+                    "    rf%d%s.r%d.f%d->reset = 1'b1;\n"
+                    % (m, inner_path, k, j)
+                )
+    f.write("};\n\n")
+
+#===============================================================================
+class ModelCounter(RDLListener):
+    def __init__(self):
+        self.regs = 0
+        self.fields = 0
+
+    def enter_Reg(self, node):
+        self.regs += 1
+
+    def enter_Field(self, node):
+        self.fields += 1
+
+
+def run_once(top_path, stats):
+    """
+    Compile and elaborate the design once, recording each phase
+    """
+    rdlc = RDLCompiler(stats=stats)
+    rdlc.compile_file(top_path)
+    root = rdlc.elaborate("top")
+
+    counter = ModelCounter()
+    with stats.phase("traverse"):
+        RDLWalker(unroll=True).walk(root, counter)
+    return counter
+
+
+def measure(cfg, repeat=1, memory=True):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        top_path = generate_design(tmp_dir, cfg)
+        n_files = len(os.listdir(tmp_dir))
+        n_lines = 0
+        for filename in os.listdir(tmp_dir):
+            with open(os.path.join(tmp_dir, filename)) as f:
+                n_lines += sum(1 for _ in f)
+
+        # Timing runs. Keep the fastest time of each phase
+        best_time = {}
+        for _ in range(repeat):
+            stats = CompilerStats()
+            counter = run_once(top_path, stats)
+            for name, phase in stats.phases.items():
+                best_time[name] = min(best_time.get(name, float("inf")), phase.wall_time)
+
+        # Memory run. Tracing slows down execution, so it is done separately
+        mem_stats = None
+        if memory:
+            mem_stats = CompilerStats(trace_memory=True)
+            run_once(top_path, mem_stats)
+
+    phases = []
+    for name, phase in stats.phases.items():
+        d = collections.OrderedDict()
+        d["name"] = name
+        d["time_s"] = best_time[name]
+        if mem_stats is not None:
+            d["peak_bytes"] = mem_stats.get_phase(name).peak_memory
+        d["counters"] = phase.counters
+        phases.append(d)
+
+    results = collections.OrderedDict()
+    results["systemrdl_version"] = __version__
+    results["python_version"] = platform.python_version()
+    results["platform"] = platform.platform()
+    results["config"] = collections.OrderedDict(cfg._asdict())
+    results["repeat"] = repeat
+    results["design"] = collections.OrderedDict([
+        ("files", n_files),
+        ("lines", n_lines),
+        ("regs", counter.regs),
+        ("fields", counter.fields),
+    ])
+    results["phases"] = phases
+
+    # Top-level phases, excluding those nested within others
+    results["total_time_s"] = sum(
+        best_time[name] for name in ("preprocess", "parse", "visit", "elaborate", "traverse")
+    )
+    return results
+
+#-------------------------------------------------------------------------------
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--addrmaps", type=int, default=4, help="Number of addrmap blocks")
+    parser.add_argument("--regfiles", type=int, default=8, help="Regfiles per addrmap")
+    parser.add_argument("--regs", type=int, default=16, help="Registers per regfile")
+    parser.add_argument("--fields", type=int, default=8, help="Fields per register")
+    parser.add_argument("--depth", type=int, default=3, help="Nesting depth of parameterized regfiles")
+    parser.add_argument("--dynamic", type=int, default=64, help="Dynamic property assignments per addrmap")
+    parser.add_argument("--array-size", type=int, default=64, help="Size of the register array in each regfile")
+    parser.add_argument("--includes", type=int, default=4, help="Number of include files")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of timing runs. The fastest time of each phase is kept")
+    parser.add_argument("--no-memory", action="store_true", help="Skip memory profiling")
+    parser.add_argument("-o", "--output", help="Write JSON results to this file instead of stdout")
+    options = parser.parse_args()
+
+    cfg = DesignConfig(
+        addrmaps=options.addrmaps,
+        regfiles=options.regfiles,
+        regs=options.regs,
+        fields=options.fields,
+        depth=max(1, options.depth),
+        dynamic=options.dynamic,
+        array_size=options.array_size,
+        includes=options.includes,
+    )
+    results = measure(cfg, max(1, options.repeat), not options.no_memory)
+
+    if options.output:
+        with open(options.output, "w") as f:
+            json.dump(results, f, indent=4)
+            f.write("\n")
+    else:
+        json.dump(results, sys.stdout, indent=4)
+        sys.stdout.write("\n")
+
+if __name__ == "__main__":
+    main()
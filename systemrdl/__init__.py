@@ -1,4 +1,6 @@
 from .__about__ import __version__
 from .compiler import RDLCompiler
-from .walker import RDLListener, RDLWalker
+from .walker import RDLListener, RDLWalker, WalkerAction
 from .messages import RDLCompileError
+from .core.elab_cache import ElaborationCache
+from .stats import CompilerStats
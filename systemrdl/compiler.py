@@ -1,20 +1,27 @@
-from copy import deepcopy
-
-from antlr4 import CommonTokenStream
+import os
+import enum
+import contextlib
+import concurrent.futures
 
 from . import messages
-from .parser.SystemRDLLexer import SystemRDLLexer
-from .parser.SystemRDLParser import SystemRDLParser
 from .core.ComponentVisitor import RootVisitor
 from .core.properties import PropertyRuleBook, UserProperty
 from .core.namespace import NamespaceRegistry
 from .core.elaborate import ElabExpressionsListener, PrePlacementValidateListener, LateElabListener
 from .core.elaborate import StructuralPlacementListener
 from .core.validate import ValidateListener
+from .core.compile_cache import CompileCache
+from .core.elab_cache import ElaborationCache
+from .core.recording import record_messages
+from .core.expressions import EvalCache, FoldedConstant, AssignmentCast
+from .core.expressions import fold_constant, is_castable
+from .core.specialize import get_specialization_key, specialize
+from .core import parallel
 from . import component as comp
 from . import walker
 from .node import RootNode
 from .preprocessor import preprocessor
+from .stats import record_phase, NodeCountListener
 
 class RDLCompiler:
     
@@ -28,6 +35,21 @@ class RDLCompiler:
             Override the default message printer
         warning_flags: int
             Flags to enable warnings. See :ref:`messages_warnings` for more details.
+        cache_dir: str
+            Path to a directory used to cache compiled results between runs.
+            If set, a file whose preprocessed contents and preceding compiler
+            state are unchanged is loaded from the cache rather than being
+            parsed again.
+            Disabled by default.
+        elab_cache: :class:`~systemrdl.ElaborationCache`
+            Reuse previously elaborated addrmap contents whose definition,
+            parameters and properties are unchanged.
+            The same cache object can be shared by multiple compiler instances.
+            Disabled by default.
+        stats: :class:`~systemrdl.CompilerStats`
+            Record the wall time, memory usage and event counts of each
+            compilation and elaboration phase into this object.
+            Disabled by default.
         """
         self.env = Environment(kwargs)
         
@@ -37,8 +59,18 @@ class RDLCompiler:
         
         self.msg = self.env.msg
         self.namespace = NamespaceRegistry(self.env)
+        
+        # Copies of parameterized definitions, keyed by the definition and
+        # its parameter overrides. Instantiations with the same constant
+        # parameter values share a copy. See core.specialize
+        self.specializations = {}
         self.visitor = RootVisitor(self)
         self.root = self.visitor.component
+        
+        if self.env.cache_dir is not None:
+            self.cache = CompileCache(self.env, self.env.cache_dir)
+        else:
+            self.cache = None
     
     def define_udp(self, name, valid_type, valid_components=None, default=None):
         """
@@ -86,6 +118,12 @@ class RDLCompiler:
         
         self.env.property_rules.user_properties[udp.name] = udp
         
+        if self.cache is not None:
+            self.cache.update_state(
+                "udp", name, valid_type,
+                [c.__name__ for c in valid_components], default
+            )
+        
     
     def compile_file(self, path, incl_search_paths=None):
         """
@@ -118,27 +156,109 @@ class RDLCompiler:
         if incl_search_paths is None:
             incl_search_paths = []
         
-        fpp = preprocessor.FilePreprocessor(self.env, path, incl_search_paths)
-        preprocessed_text, seg_map = fpp.preprocess()
-        input_stream = preprocessor.PreprocessedInputStream(preprocessed_text, seg_map)
+        with record_phase(self.env.stats, "preprocess"):
+            fpp = preprocessor.FilePreprocessor(self.env, path, incl_search_paths)
+            preprocessed_text, seg_map = fpp.preprocess()
         
-        lexer = SystemRDLLexer(input_stream)
-        lexer.removeErrorListeners()
-        lexer.addErrorListener(messages.RDLAntlrErrorListener(self.msg))
+        self._compile_preprocessed(preprocessed_text, seg_map, incl_search_paths)
+    
+    
+    def compile_files(self, paths, incl_search_paths=None, jobs=None):
+        """
+        Parse & compile multiple files and append them to RDLCompiler's root
+        namespace.
         
-        token_stream = CommonTokenStream(lexer)
+        Files are preprocessed and parsed in parallel using a pool of worker
+        processes. The parsed files are then compiled into the root namespace
+        in the order they were listed, exactly as if :meth:`compile_file` was
+        called for each file in sequence. Any compiler messages are reported
+        in the same order as well.
         
-        parser = SystemRDLParser(token_stream)
-        parser.removeErrorListeners()
-        parser.addErrorListener(messages.RDLAntlrErrorListener(self.msg))
+        If any exceptions (:class:`~systemrdl.RDLCompileError` or other)
+        occur during compilation, then the RDLCompiler object should be discarded.
         
-        # Run Antlr parser on input
-        parsed_tree = parser.root()
-        if self.msg.error_count:
-            self.msg.fatal("Parse aborted due to previous errors")
+        Parameters
+        ----------
+        paths: list
+            List of paths to RDL source files
+        
+        incl_search_paths:list
+            List of additional paths to search to resolve includes.
+            See :meth:`compile_file` for more details.
+        
+        jobs: int
+            Maximum number of worker processes.
+            If unset, defaults to the number of CPUs.
+            If 1, files are compiled sequentially without using worker processes.
+        
+        Raises
+        ------
+        :class:`~systemrdl.RDLCompileError`
+            If any fatal compile error is encountered.
+        """
+        paths = list(paths)
+        
+        if incl_search_paths is None:
+            incl_search_paths = []
+        
+        if jobs is None:
+            jobs = os.cpu_count() or 1
+        jobs = min(jobs, len(paths))
+        
+        if jobs <= 1:
+            for path in paths:
+                self.compile_file(path, incl_search_paths)
+            return
+        
+        warning_flags = self.env.warning_flags
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [
+                executor.submit(parallel.parse_worker, path, incl_search_paths, warning_flags)
+                for path in paths
+            ]
+            try:
+                for future in futures:
+                    result = future.result()
+                    result.replay_messages(self.msg)
+                    self._compile_preprocessed(
+                        result.preprocessed_text, result.seg_map,
+                        incl_search_paths, result.load_tree()
+                    )
+            finally:
+                # Abandon any remaining work if compilation failed
+                for future in futures:
+                    future.cancel()
+    
+    
+    def _compile_preprocessed(self, preprocessed_text, seg_map, incl_search_paths, parsed_tree=None):
+        """
+        Compile preprocessed text into the root namespace.
+        If the text was already parsed, the resulting parse tree can be provided.
+        """
+        if self.cache is not None:
+            cache_key = self.cache.get_key(preprocessed_text, seg_map, incl_search_paths)
+            if self.cache.load(cache_key, self):
+                self.cache.hits += 1
+                return
+            self.cache.misses += 1
+            cache_snapshot = self.cache.snapshot(self)
+            with record_messages(self.msg) as cache_records:
+                self._compile_tree(preprocessed_text, seg_map, parsed_tree)
+            self.cache.store(cache_key, self, cache_snapshot, cache_records)
+        else:
+            self._compile_tree(preprocessed_text, seg_map, parsed_tree)
+    
+    def _compile_tree(self, preprocessed_text, seg_map, parsed_tree):
+        """
+        Visit the parse tree of preprocessed text, parsing it first if needed.
+        """
+        if parsed_tree is None:
+            with record_phase(self.env.stats, "parse"):
+                parsed_tree = parallel.parse_preprocessed(self.msg, preprocessed_text, seg_map)
         
         # Traverse parse tree with RootVisitor
-        self.visitor.visit(parsed_tree)
+        with record_phase(self.env.stats, "visit"):
+            self.visitor.visit(parsed_tree)
         
         # Reset default property assignments from namespace.
         # They should not be shared between files since that would be confusing.
@@ -160,7 +280,8 @@ class RDLCompiler:
         - Validation checks are performed.
         
         If a design contains multiple root-level addrmaps, ``elaborate()`` can be
-        called multiple times in order to elaborate each individually.
+        called multiple times in order to elaborate each individually, or
+        :meth:`elaborate_all` can be used to elaborate them together.
         
         If any exceptions (:class:`~systemrdl.RDLCompileError` or other)
         occur during elaboration, then the RDLCompiler object should be discarded.
@@ -177,8 +298,70 @@ class RDLCompiler:
             Overrides the top-component's instantiated name.
             By default, instantiated name is the same as ``top_def_name``
         
-        parameters: TBD
-            This feature is not implemented yet.
+        parameters: dict
+            Dictionary of parameter overrides for the top-level component.
+            Each key is a parameter name and each value is the parameter's new
+            value: an int, bool, str or enumeration member. Integers shall be
+            non-negative and fit in 64 bits.
+            
+            Elaborating the same design repeatedly with different parameter
+            values is inexpensive. Only the parts of the top-level component
+            that depend on the overridden parameters are copied and
+            re-evaluated. If an ``elab_cache`` is also used, addrmaps whose
+            contents are unaffected by the parameters are not elaborated again.
+        
+        Raises
+        ------
+        :class:`~systemrdl.RDLCompileError`
+            If any fatal elaboration error is encountered
+        
+        Returns
+        -------
+        :class:`~systemrdl.node.RootNode`
+            Elaborated root meta-component's Node object.
+        """
+        with record_phase(self.env.stats, "elaborate"), self._fresh_eval_cache():
+            top_def = self._get_top_def(top_def_name)
+            top_inst = self._create_top_inst(top_def, inst_name, parameters)
+            return self._elaborate(self._create_root_inst(), [top_inst])
+    
+    def elaborate_all(self, top_def_names=None, jobs=1):
+        """
+        Elaborates several top-level addrmap components in a single pass.
+        
+        Each top-level component is instantiated as a child of the same
+        ``$root`` meta-component, in the order they were listed.
+        
+        Top-level components that are elaborated in the current process are
+        elaborated one after the other. The body of an addrmap that is common
+        to several of them is only elaborated once, and is reused by the
+        following ones in the same way as an
+        :class:`~systemrdl.ElaborationCache`. Any warnings from elaborating a
+        shared body are therefore only reported once. Bodies that cannot be
+        cached are elaborated for each top-level component.
+        
+        If any exceptions (:class:`~systemrdl.RDLCompileError` or other)
+        occur during elaboration, then the RDLCompiler object should be discarded.
+        
+        Parameters
+        ----------
+        top_def_names: list
+            Names of the addrmaps in the root namespace to elaborate.
+            If unset, all addrmaps in the root namespace are elaborated, in the
+            order they were defined.
+        
+        jobs: int
+            Maximum number of worker processes. Defaults to 1.
+            If None, the number of CPUs is used.
+            If greater than 1, top-level components are elaborated in parallel
+            by worker processes that are forked from the current process.
+            Requires the "fork" multiprocessing start method. Otherwise, or if
+            a component cannot be transferred from its worker, it is elaborated
+            in the current process.
+            
+            Work done by worker processes is not recorded by the compiler's
+            ``stats``, and the addrmaps they elaborate are not stored in its
+            ``elab_cache``.
         
         Raises
         ------
@@ -189,11 +372,99 @@ class RDLCompiler:
         -------
         :class:`~systemrdl.node.RootNode`
             Elaborated root meta-component's Node object.
+            Each top-level component is one of its children.
+            :attr:`~systemrdl.node.RootNode.top` and the address lookups of the
+            root node only refer to the first top-level component. Use
+            :meth:`~systemrdl.node.Node.get_child_by_name` to access the others.
+        """
+        with record_phase(self.env.stats, "elaborate"), self._fresh_eval_cache():
+            if top_def_names is None:
+                top_defs = [
+                    comp_def for comp_def in self.root.comp_defs.values()
+                    if isinstance(comp_def, comp.Addrmap)
+                ]
+                if not top_defs:
+                    self.msg.fatal("Could not find any 'addrmap' components to elaborate")
+            else:
+                top_defs = [self._get_top_def(name) for name in top_def_names]
+            
+            top_insts = [
+                self._create_top_inst(top_def, None, None)
+                for top_def in top_defs
+            ]
+            root_inst = self._create_root_inst()
+            
+            if jobs is None:
+                jobs = os.cpu_count() or 1
+            jobs = min(jobs, len(top_insts))
+            
+            if jobs <= 1 or not parallel.can_fork():
+                return self._elaborate_each(root_inst, top_insts)
+            
+            # Addresses and sizes are not final until elaboration completes
+            self.env.derived_cache_token = None
+            
+            shared = parallel.SharedObjects(self)
+            elaborated_tops = []
+            local_tops = []
+            for top_inst, result in zip(top_insts, parallel.elaborate_in_workers(self, top_insts, shared, jobs)):
+                elaborated_top = result.load_top(self, root_inst, shared)
+                if elaborated_top is None and not result.is_fatal:
+                    # Could not be transferred. Elaborate it here instead
+                    local_tops.append(top_inst)
+                    elaborated_tops.append(top_inst)
+                else:
+                    result.replay_messages(self.msg)
+                    elaborated_tops.append(elaborated_top)
+            
+            # Elaborate the contents of $root along with any remaining tops
+            root_node = self._elaborate(root_inst, local_tops)
+            
+            # Restore the order of top-level components
+            n_root_children = len(root_inst.children) - len(local_tops)
+            root_inst.children = root_inst.children[:n_root_children] + elaborated_tops
+            root_inst._child_index = None
+            
+            return root_node
+    
+    @contextlib.contextmanager
+    def _fresh_eval_cache(self):
+        """
+        Evaluate expressions with a new cache for the duration of an
+        elaboration. The cache is discarded afterwards, so that it does not
+        keep every evaluated expression alive for the lifetime of the compiler.
         """
-        if parameters is None:
-            parameters = {}
+        self.env.eval_cache = EvalCache()
+        try:
+            yield
+        finally:
+            self.env.eval_cache = EvalCache()
+    
+    def _elaborate_each(self, root_inst, top_insts):
+        """
+        Elaborate the top-level instances one after the other, then the
+        contents of root_inst.
+        
+        Each is elaborated in a root of its own, so that the bodies of addrmaps
+        that were elaborated for one top-level instance can be reused by the
+        following ones.
+        """
+        if self.env.elab_cache is not None:
+            elab_cache = self.env.elab_cache
+        else:
+            elab_cache = ElaborationCache()
+        
+        for top_inst in top_insts:
+            self._elaborate(self._create_root_inst(), [top_inst], elab_cache)
         
-        # Get top-level component definition to elaborate
+        root_node = self._elaborate(root_inst, [], elab_cache)
+        root_inst.children.extend(top_insts)
+        return root_node
+    
+    def _get_top_def(self, top_def_name):
+        """
+        Get top-level component definition to elaborate
+        """
         if top_def_name is not None:
             # Lookup top_def_name
             if top_def_name not in self.root.comp_defs:
@@ -202,64 +473,179 @@ class RDLCompiler:
             
             if not isinstance(top_def, comp.Addrmap):
                 self.msg.fatal("Elaboration target '%s' is not an 'addrmap' component" % top_def_name)
-        else:
-            # Not specified. Find the last addrmap defined
-            for comp_def in reversed(self.root.comp_defs.values()):
-                if isinstance(comp_def, comp.Addrmap):
-                    top_def = comp_def
-                    top_def_name = comp_def.type_name
-                    break
-            else:
-                self.msg.fatal("Could not find any 'addrmap' components to elaborate")
+            return top_def
         
-        # Create an instance of the root component
-        root_inst = deepcopy(self.root)
+        # Not specified. Find the last addrmap defined
+        for comp_def in reversed(self.root.comp_defs.values()):
+            if isinstance(comp_def, comp.Addrmap):
+                return comp_def
+        self.msg.fatal("Could not find any 'addrmap' components to elaborate")
+    
+    def _create_root_inst(self):
+        """
+        Create an instance of the root component
+        """
+        # Instances are lightweight copies that take ownership of their
+        # contents as they are elaborated. See Component._unshare()
+        root_inst = self.root._copy_instance()
+        root_inst._unshare()
         root_inst.is_instance = True
         root_inst.original_def = self.root
         root_inst.inst_name = "$root"
+        return root_inst
+    
+    def _create_top_inst(self, top_def, inst_name, parameters):
+        """
+        Create a top-level instance of top_def
+        """
+        # Override parameters as needed
+        if parameters:
+            overrides = self._get_top_overrides(top_def, parameters)
+            
+            # Reuse the copy from a previous elaboration with the same
+            # parameter values, if any
+            key = get_specialization_key(top_def, overrides)
+            top_template = self.specializations.get(key, None)
+            if top_template is None:
+                top_template = specialize(top_def, overrides)
+                if self.env.stats is not None:
+                    self.env.stats.count("deepcopies")
+                self.specializations[key] = top_template
+        else:
+            top_template = top_def
         
-        # Create a top-level instance
-        top_inst = deepcopy(top_def)
+        top_inst = top_template._copy_instance()
         top_inst.is_instance = True
         top_inst.original_def = top_def
         top_inst.addr_offset = 0
         if inst_name is not None:
             top_inst.inst_name = inst_name
         else:
-            top_inst.inst_name = top_def_name
+            top_inst.inst_name = top_def.type_name
+        return top_inst
+    
+    def _elaborate(self, root_inst, top_insts, elab_cache=None):
+        """
+        Instantiate the top-level components into the root component instance
+        and elaborate it
         
-        # Override parameters as needed
-        if len(parameters):
-            # TODO: Add mechanism to set parameters of top-level component
-            raise NotImplementedError
+        Addrmap bodies are reused from elab_cache if provided. Otherwise the
+        environment's elab_cache is used, if any.
+        """
+        if elab_cache is None:
+            elab_cache = self.env.elab_cache
+        
+        # Addresses and sizes are not final until elaboration completes
+        self.env.derived_cache_token = None
         
-        # instantiate top_inst into the root component instance
-        root_inst.children.append(top_inst)
+        root_inst.children.extend(top_insts)
         
         root_node = RootNode(root_inst, self.env, None)
         
+        # Substitute any addrmap contents that were already elaborated.
+        # Reused addrmaps are not descended into by the elaboration passes
+        if elab_cache is not None:
+            elab_pending = [
+                elab_cache.apply(top_inst) for top_inst in top_insts
+            ]
+            pre_listeners = [pending.get_listener() for pending in elab_pending]
+        else:
+            elab_pending = []
+            pre_listeners = []
+        
+        if self.env.stats is not None:
+            pre_listeners.append(NodeCountListener(self.env.stats))
+        
         # Resolve all expressions
-        walker.RDLWalker(skip_not_present=False).walk(
-            root_node,
-            ElabExpressionsListener(self.msg)
-        )
+        with record_phase(self.env.stats, "elaborate.expressions"):
+            walker.RDLWalker(skip_not_present=False).walk(
+                root_node,
+                *pre_listeners,
+                ElabExpressionsListener(self.msg)
+            )
         
         # Resolve address and field placement
-        walker.RDLWalker(skip_not_present=False).walk(
-            root_node,
-            PrePlacementValidateListener(self.msg),
-            StructuralPlacementListener(self.msg),
-            LateElabListener(self.msg)
-        )
+        with record_phase(self.env.stats, "elaborate.placement"):
+            walker.RDLWalker(skip_not_present=False).walk(
+                root_node,
+                *pre_listeners,
+                PrePlacementValidateListener(self.msg),
+                StructuralPlacementListener(self.msg),
+                LateElabListener(self.msg)
+            )
         
         # Validate design
         # Only need to validate nodes that are present
-        walker.RDLWalker(skip_not_present=True).walk(root_node, ValidateListener(self.env))
+        with record_phase(self.env.stats, "elaborate.validate"):
+            walker.RDLWalker(skip_not_present=True).walk(
+                root_node,
+                *pre_listeners,
+                ValidateListener(self.env)
+            )
         
         if self.msg.error_count:
             self.msg.fatal("Elaborate aborted due to previous errors")
         
+        for pending in elab_pending:
+            elab_cache.store(pending)
+        
+        self.env.derived_cache_token = object()
+        
         return root_node
+    
+    def _get_top_overrides(self, top_def, parameters):
+        """
+        Convert the user's parameter values into a list of overrides:
+        (parameter index, assign_expr)
+        """
+        overrides = []
+        for param_name, value in parameters.items():
+            param_idx = None
+            for i, candidate in enumerate(top_def.parameters):
+                if candidate.name == param_name:
+                    param_idx = i
+                    break
+            if param_idx is None:
+                self.msg.fatal(
+                    "Parameter '%s' not found in top-level component '%s'"
+                    % (param_name, top_def.type_name)
+                )
+            param = top_def.parameters[param_idx]
+            
+            # Values are represented the same way as literals of their type
+            if isinstance(value, bool):
+                value, value_type, width = int(value), int, 1
+            elif isinstance(value, int):
+                if value < 0 or value >= (1 << 64):
+                    self.msg.fatal(
+                        "Value of parameter '%s' does not fit in 64 bits"
+                        % param_name
+                    )
+                value_type, width = int, 64
+            elif isinstance(value, str):
+                value_type, width = str, None
+            elif isinstance(value, enum.Enum):
+                value_type = type(value)
+                width = 64 if is_castable(value_type, int) else None
+            else:
+                self.msg.fatal(
+                    "Value of parameter '%s' has unsupported type '%s'"
+                    % (param_name, type(value).__name__)
+                )
+            
+            if not is_castable(value_type, param.param_type):
+                self.msg.fatal(
+                    "Value of parameter '%s' is not compatible with its type"
+                    % param_name
+                )
+            
+            assign_expr = AssignmentCast(
+                self.env, None,
+                FoldedConstant(self.env, None, value, value_type, width),
+                param.param_type
+            )
+            overrides.append((param_idx, fold_constant(assign_expr, share=True)))
+        return overrides
 
 
 class Environment:
@@ -272,11 +658,30 @@ class Environment:
         # Collect args
         message_printer = args_dict.pop('message_printer', messages.MessagePrinter())
         warning_flags = args_dict.pop('warning_flags', 0)
+        self.cache_dir = args_dict.pop('cache_dir', None)
+        self.elab_cache = args_dict.pop('elab_cache', None)
+        self.stats = args_dict.pop('stats', None)
         
         # Warnings
+        self.warning_flags = warning_flags
         self.warn_missing_reset = bool(warning_flags & messages.W_MISSING_RESET)
         self.warn_implicit_field_pos = bool(warning_flags & messages.W_IMPLICIT_FIELD_POS)
         self.warn_implicit_addr = bool(warning_flags & messages.W_IMPLICIT_ADDR)
         
         self.msg = messages.MessageHandler(message_printer)
         self.property_rules = PropertyRuleBook(self)
+        
+        # Contents of source files that were preprocessed
+        self.preprocessor_cache = preprocessor.PreprocessorCache()
+        
+        # Constant expressions that were folded ahead of time, keyed by value.
+        # See expressions.fold_constant()
+        self.constant_pool = {}
+        
+        # Results of evaluating expressions
+        self.eval_cache = EvalCache()
+        
+        # Identifies the current set of cached node addresses and sizes.
+        # Replaced whenever the elaborated model may have changed.
+        # None while elaborating, since values are not final yet.
+        self.derived_cache_token = None
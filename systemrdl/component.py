@@ -1,5 +1,10 @@
 from copy import deepcopy
 from collections import OrderedDict
+import functools
+
+# Attributes that hold lookups derived from other attributes.
+# These are not copied or serialized, and are rebuilt on demand.
+CACHE_SLOTS = {"_child_index", "_addr_index", "_size_cache"}
 
 class Component:
     """
@@ -9,6 +14,13 @@ class Component:
         :top-classes: ~Component
     """
     
+    # Components are stored compactly since large designs contain many of them
+    __slots__ = [
+        "type_name", "children", "parameters", "properties", "def_src_ref",
+        "is_instance", "inst_name", "original_def", "external", "inst_src_ref",
+        "_is_shared", "_child_index",
+    ]
+    
     def __init__(self):
         #------------------------------
         # Component definition
@@ -56,6 +68,15 @@ class Component:
         
         # SourceRef for the component instantiation
         self.inst_src_ref = None
+        
+        # If True, children, properties and parameters are borrowed from the
+        # component this was copied from and shall not be modified in-place.
+        # See _copy_instance() and _unshare()
+        self._is_shared = False
+        
+        # Cached lookup of children by instance name.
+        # See _get_child_index()
+        self._child_index = None
     
     def __deepcopy__(self, memo):
         """
@@ -65,13 +86,77 @@ class Component:
         cls = self.__class__
         result = cls.__new__(cls)
         memo[id(self)] = result
-        for k, v in self.__dict__.items():
-            if k in copy_by_ref:
+        for k in _get_slot_names(cls):
+            v = getattr(self, k)
+            if k in CACHE_SLOTS:
+                # Cached lookups are rebuilt on demand
+                setattr(result, k, None)
+            elif k in copy_by_ref:
                 setattr(result, k, v)
             else:
                 setattr(result, k, deepcopy(v, memo))
+        # A deep copy owns all of its contents
+        result._is_shared = False
         return result
     
+    def __getstate__(self):
+        state = {}
+        for k in _get_slot_names(self.__class__):
+            if k in CACHE_SLOTS:
+                # Cached lookups are rebuilt on demand
+                state[k] = None
+            else:
+                state[k] = getattr(self, k)
+        return (None, state)
+    
+    def _copy_instance(self):
+        """
+        Create a lightweight copy of this component.
+        
+        The copy shares its children, properties and parameters with this
+        component until :meth:`_unshare` is called on it. This is used instead
+        of deepcopy when instantiating a definition, so that instances of
+        the same definition do not duplicate its contents until they diverge.
+        """
+        cls = self.__class__
+        result = cls.__new__(cls)
+        for k in _get_slot_names(cls):
+            setattr(result, k, getattr(self, k))
+        result._is_shared = True
+        return result
+    
+    def _unshare(self):
+        """
+        Take ownership of the children and properties so that they can be
+        modified without affecting any other component.
+        
+        Children are replaced with lightweight copies of themselves, which in
+        turn are unshared once they are about to be modified.
+        Parameters remain shared since they are only ever replaced as a whole
+        by a deepcopy.
+        """
+        if not self._is_shared:
+            return
+        self._is_shared = False
+        
+        self.properties = self.properties.copy()
+        
+        new_children = []
+        copy_map = {}
+        for child in self.children:
+            new_child = child._copy_instance()
+            copy_map[id(child)] = new_child
+            new_children.append(new_child)
+        
+        # Alias registers refer to a sibling. Point them to its copy
+        for child in new_children:
+            if isinstance(child, Reg) and child.is_alias:
+                child.alias_primary_inst = copy_map.get(
+                    id(child.alias_primary_inst), child.alias_primary_inst
+                )
+        
+        self.children = new_children
+    
     def __repr__(self):
         if self.is_instance:
             name_str = "%s (%s)" % (self.inst_name, self.type_name)
@@ -86,15 +171,44 @@ class Component:
         
         
     def get_child_by_name(self, inst_name):
+        return self._get_child_index().get(inst_name, None)
+    
+    def _get_child_index(self):
+        """
+        Returns a dictionary that maps instance names to children.
+        
+        Children that were appended since the index was built are added to it.
+        The index is rebuilt if the children list was replaced or became
+        shorter. It maps to child objects rather than positions, so it remains
+        valid if the children are re-ordered in-place, as is done during
+        structural placement.
+        """
+        if self._child_index is not None:
+            children, n_children, index = self._child_index
+            if children is self.children:
+                if n_children == len(children):
+                    return index
+                if n_children < len(children):
+                    for child in children[n_children:]:
+                        index.setdefault(child.inst_name, child)
+                    self._child_index = (children, len(children), index)
+                    return index
+        
+        index = {}
         for child in self.children:
-            if child.inst_name == inst_name:
-                return child
-        return None
+            # If names collide, the first child takes precedence
+            index.setdefault(child.inst_name, child)
+        self._child_index = (self.children, len(self.children), index)
+        return index
 
 class AddressableComponent(Component):
     """
     Base class for all components that can have an address
     """
+    __slots__ = [
+        "addr_offset", "addr_align", "is_array", "array_dimensions",
+        "array_stride", "_addr_index", "_size_cache",
+    ]
     
     def __init__(self):
         super().__init__()
@@ -122,10 +236,28 @@ class AddressableComponent(Component):
         #: If left as None, compiler will resolve with inferred value.
         self.array_stride = None
         
+        # Cached lookup of addressable children by address.
+        # See node.AddressableNode.find_by_address()
+        self._addr_index = None
+        
+        # Cached size of the elaborated component.
+        # See node.AddressableNode.size
+        self._size_cache = None
+    
+    def _copy_instance(self):
+        result = super()._copy_instance()
+        # Array dimensions are resolved in-place during elaboration.
+        # The copy is of the same class as self, but pylint infers the base
+        # class for it
+        if self.array_dimensions is not None:
+            result.array_dimensions = list(self.array_dimensions) # pylint: disable=assigning-non-slot
+        return result
+        
 class VectorComponent(Component):
     """
     Base class for all components that are vector-like
     """
+    __slots__ = ["width", "msb", "lsb", "high", "low"]
     
     def __init__(self):
         super().__init__()
@@ -150,18 +282,22 @@ class Root(Component):
     """
     Meta-component used by compiler to represent the root scope
     """
+    __slots__ = ["comp_defs"]
+    
     def __init__(self):
         super().__init__()
         # Component definitions in the global root scope
         self.comp_defs = OrderedDict()
     
 class Signal(VectorComponent):
-    pass
+    __slots__ = []
     
 class Field(VectorComponent):
-    pass
+    __slots__ = []
 
 class Reg(AddressableComponent):
+    __slots__ = ["is_alias", "alias_primary_inst"]
+    
     def __init__(self):
         super().__init__()
         #------------------------------
@@ -174,10 +310,21 @@ class Reg(AddressableComponent):
         self.alias_primary_inst = None
     
 class Regfile(AddressableComponent):
-    pass
+    __slots__ = []
     
 class Addrmap(AddressableComponent):
-    pass
+    __slots__ = []
     
 class Mem(AddressableComponent):
-    pass
+    __slots__ = []
+
+#===============================================================================
+@functools.lru_cache(maxsize=None)
+def _get_slot_names(cls):
+    """
+    Returns the names of all attributes of a component class
+    """
+    names = []
+    for c in reversed(cls.__mro__):
+        names.extend(c.__dict__.get("__slots__", []))
+    return tuple(names)
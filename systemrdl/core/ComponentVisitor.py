@@ -1,4 +1,3 @@
-from copy import deepcopy
 from collections import OrderedDict
 
 from ..parser.SystemRDLParser import SystemRDLParser
@@ -9,6 +8,7 @@ from .EnumVisitor import EnumVisitor
 from .StructVisitor import StructVisitor
 from .UDPVisitor import UDPVisitor
 from .parameter import Parameter
+from .specialize import get_specialization_key, specialize
 from .helpers import get_ID_text
 from . import expressions
 
@@ -207,46 +207,63 @@ class ComponentVisitor(BaseVisitor):
         # Unpack instance def info from parent
         comp_def, inst_type, alias_primary_inst = self._tmp
         
-        if comp_def.type_name is not None:
-            # Instantiating a named definition.
-            # Make a copy of the component def to preserve original definition
-            # in case it is being parameterized
-            comp_inst_template = deepcopy(comp_def)
-            comp_inst_template.original_def = comp_def
-        else:
-            # Anonymous declaration. Impossible to parameterize so no need to copy
-            comp_inst_template = comp_def
-            comp_inst_template.original_def = comp_def
-        
         # Get a dictionary of parameter assignments
         if ctx.param_inst() is not None:
             param_assigns = self.visit(ctx.param_inst())
         else:
             param_assigns = {}
         
-        # Assign parameter overrides, if any
+        # Resolve parameter overrides, if any
+        # List of (parameter index, assign_expr)
+        overrides = []
         for param_name, (assign_expr, src_ref) in param_assigns.items():
             # Lookup corresponding parameter in component
-            for comp_param in comp_inst_template.parameters:
+            for i, comp_param in enumerate(comp_def.parameters):
                 if comp_param.name == param_name:
                     param = comp_param
                     break
             else:
                 self.msg.fatal(
                     "Parameter '%s' not found in definition for component '%s'" 
-                    % (param_name, comp_inst_template.name),
+                    % (param_name, comp_def.type_name),
                     src_ref
                 )
             
-            # Override the value
             assign_expr = expressions.AssignmentCast(self.compiler.env, src_ref, assign_expr, param.param_type)
             assign_expr.predict_type()
-            param.expr = assign_expr
+            assign_expr = expressions.fold_constant(assign_expr, share=True)
+            overrides.append((i, assign_expr))
+        
+        if overrides:
+            # Instantiating a parameterized definition.
+            # Reuse the copy of a previous instantiation with the same
+            # parameter values, if any.
+            # Only the unelaborated copy is shared. Each instance is still
+            # elaborated individually, since its elaborated contents also
+            # depend on where it is instantiated, such as dynamic property
+            # assignments and the addressing mode of its parent.
+            key = get_specialization_key(comp_def, overrides)
+            comp_inst_template = self.compiler.specializations.get(key, None)
+            if comp_inst_template is None:
+                # Make a copy of the component def with the overridden values
+                # to preserve original definition
+                comp_inst_template = specialize(comp_def, overrides)
+                if self.compiler.env.stats is not None:
+                    self.compiler.env.stats.count("deepcopies")
+                
+                if key is not None:
+                    self.compiler.specializations[key] = comp_inst_template
+        else:
+            # Instances share the definition's contents until they diverge.
+            # No need to copy
+            comp_inst_template = comp_def
         
         # Do instantiations
         for inst in ctx.getTypedRuleContexts(SystemRDLParser.Component_instContext):
-            # Make a copy of the template so that the instance is unique
-            comp_inst = deepcopy(comp_inst_template)
+            # Make a lightweight copy of the template so that the instance is
+            # unique. Its contents are copied once they are modified
+            comp_inst = comp_inst_template._copy_instance()
+            comp_inst.original_def = comp_def
             
             # Pass some temporary info to visitComponent_inst
             self._tmp = comp_inst, inst_type, alias_primary_inst
@@ -266,7 +283,7 @@ class ComponentVisitor(BaseVisitor):
         expr = visitor.visit(ctx.expr())
         expr = expressions.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.op), expr, int)
         expr.predict_type()
-        return expr
+        return expressions.fold_constant(expr, share=True)
         
     def visitComponent_inst(self, ctx:SystemRDLParser.Component_instContext):
         # Unpack instance def info from parent
@@ -383,6 +400,7 @@ class ComponentVisitor(BaseVisitor):
             
             # directly override field reset property
             if (field_inst_reset is not None) and (type(comp_inst == comp.Field)):
+                comp_inst._unshare()
                 comp_inst.properties['reset'] = field_inst_reset
             
         elif isinstance(comp_inst, comp.AddressableComponent):
@@ -457,6 +475,7 @@ class ComponentVisitor(BaseVisitor):
             default_expr = visitor.visit(ctx.expr())
             default_expr = expressions.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.ID()), default_expr, param_type)
             default_expr.predict_type()
+            default_expr = expressions.fold_constant(default_expr, share=True)
         else:
             default_expr = None
         
@@ -557,9 +576,12 @@ class ComponentVisitor(BaseVisitor):
             raise RuntimeError
         
         # Lookup component instance being assigned
+        # Each instance along the path takes ownership of its contents since
+        # the assignment shall not affect other instances of the same definition
         target_inst = self.component
         for name_token in name_tokens:
             inst_name = get_ID_text(name_token)
+            target_inst._unshare()
             target_inst = target_inst.get_child_by_name(inst_name)
             if target_inst is None:
                 # Not found!
@@ -567,6 +589,7 @@ class ComponentVisitor(BaseVisitor):
                     "Could not resolve hierarchical reference to '%s'" % inst_name,
                     SourceRef.from_antlr(name_token)
                 )
+        target_inst._unshare()
         
         # Add assignment to dynamic_property_dict
         target_inst_dict = self.dynamic_property_dict.get(target_inst, OrderedDict())
@@ -756,10 +779,12 @@ class ComponentVisitor(BaseVisitor):
         expr1 = visitor.visit(ctx.expr(0))
         expr1 = expressions.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.expr(0)), expr1, int)
         expr1.predict_type()
+        expr1 = expressions.fold_constant(expr1, share=True)
         
         expr2 = visitor.visit(ctx.expr(1))
         expr2 = expressions.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.expr(1)), expr2, int)
         expr2.predict_type()
+        expr2 = expressions.fold_constant(expr2, share=True)
         
         return expr1, expr2
 
@@ -768,7 +793,7 @@ class ComponentVisitor(BaseVisitor):
         expr = visitor.visit(ctx.expr())
         expr = expressions.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.expr()), expr, int)
         expr.predict_type()
-        return expr
+        return expressions.fold_constant(expr, share=True)
     
     #---------------------------------------------------------------------------
     # Type Handling
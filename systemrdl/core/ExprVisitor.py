@@ -12,7 +12,17 @@ from .parameter import Parameter
 from .helpers import get_ID_text
 
 class ExprVisitor(BaseVisitor):
-        
+    
+    def fold(self, expr):
+        """
+        Fold the expression if it is a constant operand of another expression.
+        
+        Its parent determines the evaluation width, so expressions whose value
+        depends on it are left as-is. These are folded as part of their
+        parent instead.
+        """
+        return e.fold_constant(expr, in_context=True)
+    
     #---------------------------------------------------------------------------
     # Numerical Expressions
     #---------------------------------------------------------------------------
@@ -57,22 +67,29 @@ class ExprVisitor(BaseVisitor):
         l = self.visit(ctx.expr(0))
         r = self.visit(ctx.expr(1))
         expr_class = self._BinaryExpr_map[ctx.op.type]
-        return expr_class(self.compiler.env, SourceRef.from_antlr(ctx.op), l, r)
+        if issubclass(expr_class, e._ExpShiftExpr):
+            # Right operand is self-determined
+            r = e.fold_constant(r)
+        expr = expr_class(self.compiler.env, SourceRef.from_antlr(ctx.op), l, r)
+        return self.fold(expr)
 
 
     # Visit a parse tree produced by SystemRDLParser#UnaryExpr.
     def visitUnaryExpr(self, ctx:SystemRDLParser.UnaryExprContext):
         n = self.visit(ctx.expr_primary())
         expr_class = self._UnaryExpr_map[ctx.op.type]
-        return expr_class(self.compiler.env, SourceRef.from_antlr(ctx.op), n)
+        expr = expr_class(self.compiler.env, SourceRef.from_antlr(ctx.op), n)
+        return self.fold(expr)
 
 
     # Visit a parse tree produced by SystemRDLParser#TernaryExpr.
     def visitTernaryExpr(self, ctx:SystemRDLParser.TernaryExprContext):
-        i = self.visit(ctx.expr(0))
+        # Truth expression is self-determined
+        i = e.fold_constant(self.visit(ctx.expr(0)))
         j = self.visit(ctx.expr(1))
         k = self.visit(ctx.expr(2))
-        return e.TernaryExpr(self.compiler.env, SourceRef.from_antlr(ctx.op), i, j, k)
+        expr = e.TernaryExpr(self.compiler.env, SourceRef.from_antlr(ctx.op), i, j, k)
+        return self.fold(expr)
     
     
     # Visit a parse tree produced by SystemRDLParser#paren_expr.
@@ -288,7 +305,7 @@ class ExprVisitor(BaseVisitor):
         
         expr = e.Concatenate(self.compiler.env, SourceRef.from_antlr(ctx), elements)
         expr.predict_type()
-        return expr
+        return self.fold(expr)
     
     
     def visitReplicate(self, ctx:SystemRDLParser.ReplicateContext):
@@ -296,7 +313,7 @@ class ExprVisitor(BaseVisitor):
         concat_expr = self.visit(ctx.concatenate())
         expr = e.Replicate(self.compiler.env, SourceRef.from_antlr(ctx), reps_expr, concat_expr)
         expr.predict_type()
-        return expr
+        return self.fold(expr)
     
     #---------------------------------------------------------------------------
     # Cast
@@ -305,20 +322,23 @@ class ExprVisitor(BaseVisitor):
     def visitCastType(self, ctx:SystemRDLParser.CastTypeContext):
         if ctx.typ.type == SystemRDLParser.LONGINT_kw:
             # Longint gets truncated to 64-bits
-            return e.WidthCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()), w_int=64)
+            expr = e.WidthCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()), w_int=64)
         elif ctx.typ.type == SystemRDLParser.BIT_kw:
             # Cast to bit remains unaffected, but in self-determined context
             # Use assignment cast to isolate evaluation
-            return e.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()), int)
+            expr = e.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()), int)
         elif ctx.typ.type == SystemRDLParser.BOOLEAN_kw:
-            return e.BoolCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()))
+            expr = e.BoolCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()))
         else:
             raise RuntimeError
+        return self.fold(expr)
 
     # Visit a parse tree produced by SystemRDLParser#CastWidth.
     def visitCastWidth(self, ctx:SystemRDLParser.CastWidthContext):
-        w = self.visit(ctx.cast_width_expr())
-        return e.WidthCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()), w_expr=w)
+        # Width is self-determined
+        w = e.fold_constant(self.visit(ctx.cast_width_expr()))
+        expr = e.WidthCast(self.compiler.env, SourceRef.from_antlr(ctx.op), self.visit(ctx.expr()), w_expr=w)
+        return self.fold(expr)
     
     #---------------------------------------------------------------------------
     # References
@@ -413,4 +433,4 @@ class ExprVisitor(BaseVisitor):
         expr = self.visit(ctx.expr())
         expr = e.AssignmentCast(self.compiler.env, SourceRef.from_antlr(ctx.expr()), expr, int)
         expr.predict_type()
-        return expr
+        return e.fold_constant(expr)
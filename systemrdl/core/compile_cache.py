@@ -0,0 +1,310 @@
+import os
+import io
+import pickle
+import hashlib
+import inspect
+from collections import OrderedDict
+
+from .. import component as comp
+from .. import rdltypes
+from ..__about__ import __version__
+from .helpers import write_atomic
+from .recording import replay_messages
+
+class CompileCache:
+    """
+    Persistent on-disk cache of compiled root namespace contributions.
+
+    Each call to ``compile_file()`` contributes a set of new definitions to the
+    compiler's root namespace. When enabled, this contribution is serialized
+    to the cache directory after it is compiled. Subsequent compilations of the
+    same preprocessed source text, with the same compiler state, load the
+    contribution directly and skip lexing, parsing and visiting. Any messages
+    that were emitted while compiling the file are stored along with the
+    contribution, and are emitted again when it is loaded.
+
+    Since the result of compiling a file depends on everything that was
+    compiled before it, cache keys are chained: each key incorporates the key
+    of the previous compilation step.
+    """
+
+    def __init__(self, env, cache_dir):
+        self.env = env
+        self.cache_dir = cache_dir
+
+        #: Number of compile_file() calls that were satisfied by the cache
+        self.hits = 0
+
+        #: Number of compile_file() calls that had to be compiled
+        self.misses = 0
+
+        # Cleared if a contribution could not be serialized. Subsequent
+        # contributions would reference objects that can not be restored
+        self.enabled = True
+
+        # Running digest of the compiler state
+        self.state_key = hashlib.sha1(
+            ("systemrdl-compiler %s" % __version__).encode('utf-8')
+        ).hexdigest()
+
+        # Objects contributed by previous compilation steps that later steps
+        # may reference. Each is identified by the key of the step that
+        # contributed it, and its position in that step's export list.
+        #   id(obj) : (obj, pid)
+        self.exported_ids = {}
+        #   (key, idx) : obj
+        self.exported_objs = {}
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    #---------------------------------------------------------------------------
+    def update_state(self, *items):
+        """
+        Fold additional information that affects compilation results into the
+        running state key. (eg: pre-defined user properties)
+        """
+        h = hashlib.sha1(self.state_key.encode('utf-8'))
+        for item in items:
+            h.update(repr(item).encode('utf-8'))
+        self.state_key = h.hexdigest()
+
+
+    def get_key(self, preprocessed_text, seg_map, incl_search_paths):
+        """
+        Derive the cache key for compiling the preprocessed text on top of the
+        current compiler state.
+
+        The segment map is included since resulting SourceRef objects refer to
+        the original source files and offsets.
+        """
+        h = hashlib.sha1(self.state_key.encode('utf-8'))
+        h.update(preprocessed_text.encode('utf-8'))
+        for segment in seg_map.segments:
+            h.update(repr((
+                type(segment).__name__,
+                segment.start, segment.end,
+                segment.src_start, segment.src_end,
+                segment.src
+            )).encode('utf-8'))
+        h.update(repr(list(incl_search_paths)).encode('utf-8'))
+        return h.hexdigest()
+
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, key + ".pkl")
+
+    #---------------------------------------------------------------------------
+    def snapshot(self, compiler):
+        """
+        Capture which namespace entries exist prior to compiling a file, so
+        that the new contribution can be determined afterwards.
+        """
+        return (
+            set(compiler.root.comp_defs.keys()),
+            set(compiler.namespace.type_ns_stack[0].keys()),
+            set(compiler.namespace.element_ns_stack[0].keys()),
+            len(compiler.root.children),
+            set(compiler.env.property_rules.user_properties.keys()),
+        )
+
+
+    def store(self, key, compiler, snapshot, records):
+        """
+        Serialize the contribution made to the compiler since ``snapshot`` was
+        taken, along with the message records emitted while it was compiled.
+        """
+        if not self.enabled:
+            return
+
+        comp_def_names, type_names, element_names, n_children, udp_names = snapshot
+
+        contribution = (
+            [(k, v) for k, v in compiler.root.comp_defs.items() if k not in comp_def_names],
+            [(k, v) for k, v in compiler.namespace.type_ns_stack[0].items() if k not in type_names],
+            [(k, v) for k, v in compiler.namespace.element_ns_stack[0].items() if k not in element_names],
+            compiler.root.children[n_children:],
+            # Root-level dynamic assignments may modify pre-existing signals
+            [child.properties for child in compiler.root.children[:n_children]],
+            [(k, v) for k, v in compiler.env.property_rules.user_properties.items() if k not in udp_names],
+            records,
+        )
+
+        buf = io.BytesIO()
+        pickler = _ContributionPickler(buf, self, compiler)
+        try:
+            pickler.dump(contribution)
+            # Dump exports separately afterwards. Since the pickle memo is
+            # shared, these become references to objects in the contribution
+            pickler.dump(pickler.exports)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Contribution contains something that cannot be serialized.
+            # Stop caching for the remainder of this compiler's lifetime.
+            self.enabled = False
+            return
+
+        self._register_exports(key, pickler.exports)
+        self.state_key = key
+
+        try:
+            write_atomic(self._get_path(key), buf.getvalue())
+        except OSError:
+            pass
+
+
+    def load(self, key, compiler):
+        """
+        Attempt to apply a cached contribution to the compiler.
+
+        Returns True if successful.
+        """
+        if not self.enabled:
+            return False
+
+        path = self._get_path(key)
+        if not os.path.isfile(path):
+            return False
+
+        try:
+            with open(path, 'rb') as f:
+                unpickler = _ContributionUnpickler(f, self, compiler)
+                (comp_defs, types, elements, new_children,
+                    children_properties, udps, records) = unpickler.load()
+                exports = unpickler.load()
+        except Exception: # pylint: disable=broad-except
+            # Corrupt or stale entry. Recompile instead
+            return False
+
+        for name, comp_def in comp_defs:
+            compiler.root.comp_defs[name] = comp_def
+        for name, ref in types:
+            compiler.namespace.type_ns_stack[0][name] = ref
+        for name, ref in elements:
+            compiler.namespace.element_ns_stack[0][name] = ref
+        for child, properties in zip(compiler.root.children, children_properties):
+            child.properties = properties
+        compiler.root.children.extend(new_children)
+        for name, udp in udps:
+            compiler.env.property_rules.user_properties[name] = udp
+
+        self._register_exports(key, exports)
+        self.state_key = key
+
+        # Report the messages as if the file was compiled again
+        replay_messages(compiler.msg, records)
+        return True
+
+
+    def _register_exports(self, key, exports):
+        for idx, obj in enumerate(exports):
+            pid = ("ext", key, idx)
+            self.exported_ids[id(obj)] = (obj, pid)
+            self.exported_objs[(key, idx)] = obj
+
+#===============================================================================
+def _is_dynamic_type(obj):
+    """
+    User-defined enums and structs are classes that are created at compile-time.
+    These cannot be pickled by reference.
+    """
+    if not inspect.isclass(obj):
+        return False
+    if rdltypes.is_user_enum(obj):
+        return obj is not rdltypes.UserEnum
+    if rdltypes.is_user_struct(obj):
+        return obj is not rdltypes.UserStruct
+    return False
+
+
+class _ContributionPickler(pickle.Pickler):
+    def __init__(self, file, cache, compiler):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.cache = cache
+        self.compiler = compiler
+
+        # Objects introduced by this contribution that need to retain their
+        # identity when referenced by later contributions
+        self.exports = []
+        self.export_idx = {}
+
+    def persistent_id(self, obj): # pylint: disable=method-hidden
+        # Resources that belong to the compiler session are never serialized
+        if obj is self.compiler.env:
+            return ("env",)
+        if obj is self.compiler.msg:
+            return ("msg",)
+        if obj is self.compiler.root:
+            return ("root",)
+
+        entry = self.cache.exported_ids.get(id(obj), None)
+        if entry is not None:
+            return entry[1]
+
+        if isinstance(obj, comp.Component):
+            if id(obj) not in self.export_idx:
+                self.export_idx[id(obj)] = len(self.exports)
+                self.exports.append(obj)
+            return None
+
+        if isinstance(obj, rdltypes.UserEnum):
+            # Enum members are not retrievable by value. Look up by name instead
+            return ("member", type(obj), obj.name)
+
+        if _is_dynamic_type(obj):
+            if id(obj) in self.export_idx:
+                return ("type", self.export_idx[id(obj)])
+            idx = len(self.exports)
+            self.export_idx[id(obj)] = idx
+            self.exports.append(obj)
+
+            if rdltypes.is_user_enum(obj):
+                entries = [
+                    (member.name, (member.value, member.rdl_name, member.rdl_desc))
+                    for member in obj
+                ]
+                return ("enum", idx, obj.__name__, entries)
+            else:
+                base = obj.__bases__[0]
+                members = [
+                    (k, v) for k, v in obj._members.items()
+                    if k not in base._members
+                ]
+                return ("struct", idx, obj.__name__, base, members, obj._is_abstract)
+
+        return None
+
+
+class _ContributionUnpickler(pickle.Unpickler):
+    def __init__(self, file, cache, compiler):
+        super().__init__(file)
+        self.cache = cache
+        self.compiler = compiler
+        self.types = {}
+
+    def persistent_load(self, pid): # pylint: disable=method-hidden
+        kind = pid[0]
+        if kind == "env":
+            return self.compiler.env
+        elif kind == "msg":
+            return self.compiler.msg
+        elif kind == "root":
+            return self.compiler.root
+        elif kind == "ext":
+            return self.cache.exported_objs[(pid[1], pid[2])]
+        elif kind == "type":
+            return self.types[pid[1]]
+        elif kind == "member":
+            return pid[1][pid[2]]
+        elif kind == "enum":
+            _, idx, name, entries = pid
+            # Functional API of the enum metaclass, whose signature pylint
+            # does not infer
+            enum_type = rdltypes.UserEnum(name, OrderedDict(entries)) #pylint: disable=no-value-for-parameter,too-many-function-args
+            self.types[idx] = enum_type
+            return enum_type
+        elif kind == "struct":
+            _, idx, name, base, members, is_abstract = pid
+            struct_type = base.define_new(name, OrderedDict(members), is_abstract)
+            self.types[idx] = struct_type
+            return struct_type
+        else:
+            raise pickle.UnpicklingError("Unknown persistent id: %s" % kind)
@@ -0,0 +1,326 @@
+import copy
+import enum
+import inspect
+import hashlib
+
+from .. import component as comp
+from .. import rdltypes
+from .. import walker
+from ..messages import SourceRef
+from .expressions import Expr, InstRef
+from .parameter import Parameter
+
+class ElaborationCache:
+    """
+    Cache of elaborated addrmap contents that enables incremental elaboration.
+
+    Prior to elaborating a design, each addrmap instance is fingerprinted based
+    on the contents of its body: its definition, parameter values, properties
+    and all of its descendants. If an addrmap with the same fingerprint was
+    elaborated previously, its elaborated children are reused and elaboration
+    of its descendants is skipped. The addrmap instance itself is always
+    elaborated, since its address and array properties depend on where it is
+    instantiated.
+
+    Only addrmap bodies are reused since they do not inherit any elaboration
+    context from their parent (``msb0``, ``addressing`` and ``alignment`` are
+    not propagated into an addrmap). Bodies that contain hierarchical
+    references that resolve outside of the addrmap are never reused.
+
+    The same cache object can be passed to multiple :class:`~systemrdl.RDLCompiler`
+    instances. Elaborated components are shared between designs and shall be
+    treated as read-only. If a body is reused by a different compiler, any
+    components whose references are relative to the addrmap's definition are
+    copied so that they refer to that compiler's definition instead.
+
+    .. note::
+        Warnings that would have been emitted while elaborating a reused
+        addrmap's descendants are not repeated.
+
+    .. note::
+        Addrmaps that are elaborated in worker processes by
+        :meth:`~systemrdl.RDLCompiler.elaborate_all` are not stored.
+    """
+
+    def __init__(self):
+        #: Number of addrmap bodies that were reused
+        self.hits = 0
+
+        #: Number of addrmap bodies that had to be elaborated
+        self.misses = 0
+
+        # fingerprint : (definition, list of elaborated child components)
+        self._entries = {}
+
+    def clear(self):
+        """
+        Discard all cached elaboration results
+        """
+        self._entries = {}
+
+    #---------------------------------------------------------------------------
+    def apply(self, top_inst):
+        """
+        Substitutes previously elaborated contents into any matching addrmaps
+        of the unelaborated instance tree.
+
+        Returns a pending context object that is passed to :meth:`store` once
+        elaboration completes successfully.
+        """
+        fp = _Fingerprinter()
+        pending = _PendingElaboration()
+        self._apply(top_inst, fp, pending)
+        return pending
+
+    def _apply(self, inst, fp, pending):
+        # Children are replaced or descended into. Ensure they are unique to
+        # this instance
+        inst._unshare()
+        
+        fingerprint = fp.get_body_fingerprint(inst)
+        if fingerprint is not None and fingerprint in self._entries:
+            body_def, children = self._entries[fingerprint]
+            if body_def is not inst.original_def:
+                # Body was elaborated for an equivalent definition, usually
+                # one that belongs to another compiler
+                key = (fingerprint, id(inst.original_def))
+                if key not in pending.remapped:
+                    pending.remapped[key] = _remap_children(
+                        children, body_def, inst.original_def
+                    )
+                children = pending.remapped[key]
+            inst.children = list(children)
+            pending.reused_ids.add(id(inst))
+            self.hits += 1
+            return
+
+        self.misses += 1
+        if fingerprint is not None:
+            pending.to_store.append((fingerprint, inst))
+
+        for child in inst.children:
+            if isinstance(child, comp.Addrmap):
+                self._apply(child, fp, pending)
+
+    def store(self, pending):
+        """
+        Save the elaborated contents of addrmaps that were not reused.
+        """
+        for fingerprint, inst in pending.to_store:
+            self._entries[fingerprint] = (inst.original_def, list(inst.children))
+
+
+class _PendingElaboration:
+    def __init__(self):
+        self.reused_ids = set()
+        self.to_store = []
+
+        # (fingerprint, id(definition)) : remapped list of children
+        self.remapped = {}
+
+    def get_listener(self):
+        return _ReuseListener(self.reused_ids)
+
+
+class _ReuseListener(walker.RDLListener):
+    """
+    Prevents elaboration listeners from descending into reused addrmaps
+    """
+    def __init__(self, reused_ids):
+        self.reused_ids = reused_ids
+
+    def enter_Addrmap(self, node):
+        if id(node.inst) in self.reused_ids:
+            return walker.WalkerAction.SkipDescendants
+        return None
+
+#===============================================================================
+def _remap_children(children, old_def, new_def):
+    """
+    Returns the children with references relative to old_def redirected to
+    new_def.
+
+    Cached components are shared, so only the components that contain such
+    references, and their ancestors, are copied.
+    """
+    return [_remap_component(child, old_def, new_def) for child in children]
+
+
+def _remap_component(inst, old_def, new_def):
+    properties = None
+    for prop_name, value in inst.properties.items():
+        new_value = _remap_value(value, old_def, new_def)
+        if new_value is not value:
+            if properties is None:
+                properties = inst.properties.copy()
+            properties[prop_name] = new_value
+
+    children = _remap_children(inst.children, old_def, new_def)
+    children_changed = any(a is not b for a, b in zip(children, inst.children))
+
+    if properties is None and not children_changed:
+        return inst
+
+    result = inst._copy_instance()
+    for k in comp.CACHE_SLOTS:
+        if hasattr(result, k):
+            setattr(result, k, None)
+    if properties is not None:
+        result.properties = properties
+    if children_changed:
+        # Alias registers refer to a sibling. Point them to its copy
+        copy_map = {id(a): b for a, b in zip(inst.children, children)}
+        for i, child in enumerate(children):
+            if not (isinstance(child, comp.Reg) and child.is_alias):
+                continue
+            primary = copy_map.get(id(child.alias_primary_inst), child.alias_primary_inst)
+            if primary is child.alias_primary_inst:
+                continue
+            if child is inst.children[i]:
+                child = child._copy_instance()
+                children[i] = child
+            child.alias_primary_inst = primary
+        result.children = children
+    return result
+
+
+def _remap_value(value, old_def, new_def):
+    if isinstance(value, rdltypes.ComponentRef):
+        if value.ref_root is old_def:
+            return rdltypes.ComponentRef(new_def, value.ref_elements)
+    elif isinstance(value, rdltypes.PropertyReference):
+        comp_ref = value._comp_ref
+        if comp_ref is not None and comp_ref.ref_root is old_def:
+            result = copy.copy(value)
+            result._comp_ref = rdltypes.ComponentRef(new_def, comp_ref.ref_elements)
+            return result
+    return value
+
+#===============================================================================
+class _NotFingerprintable(Exception):
+    pass
+
+class _Fingerprinter:
+    """
+    Derives content fingerprints of unelaborated component instances.
+    """
+
+    # Attributes that are fingerprinted separately or are irrelevant
+    _excluded_attrs = {
+        "children", "parameters", "properties", "type_name", "comp_defs",
+        "original_def", "def_src_ref", "inst_src_ref", "alias_primary_inst",
+        "_is_shared",
+    } | comp.CACHE_SLOTS
+
+    def __init__(self):
+        # id(inst) : (body digest, instance digest, unresolved ref_root ids)
+        self._memo = {}
+
+    def get_body_fingerprint(self, inst):
+        """
+        Returns the fingerprint of the component's body, or None if the body
+        cannot be reused.
+        """
+        try:
+            body_digest, _, unresolved = self._get_digests(inst)
+        except _NotFingerprintable:
+            return None
+        if unresolved:
+            return None
+        return body_digest
+
+    def _get_digests(self, inst):
+        if id(inst) in self._memo:
+            return self._memo[id(inst)]
+
+        refs = set()
+
+        # Body fingerprint
+        h = hashlib.sha1()
+        if inst.original_def is not None:
+            def_type_name = inst.original_def.type_name
+        else:
+            def_type_name = inst.type_name
+        h.update(repr((type(inst).__name__, def_type_name)).encode('utf-8'))
+        for param in inst.parameters:
+            h.update(repr(self._canonical(param, refs)).encode('utf-8'))
+        for prop_name in sorted(inst.properties.keys()):
+            h.update(repr(
+                (prop_name, self._canonical(inst.properties[prop_name], refs))
+            ).encode('utf-8'))
+        for child in inst.children:
+            _, child_inst_digest, child_refs = self._get_digests(child)
+            h.update(child_inst_digest.encode('utf-8'))
+            refs.update(child_refs)
+        body_digest = h.hexdigest()
+
+        # Any references relative to this component's definition are resolved
+        # within its body
+        if inst.original_def is not None:
+            refs.discard(id(inst.original_def))
+
+        # Instance fingerprint
+        h = hashlib.sha1(body_digest.encode('utf-8'))
+        for k in sorted(comp._get_slot_names(type(inst))):
+            if k in self._excluded_attrs:
+                continue
+            h.update(repr((k, self._canonical(getattr(inst, k), refs))).encode('utf-8'))
+        if isinstance(inst, comp.Reg) and inst.is_alias:
+            h.update(repr(("alias", inst.alias_primary_inst.inst_name)).encode('utf-8'))
+        inst_digest = h.hexdigest()
+
+        result = (body_digest, inst_digest, frozenset(refs))
+        self._memo[id(inst)] = result
+        return result
+
+    def _canonical(self, value, refs):
+        """
+        Convert a value into a structure of builtin types that describes it
+        """
+        if value is None or isinstance(value, (bool, int, str)):
+            return value
+        elif isinstance(value, enum.Enum):
+            return ("enum", self._canonical_type(type(value)), value.name)
+        elif inspect.isclass(value):
+            return self._canonical_type(value)
+        elif isinstance(value, (list, tuple)):
+            return tuple(self._canonical(v, refs) for v in value)
+        elif isinstance(value, dict):
+            return tuple((k, self._canonical(v, refs)) for k, v in value.items())
+        elif isinstance(value, SourceRef):
+            return None
+        elif isinstance(value, Parameter):
+            # Parameters are described by their value
+            return ("param", value.name, self._canonical(value.get_value(), refs))
+        elif isinstance(value, (InstRef, rdltypes.ComponentRef)):
+            refs.add(id(value.ref_root))
+            return (
+                "ref", value.ref_root.type_name,
+                self._canonical(value.ref_elements, refs)
+            )
+        elif isinstance(value, Expr):
+            return (type(value).__name__,) + tuple(
+                (k, self._canonical(v, refs))
+                for k, v in sorted(value.__dict__.items())
+                if k not in ("env", "msg", "src_ref")
+            )
+        elif isinstance(value, rdltypes.UserStruct):
+            return (
+                "struct", self._canonical_type(type(value)),
+                self._canonical(value._values, refs)
+            )
+        elif isinstance(value, rdltypes.ArrayPlaceholder):
+            return ("array", self._canonical(value.element_type, refs))
+        else:
+            raise _NotFingerprintable
+
+    def _canonical_type(self, t):
+        if rdltypes.is_user_enum(t):
+            return ("enum_type", t.__name__, tuple((m.name, m.value) for m in t))
+        elif rdltypes.is_user_struct(t):
+            return (
+                "struct_type", t.__name__,
+                tuple((k, self._canonical(v, set())) for k, v in t._members.items())
+            )
+        else:
+            return t.__module__ + "." + t.__qualname__
@@ -1,5 +1,5 @@
 
-from .expressions import Expr
+from .expressions import Expr, _IMMUTABLE_TYPES
 from .helpers import is_pow2, roundup_pow2, roundup_to
 
 from .. import component as comp
@@ -26,27 +26,64 @@ class ElabExpressionsListener(walker.RDLListener):
     
     def __init__(self, msg_handler):
         self.msg = msg_handler
+        
+        # Elaborated type names of parameterized definitions.
+        # (original_def, parameter values) : type_name
+        self.type_names = {}
+    
+    def evaluate(self, node, expr):
+        """
+        Evaluate an expression of the node
+        """
+        stats = node.env.stats
+        if stats is not None:
+            stats.count("expr_evals")
+        return expr.get_value()
     
     def enter_Component(self, node):
+        # Instance is about to be modified. Take ownership of its contents so
+        # that the original definition is preserved
+        node.inst._unshare()
+        
         if node.inst.original_def is not None:
-            # Generate the elaborated type name as per 5.1.1.4
-            new_type_name = node.inst.original_def.type_name
-            
-            for i in range(len(node.inst.parameters)):
-                orig_param_value = node.inst.original_def.parameters[i].get_value()
-                new_param_value = node.inst.parameters[i].get_value()
-                if new_param_value != orig_param_value:
-                    new_type_name = new_type_name + "_" + node.inst.parameters[i].get_normalized_parameter()
-            node.inst.type_name = new_type_name
+            node.inst.type_name = self.get_type_name(node.inst)
+    
+    def get_type_name(self, inst):
+        """
+        Generate the elaborated type name as per 5.1.1.4
+        
+        Normalizing parameter values is expensive, so the result is reused
+        for all instances of the same definition with the same parameter
+        values.
+        """
+        values = tuple(param.get_value() for param in inst.parameters)
+        if all(isinstance(value, _IMMUTABLE_TYPES) for value in values):
+            key = (inst.original_def, values)
+            if key in self.type_names:
+                return self.type_names[key]
+        else:
+            # Array and struct values are rebuilt whenever they are evaluated,
+            # and would never match a previous key
+            key = None
+        
+        new_type_name = inst.original_def.type_name
+        for i in range(len(inst.parameters)):
+            orig_param_value = inst.original_def.parameters[i].get_value()
+            if values[i] != orig_param_value:
+                new_type_name = new_type_name + "_" + inst.parameters[i].get_normalized_parameter()
+        
+        if key is not None:
+            self.type_names[key] = new_type_name
+        return new_type_name
 
     
     def enter_AddressableComponent(self, node):
         # Evaluate instance object expressions
         if isinstance(node.inst.addr_offset, Expr):
-            node.inst.addr_offset = node.inst.addr_offset.get_value()
+            node.inst.addr_offset = self.evaluate(node, node.inst.addr_offset)
         
         if isinstance(node.inst.addr_align, Expr):
-            node.inst.addr_align = node.inst.addr_align.get_value()
+            node.inst.addr_align = self.evaluate(node, node.inst.addr_align)
             if node.inst.addr_align == 0:
                 self.msg.fatal(
                     "Alignment allocator '%=' must be greater than zero",
@@ -56,7 +93,7 @@ class ElabExpressionsListener(walker.RDLListener):
         if node.inst.array_dimensions is not None:
             for i in range(len(node.inst.array_dimensions)):
                 if isinstance(node.inst.array_dimensions[i], Expr):
-                    node.inst.array_dimensions[i] = node.inst.array_dimensions[i].get_value()
+                    node.inst.array_dimensions[i] = self.evaluate(node, node.inst.array_dimensions[i])
                     if node.inst.array_dimensions[i] == 0:
                         self.msg.fatal(
                             "Array dimension must be greater than zero",
@@ -64,7 +101,7 @@ class ElabExpressionsListener(walker.RDLListener):
                         )
         
         if isinstance(node.inst.array_stride, Expr):
-            node.inst.array_stride = node.inst.array_stride.get_value()
+            node.inst.array_stride = self.evaluate(node, node.inst.array_stride)
             if node.inst.array_stride == 0:
                 self.msg.fatal(
                     "Array stride allocator '+=' must be greater than zero",
@@ -74,7 +111,7 @@ class ElabExpressionsListener(walker.RDLListener):
     def enter_VectorComponent(self, node):
         # Evaluate instance object expressions
         if isinstance(node.inst.width, Expr):
-            node.inst.width = node.inst.width.get_value()
+            node.inst.width = self.evaluate(node, node.inst.width)
             if node.inst.width == 0:
                 self.msg.fatal(
                     "Vector width must be greater than zero",
@@ -82,16 +119,16 @@ class ElabExpressionsListener(walker.RDLListener):
                 )
         
         if isinstance(node.inst.msb, Expr):
-            node.inst.msb = node.inst.msb.get_value()
+            node.inst.msb = self.evaluate(node, node.inst.msb)
         
         if isinstance(node.inst.lsb, Expr):
-            node.inst.lsb = node.inst.lsb.get_value()
+            node.inst.lsb = self.evaluate(node, node.inst.lsb)
     
     def exit_Component(self, node):
         # Evaluate component properties
         for prop_name, prop_value in node.inst.properties.items():
             if isinstance(prop_value, Expr):
-                node.inst.properties[prop_name] = prop_value.get_value()
+                node.inst.properties[prop_name] = self.evaluate(node, prop_value)
 
 #-------------------------------------------------------------------------------
 class PrePlacementValidateListener(walker.RDLListener):
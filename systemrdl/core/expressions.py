@@ -1,3 +1,4 @@
+import enum
 from copy import deepcopy
 from collections import OrderedDict
 
@@ -5,7 +6,49 @@ from .. import component as comp
 from .. import rdltypes
 from .helpers import truncate_int
 
+# Types of values that are never modified once evaluated. Only these are
+# folded or cached, since arrays and structs are rebuilt every time their
+# expression is evaluated, and users of the value may modify it.
+_IMMUTABLE_TYPES = (bool, int, str, enum.Enum)
+
+class EvalCache:
+    """
+    Results of evaluating expressions.
+    
+    Values are keyed by (expr, eval_width). Minimum evaluation widths are keyed
+    by expr. Only immutable values are cached.
+    
+    Results depend on the expressions assigned to parameters, so the cache is
+    cleared whenever one is overridden. See Parameter.expr
+    
+    Each elaboration uses a new cache, which is discarded once it completes.
+    See RDLCompiler._fresh_eval_cache()
+    """
+    def __init__(self):
+        # (expr, eval_width) : value
+        self.values = {}
+        
+        # expr : width
+        self.widths = {}
+    
+    def clear(self):
+        """
+        Discard all cached results
+        """
+        self.values.clear()
+        self.widths.clear()
+
+#===============================================================================
 class Expr:
+    # If True, the expression's value does not depend on any parameter or
+    # reference, and it can be folded into a FoldedConstant.
+    # Set by each expression based on its operands.
+    is_constant = False
+    
+    # If True, the expression's value depends on the eval_width of its
+    # context. Such expressions are only folded in a self-determined context.
+    uses_eval_width = False
+    
     def __init__(self, env, src_ref):
         self.env = env
         self.msg = env.msg
@@ -16,7 +59,14 @@ class Expr:
     def __deepcopy__(self, memo):
         """
         Deepcopy all members except for ones that should be copied by reference
+        
+        Constant expressions are never modified, so they are shared instead of
+        copied.
         """
+        if self.is_constant:
+            memo[id(self)] = self
+            return self
+        
         copy_by_ref = ["src_ref", "env", "msg"]
         cls = self.__class__
         result = cls.__new__(cls)
@@ -42,7 +92,17 @@ class Expr:
         Returns the expressions resulting integer width based on the
         self-determined expression bit-width rules
         (SystemVerilog LRM: IEEE Std 1800-2012, Table 11-21)
+        
+        The result is cached. Subclasses implement _get_min_eval_width()
         """
+        widths = self.env.eval_cache.widths
+        width = widths.get(self, None)
+        if width is None:
+            width = self._get_min_eval_width()
+            widths[self] = width
+        return width
+    
+    def _get_min_eval_width(self):
         raise RuntimeError
         
     def get_value(self, eval_width=None):
@@ -62,11 +122,27 @@ class Expr:
             Query the relevant operands to determine the context's eval_width
         - If eval_width is set to a value:
             Parent expression is propagating the eval_width
+        
+        The result is cached for each eval_width. Subclasses implement
+        _get_value()
         """
+        values = self.env.eval_cache.values
+        key = (self, eval_width)
+        if key in values:
+            return values[key]
+        
+        value = self._get_value(eval_width)
+        if isinstance(value, _IMMUTABLE_TYPES):
+            values[key] = value
+        return value
+    
+    def _get_value(self, eval_width=None):
         raise NotImplementedError
     
 #-------------------------------------------------------------------------------
 class IntLiteral(Expr):
+    is_constant = True
+    
     def __init__(self, env, src_ref, val, width=64):
         super().__init__(env, src_ref)
         self.val = val
@@ -74,7 +150,9 @@ class IntLiteral(Expr):
     
     def predict_type(self):
         return int
-        
+    
+    # Literals bypass the evaluation cache, since looking them up would cost
+    # more than evaluating them
     def get_min_eval_width(self):
         return self.width
     
@@ -87,6 +165,8 @@ class BuiltinEnumLiteral(Expr):
     Expr wrapper for builtin RDL enumeration types:
     AccessType, OnReadType, OnWriteType, AddressingType, PrecedenceType
     """
+    is_constant = True
+    
     def __init__(self, env, src_ref, val):
         super().__init__(env, src_ref)
         self.val = val
@@ -99,6 +179,8 @@ class BuiltinEnumLiteral(Expr):
 
 #-------------------------------------------------------------------------------
 class EnumLiteral(Expr):
+    is_constant = True
+    
     def __init__(self, env, src_ref, val):
         super().__init__(env, src_ref)
         self.val = val
@@ -119,6 +201,9 @@ class StructLiteral(Expr):
         self.struct_type = struct_type
         # values is a dict of member_name : (member_expr, member_name_src_ref)
         self.values = values
+        self.is_constant = all(
+            member_expr.is_constant for member_expr, _ in values.values()
+        )
     
     def predict_type(self):
         for member_name, (member_expr, member_name_src_ref) in self.values.items():
@@ -132,7 +217,7 @@ class StructLiteral(Expr):
             
         return self.struct_type
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         resolved_values = OrderedDict()
         for member_name, (member_expr, member_name_src_ref) in self.values.items():
             resolved_values[member_name] = member_expr.get_value()
@@ -141,6 +226,8 @@ class StructLiteral(Expr):
 
 #-------------------------------------------------------------------------------
 class StringLiteral(Expr):
+    is_constant = True
+    
     def __init__(self, env, src_ref, val):
         super().__init__(env, src_ref)
         self.val = val
@@ -156,6 +243,7 @@ class ArrayLiteral(Expr):
     def __init__(self, env, src_ref, elements):
         super().__init__(env, src_ref)
         self.elements = elements
+        self.is_constant = all(element.is_constant for element in elements)
     
     def predict_type(self):
         
@@ -177,7 +265,7 @@ class ArrayLiteral(Expr):
         
         return rdltypes.ArrayPlaceholder(element_type)
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         result = []
         for element in self.elements:
             result.append(element.get_value())
@@ -188,6 +276,7 @@ class Concatenate(Expr):
     def __init__(self, env, src_ref, elements):
         super().__init__(env, src_ref)
         self.elements = elements
+        self.is_constant = all(element.is_constant for element in elements)
         self.type = None
     
     def predict_type(self):
@@ -215,7 +304,7 @@ class Concatenate(Expr):
                 self.src_ref
             )
             
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         if self.type == int:
             width = 0
             for element in self.elements:
@@ -225,7 +314,7 @@ class Concatenate(Expr):
         else:
             raise RuntimeError
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if self.type == int:
             result = 0
             for element in self.elements:
@@ -249,6 +338,7 @@ class Replicate(Expr):
         super().__init__(env, src_ref)
         self.reps = reps
         self.concat = concat
+        self.is_constant = reps.is_constant and concat.is_constant
         self.type = None
         self.reps_value = None
     
@@ -273,7 +363,7 @@ class Replicate(Expr):
             # Type check for invalid type is already halded there
             raise RuntimeError
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         # Evaluate number of repetitions
         if self.reps_value is None:
             self.reps_value = self.reps.get_value()
@@ -286,7 +376,7 @@ class Replicate(Expr):
         else:
             raise RuntimeError
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         # Evaluate number of repetitions
         if self.reps_value is None:
             self.reps_value = self.reps.get_value()
@@ -315,10 +405,13 @@ class Replicate(Expr):
 #   +  -  *  /  %  &  |  ^  ^~  ~^
 # Normal expression context rules
 class _BinaryIntExpr(Expr):
+    uses_eval_width = True
+    
     def __init__(self, env, src_ref, l, r):
         super().__init__(env, src_ref)
         self.l = l
         self.r = r
+        self.is_constant = l.is_constant and r.is_constant
         
     def predict_type(self):
         l_type = self.l.predict_type()
@@ -335,14 +428,14 @@ class _BinaryIntExpr(Expr):
             )
         return int
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return(max(
             self.l.get_min_eval_width(),
             self.r.get_min_eval_width()
         ))
         
 class Add(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -350,7 +443,7 @@ class Add(_BinaryIntExpr):
         return truncate_int(l + r, eval_width)
 
 class Sub(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -358,7 +451,7 @@ class Sub(_BinaryIntExpr):
         return truncate_int(l - r, eval_width)
 
 class Mult(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -366,7 +459,12 @@ class Mult(_BinaryIntExpr):
         return truncate_int(l * r, eval_width)
 
 class Div(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def __init__(self, env, src_ref, l, r):
+        super().__init__(env, src_ref, l, r)
+        # Division by zero is only reported if the expression is evaluated
+        self.is_constant = l.is_constant and is_nonzero_literal(r)
+    
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -380,7 +478,12 @@ class Div(_BinaryIntExpr):
         return truncate_int(l // r, eval_width)
 
 class Mod(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def __init__(self, env, src_ref, l, r):
+        super().__init__(env, src_ref, l, r)
+        # Modulo by zero is only reported if the expression is evaluated
+        self.is_constant = l.is_constant and is_nonzero_literal(r)
+    
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -394,7 +497,7 @@ class Mod(_BinaryIntExpr):
         return truncate_int(l % r, eval_width)
         
 class BitwiseAnd(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -402,7 +505,7 @@ class BitwiseAnd(_BinaryIntExpr):
         return truncate_int(l & r, eval_width)
         
 class BitwiseOr(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -410,7 +513,7 @@ class BitwiseOr(_BinaryIntExpr):
         return truncate_int(l | r, eval_width)
         
 class BitwiseXor(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -418,7 +521,7 @@ class BitwiseXor(_BinaryIntExpr):
         return truncate_int(l ^ r, eval_width)
 
 class BitwiseXnor(_BinaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         l = int(self.l.get_value(eval_width))
@@ -430,9 +533,12 @@ class BitwiseXnor(_BinaryIntExpr):
 #   +  -  ~
 # Normal expression context rules
 class _UnaryIntExpr(Expr):
+    uses_eval_width = True
+    
     def __init__(self, env, src_ref, n):
         super().__init__(env, src_ref)
         self.n = n
+        self.is_constant = n.is_constant
         
     def predict_type(self):
         op_type = self.n.predict_type()
@@ -443,25 +549,25 @@ class _UnaryIntExpr(Expr):
             )
         return int
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return self.n.get_min_eval_width()
         
 class UnaryPlus(_UnaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         n = int(self.n.get_value(eval_width))
         return truncate_int(n, eval_width)
 
 class UnaryMinus(_UnaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         n = int(self.n.get_value(eval_width))
         return truncate_int(-n, eval_width)
 
 class BitwiseInvert(_UnaryIntExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.get_min_eval_width()
         n = int(self.n.get_value(eval_width))
@@ -480,6 +586,7 @@ class _RelationalExpr(Expr):
         self.l = l
         self.r = r
         self.is_numeric = None
+        self.is_constant = l.is_constant and r.is_constant
         
     def predict_type(self):
         l_type = self.l.predict_type()
@@ -499,7 +606,7 @@ class _RelationalExpr(Expr):
             )
         return bool
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return 1
         
     def get_ops(self):
@@ -544,32 +651,32 @@ class _NumericRelationalExpr(_RelationalExpr):
     
 
 class Eq(_RelationalExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l,r = self.get_ops()
         return l == r
 
 class Neq(_RelationalExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l,r = self.get_ops()
         return l != r
 
 class Lt(_NumericRelationalExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l,r = self.get_ops()
         return l < r
         
 class Gt(_NumericRelationalExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l,r = self.get_ops()
         return l > r
 
 class Leq(_NumericRelationalExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l,r = self.get_ops()
         return l <= r
 
 class Geq(_NumericRelationalExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l,r = self.get_ops()
         return l >= r
 
@@ -582,6 +689,7 @@ class _ReductionExpr(Expr):
     def __init__(self, env, src_ref, n):
         super().__init__(env, src_ref)
         self.n = n
+        self.is_constant = n.is_constant
     
     def predict_type(self):
         op_type = self.n.predict_type()
@@ -592,35 +700,35 @@ class _ReductionExpr(Expr):
             )
         return int
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return 1
     
 class AndReduce(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         eval_width = self.n.get_min_eval_width()
         n = int(self.n.get_value(eval_width))
         n = truncate_int(~n, eval_width)
         return int(n == 0)
         
 class NandReduce(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         eval_width = self.n.get_min_eval_width()
         n = int(self.n.get_value(eval_width))
         n = truncate_int(~n, eval_width)
         return int(n != 0)
         
 class OrReduce(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         n = int(self.n.get_value())
         return int(n != 0)
         
 class NorReduce(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         n = int(self.n.get_value())
         return int(n == 0)
 
 class XorReduce(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         n = int(self.n.get_value())
         v = 0
         while n:
@@ -630,7 +738,7 @@ class XorReduce(_ReductionExpr):
         return v
 
 class XnorReduce(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         n = int(self.n.get_value())
         v = 1
         while n:
@@ -640,7 +748,7 @@ class XnorReduce(_ReductionExpr):
         return v
         
 class BoolNot(_ReductionExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         n = int(self.n.get_value())
         return not n
     
@@ -657,6 +765,7 @@ class _BoolExpr(Expr):
         super().__init__(env, src_ref)
         self.l = l
         self.r = r
+        self.is_constant = l.is_constant and r.is_constant
     
     def predict_type(self):
         l_type = self.l.predict_type()
@@ -673,17 +782,17 @@ class _BoolExpr(Expr):
             )
         return bool
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return 1
     
 class BoolAnd(_BoolExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l = bool(self.l.get_value())
         r = bool(self.r.get_value())
         return l and r
         
 class BoolOr(_BoolExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         l = bool(self.l.get_value())
         r = bool(self.r.get_value())
         return l or r
@@ -693,10 +802,13 @@ class BoolOr(_BoolExpr):
 #   **  <<  >>
 # Righthand operand is self-determined
 class _ExpShiftExpr(Expr):
+    uses_eval_width = True
+    
     def __init__(self, env, src_ref, l, r):
         super().__init__(env, src_ref)
         self.l = l
         self.r = r
+        self.is_constant = l.is_constant and r.is_constant
     
     def predict_type(self):
         l_type = self.l.predict_type()
@@ -713,12 +825,12 @@ class _ExpShiftExpr(Expr):
             )
         return int
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         # Righthand op has no influence in evaluation context
         return self.l.get_min_eval_width()
     
 class Exponent(_ExpShiftExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.l.get_min_eval_width()
         # Right operand is self-determined
@@ -727,7 +839,7 @@ class Exponent(_ExpShiftExpr):
         return truncate_int(int(l ** r), eval_width)
 
 class LShift(_ExpShiftExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.l.get_min_eval_width()
         # Right operand is self-determined
@@ -736,7 +848,7 @@ class LShift(_ExpShiftExpr):
         return truncate_int(l << r, eval_width)
 
 class RShift(_ExpShiftExpr):
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if eval_width is None:
             eval_width = self.l.get_min_eval_width()
         # Right operand is self-determined
@@ -750,12 +862,15 @@ class RShift(_ExpShiftExpr):
 # Truth expression is self-determined and does not contribute to context
 
 class TernaryExpr(Expr):
+    uses_eval_width = True
+    
     def __init__(self, env, src_ref, i, j, k):
         super().__init__(env, src_ref)
         self.i = i
         self.j = j
         self.k = k
         self.is_numeric = None
+        self.is_constant = i.is_constant and j.is_constant and k.is_constant
         
     def predict_type(self):
         t_i = self.i.predict_type()
@@ -783,14 +898,14 @@ class TernaryExpr(Expr):
                 self.src_ref
             )
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         # Truth operand has no influence in evaluation context
         return(max(
             self.j.get_min_eval_width(),
             self.k.get_min_eval_width()
         ))
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         # i is self-determined
         i = bool(self.i.get_value())
         
@@ -831,6 +946,11 @@ class WidthCast(Expr):
             self.w_expr = None
             self.cast_width = w_int
         
+        # Cast to a width of zero is only reported if the expression is evaluated
+        self.is_constant = v.is_constant and (
+            (w_expr is None) or is_nonzero_literal(w_expr)
+        )
+        
     def predict_type(self):
         if self.cast_width is None:
             if not is_castable(self.w_expr.predict_type(), int):
@@ -846,13 +966,13 @@ class WidthCast(Expr):
         
         return int
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         if self.cast_width is None:
             self.cast_width = int(self.w_expr.get_value())
         return self.cast_width
         
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         # Truncate to cast width instead of eval width
         if self.cast_width is None:
             self.cast_width = int(self.w_expr.get_value())
@@ -874,6 +994,7 @@ class BoolCast(Expr):
     def __init__(self, env, src_ref, n):
         super().__init__(env, src_ref)
         self.n = n
+        self.is_constant = n.is_constant
     
     def predict_type(self):
         if not is_castable(self.n.predict_type(), bool):
@@ -883,10 +1004,10 @@ class BoolCast(Expr):
             )
         return bool
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return 1
         
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         n = int(self.n.get_value())
         return n != 0
 
@@ -901,7 +1022,7 @@ class ParameterRef(Expr):
     def predict_type(self):
         return self.param.param_type
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         if self.param.expr is None:
             self.msg.fatal(
                 "Value for parameter '%s' was never assigned" % self.param.name,
@@ -909,7 +1030,7 @@ class ParameterRef(Expr):
             )
         return self.param.expr.get_min_eval_width()
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         if self.param.expr is None:
             self.msg.fatal(
                 "Value for parameter '%s' was never assigned" % self.param.name,
@@ -940,11 +1061,11 @@ class ArrayIndex(Expr):
         
         return array_type.element_type
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         # TODO: Need to actually reach in and get eval width of array element
         return 64
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         index = self.index.get_value()
         array = self.array.get_value()
         if index >= len(array):
@@ -979,11 +1100,11 @@ class MemberRef(Expr):
             
         return struct_type._members[self.member_name]
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         # TODO: Need to actually reach in and get eval width of struct member
         return 64
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         struct = self.struct.get_value()
         return struct._values[self.member_name]
 
@@ -1070,7 +1191,7 @@ class InstRef(Expr):
         
         return type(current_comp)
         
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         """
         Build a resolved ComponentRef container that describes the relative path
         """
@@ -1111,7 +1232,7 @@ class PropRef(Expr):
         
         return self.prop_ref_type
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         cref = self.inst_ref.get_value()
         return self.prop_ref_type(self.src_ref, self.env, cref)
         
@@ -1132,6 +1253,7 @@ class AssignmentCast(Expr):
         
         self.v = v
         self.dest_type = dest_type
+        self.is_constant = v.is_constant
     
     def predict_type(self):
         op_type = self.v.predict_type()
@@ -1144,10 +1266,10 @@ class AssignmentCast(Expr):
         
         return self.dest_type
     
-    def get_min_eval_width(self):
+    def _get_min_eval_width(self):
         return self.v.get_min_eval_width()
     
-    def get_value(self, eval_width=None):
+    def _get_value(self, eval_width=None):
         v = self.v.get_value()
         
         if self.dest_type == bool:
@@ -1158,8 +1280,91 @@ class AssignmentCast(Expr):
             return v
 
 
+#-------------------------------------------------------------------------------
+# Folded constant
+# Holds the value of a constant expression that was evaluated ahead of time.
+# Retains the type and integer width of the original expression so that it
+# behaves the same way as an operand.
+class FoldedConstant(Expr):
+    is_constant = True
+    
+    def __init__(self, env, src_ref, val, val_type, width=None):
+        super().__init__(env, src_ref)
+        self.val = val
+        self.val_type = val_type
+        self.width = width
+    
+    def predict_type(self):
+        return self.val_type
+    
+    def get_min_eval_width(self):
+        if self.width is None:
+            raise RuntimeError
+        return self.width
+    
+    def get_value(self, eval_width=None):
+        return self.val
+
 #===============================================================================
 
+_LITERAL_TYPES = (IntLiteral, BuiltinEnumLiteral, EnumLiteral, StringLiteral, FoldedConstant)
+
+def fold_constant(expr, in_context=False, share=False):
+    """
+    Evaluate a constant expression ahead of time.
+    
+    Returns a FoldedConstant that holds the value of expr, or expr itself if it
+    cannot be folded.
+    
+    If in_context is set, expr is an operand whose evaluation width is
+    determined by its parent expression. Expressions whose value depends on
+    the evaluation width are not folded.
+    
+    If share is set, an identical FoldedConstant that was folded previously is
+    reused. Only use this once all type checks that could report the
+    expression's SourceRef were done.
+    """
+    if not expr.is_constant:
+        return expr
+    if in_context and expr.uses_eval_width:
+        return expr
+    if isinstance(expr, _LITERAL_TYPES) and not share:
+        # Already as simple as it gets
+        return expr
+    
+    val_type = expr.predict_type()
+    value = expr.get_value()
+    if not isinstance(value, _IMMUTABLE_TYPES):
+        return expr
+    
+    if is_castable(val_type, int):
+        width = expr.get_min_eval_width()
+    else:
+        width = None
+    
+    if share:
+        # bool and int values that compare equal are still kept apart
+        key = (val_type, type(value), value, width)
+        folded = expr.env.constant_pool.get(key, None)
+        if folded is None:
+            folded = FoldedConstant(expr.env, expr.src_ref, value, val_type, width)
+            expr.env.constant_pool[key] = folded
+        return folded
+    
+    return FoldedConstant(expr.env, expr.src_ref, value, val_type, width)
+
+
+def is_nonzero_literal(expr):
+    """
+    Check if expr is a literal integer whose value is known to not be zero
+    """
+    return (
+        isinstance(expr, (IntLiteral, FoldedConstant))
+        and isinstance(expr.val, int)
+        and (expr.val != 0)
+    )
+
+
 def is_castable(src, dst):
     """
     Check if src type can be cast to dst type
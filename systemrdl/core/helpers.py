@@ -1,3 +1,6 @@
+import os
+import tempfile
+
 from antlr4.Token import CommonToken
 
 def is_pow2(x):
@@ -29,3 +32,18 @@ def get_ID_text(token):
 def truncate_int(v, width):
     mask = (1 << width) - 1
     return v & mask
+
+def write_atomic(path, data):
+    """
+    Write data to a file such that readers never see a partially written file
+    """
+    dir_path = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=dir_path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,490 @@
+import io
+import gc
+import inspect
+import contextlib
+import copyreg
+import pickle
+import multiprocessing
+import concurrent.futures
+
+from antlr4 import CommonTokenStream, InputStream, Lexer, Parser, ParserRuleContext
+from antlr4.Token import CommonToken
+from antlr4.tree.Tree import TerminalNodeImpl
+
+from .. import messages
+from .. import component as comp
+from .. import rdltypes
+from ..parser.SystemRDLLexer import SystemRDLLexer
+from ..parser.SystemRDLParser import SystemRDLParser
+from ..preprocessor import preprocessor
+from .expressions import Expr
+from .compile_cache import _is_dynamic_type
+from .recording import RecordingPrinter, replay_messages
+
+#===============================================================================
+def parse_preprocessed(msg, preprocessed_text, seg_map):
+    """
+    Run the Antlr lexer and parser on preprocessed text.
+
+    Returns the parse tree
+    """
+    input_stream = preprocessor.PreprocessedInputStream(preprocessed_text, seg_map)
+
+    lexer = SystemRDLLexer(input_stream)
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(messages.RDLAntlrErrorListener(msg))
+
+    token_stream = CommonTokenStream(lexer)
+
+    parser = SystemRDLParser(token_stream)
+    parser.removeErrorListeners()
+    parser.addErrorListener(messages.RDLAntlrErrorListener(msg))
+
+    # Run Antlr parser on input
+    parsed_tree = parser.root()
+    if msg.error_count:
+        msg.fatal("Parse aborted due to previous errors")
+
+    return parsed_tree
+
+#===============================================================================
+# Parse worker
+#===============================================================================
+class WorkerResult:
+    """
+    Base class for results of work done in a worker process
+    """
+    def __init__(self, records, is_fatal):
+        # List of (severity, text, src_ref) messages emitted by the worker
+        self.records = records
+
+        # If set, the last message in records was fatal
+        self.is_fatal = is_fatal
+
+    def replay_messages(self, msg):
+        """
+        Emit the worker's messages through the parent's message handler, as if
+        they occurred locally.
+        Raises RDLCompileError if the worker encountered a fatal error.
+        """
+        replay_messages(msg, self.records, self.is_fatal)
+
+
+class ParseResult(WorkerResult):
+    """
+    Result of preprocessing and parsing a file in a worker process
+    """
+    def __init__(self, records, is_fatal, preprocessed_text, seg_map, tree_data):
+        super().__init__(records, is_fatal)
+
+        self.preprocessed_text = preprocessed_text
+        self.seg_map = seg_map
+
+        # Serialized parse tree. None if it could not be serialized
+        self.tree_data = tree_data
+
+    def load_tree(self):
+        """
+        Deserialize the parse tree.
+        Returns None if the tree was not available.
+        """
+        if self.tree_data is None:
+            return None
+        input_stream = preprocessor.PreprocessedInputStream(self.preprocessed_text, self.seg_map)
+        unpickler = _TreeUnpickler(io.BytesIO(self.tree_data), input_stream)
+
+        with _gc_paused():
+            return unpickler.load()
+
+
+def parse_worker(path, incl_search_paths, warning_flags):
+    """
+    Preprocess and parse a file.
+    This is executed in a worker process.
+    """
+    from ..compiler import Environment # pylint: disable=import-outside-toplevel
+
+    printer = RecordingPrinter()
+    env = Environment({
+        "message_printer": printer,
+        "warning_flags": warning_flags,
+    })
+
+    try:
+        fpp = preprocessor.FilePreprocessor(env, path, incl_search_paths)
+        preprocessed_text, seg_map = fpp.preprocess()
+        parsed_tree = parse_preprocessed(env.msg, preprocessed_text, seg_map)
+    except messages.RDLCompileError:
+        return ParseResult(printer.records, True, None, None, None)
+
+    buf = io.BytesIO()
+    try:
+        with _gc_paused():
+            _TreePickler(buf).dump(parsed_tree)
+        tree_data = buf.getvalue()
+    except RecursionError:
+        # Tree is too deep to serialize. Parent process parses it instead
+        tree_data = None
+
+    return ParseResult(printer.records, False, preprocessed_text, seg_map, tree_data)
+
+#-------------------------------------------------------------------------------
+# Parse tree serialization
+#
+# Parse trees consist of a very large number of small objects. Their default
+# pickled representation is large and slow to load, so each node type is
+# reduced to a compact tuple instead. References to the lexer, parser and
+# input stream are not serialized.
+#-------------------------------------------------------------------------------
+@contextlib.contextmanager
+def _gc_paused():
+    """
+    Serializing parse trees creates and visits many objects that are never
+    garbage. Avoid triggering the cyclic garbage collector repeatedly
+    """
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+_CTX_STD_ATTRS = {
+    "parentCtx", "invokingState", "children", "start", "stop", "exception",
+    "parser",
+}
+
+def _load_context(cls, children, start, stop, labels):
+    ctx = cls.__new__(cls)
+    ctx.parentCtx = None
+    ctx.invokingState = -1
+    ctx.children = children
+    ctx.start = start
+    ctx.stop = stop
+    ctx.exception = None
+    ctx.parser = None
+    if labels:
+        ctx.__dict__.update(labels)
+    if children:
+        for child in children:
+            child.parentCtx = ctx
+    return ctx
+
+def _load_terminal(symbol):
+    node = TerminalNodeImpl.__new__(TerminalNodeImpl)
+    node.parentCtx = None
+    node.symbol = symbol
+    return node
+
+def _load_token(source, fields):
+    token = CommonToken.__new__(CommonToken)
+    token.source = source
+    (
+        token.type, token.channel, token.start, token.stop,
+        token.tokenIndex, token.line, token.column, token._text
+    ) = fields
+    return token
+
+
+def _reduce_token(obj):
+    return _load_token, (obj.source, (
+        obj.type, obj.channel, obj.start, obj.stop,
+        obj.tokenIndex, obj.line, obj.column, obj._text
+    ))
+
+def _reduce_terminal(obj):
+    return _load_terminal, (obj.symbol,)
+
+def _reduce_context(obj):
+    # Keep any labeled sub-rules or tokens
+    labels = {
+        k: v for k, v in obj.__dict__.items()
+        if k not in _CTX_STD_ATTRS
+    }
+    return _load_context, (type(obj), obj.children, obj.start, obj.stop, labels)
+
+_tree_dispatch_table = None
+
+def _get_tree_dispatch_table():
+    """
+    Reducers for each type of parse tree node.
+    Pickler dispatch tables are looked up by exact type, so each generated
+    rule context class is listed.
+    """
+    global _tree_dispatch_table # pylint: disable=global-statement
+    if _tree_dispatch_table is None:
+        table = copyreg.dispatch_table.copy()
+        table[CommonToken] = _reduce_token
+        table[TerminalNodeImpl] = _reduce_terminal
+        pending = [ParserRuleContext]
+        while pending:
+            cls = pending.pop()
+            table[cls] = _reduce_context
+            pending.extend(cls.__subclasses__())
+        _tree_dispatch_table = table
+    return _tree_dispatch_table
+
+
+class _TreePickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.dispatch_table = _get_tree_dispatch_table()
+
+    def persistent_id(self, obj): # pylint: disable=method-hidden
+        if isinstance(obj, InputStream):
+            return "input"
+        if isinstance(obj, (Lexer, Parser)):
+            return "recognizer"
+        return None
+
+
+class _TreeUnpickler(pickle.Unpickler):
+    def __init__(self, file, input_stream):
+        super().__init__(file)
+        self.input_stream = input_stream
+
+    def persistent_load(self, pid): # pylint: disable=method-hidden
+        if pid == "input":
+            # Tokens retrieve their text and source map from the input stream
+            return self.input_stream
+        if pid == "recognizer":
+            # Not needed once parsing is complete
+            return None
+        raise pickle.UnpicklingError("Unknown persistent id: %s" % pid)
+
+#===============================================================================
+# Elaboration worker
+#
+# Workers are forked from the parent process once it has compiled the design,
+# so they inherit the compiled namespace rather than having to receive it.
+# Each worker elaborates one top-level component and sends it back to the
+# parent. The elaborated component refers to many objects that were compiled
+# before the workers were forked, such as the original definitions, their
+# parameters and user-defined types. These are not serialized. Instead they
+# are identified by their id(), which is the same in the parent and in the
+# forked worker.
+#===============================================================================
+def can_fork():
+    """
+    Check if worker processes can be forked from the current process
+    """
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+class SharedObjects:
+    """
+    Objects that exist in the parent process before workers are forked, and
+    which elaborated components may refer to.
+    """
+    def __init__(self, compiler):
+        # id(obj) : obj
+        self.objs = {}
+
+        self._add_component(compiler.root)
+        for comp_def in compiler.root.comp_defs.values():
+            self._add_component(comp_def)
+        for template in compiler.specializations.values():
+            self._add_component(template)
+        for value in compiler.namespace.type_ns_stack[0].values():
+            self._add_value(value)
+
+    def get(self, obj):
+        """
+        Returns the persistent id of obj if it is shared, otherwise None
+        """
+        if obj is not None and self.objs.get(id(obj), None) is obj:
+            return ("shared", id(obj))
+        return None
+
+    def _add_component(self, inst):
+        if id(inst) in self.objs:
+            return
+        self.objs[id(inst)] = inst
+
+        for param in inst.parameters:
+            self.objs[id(param)] = param
+            self._add_value(param.param_type)
+            self._add_value(param.expr)
+        for value in inst.properties.values():
+            self._add_value(value)
+
+        if inst.original_def is not None:
+            self._add_component(inst.original_def)
+        for child in inst.children:
+            self._add_component(child)
+
+    def _add_value(self, value):
+        """
+        Find the user-defined types that a value uses
+        """
+        if _is_dynamic_type(value):
+            if id(value) in self.objs:
+                return
+            self.objs[id(value)] = value
+            if rdltypes.is_user_struct(value):
+                for member_type in value._members.values():
+                    self._add_value(member_type)
+        elif inspect.isclass(value):
+            return
+        elif isinstance(value, (rdltypes.UserEnum, rdltypes.UserStruct)):
+            self._add_value(type(value))
+            if isinstance(value, rdltypes.UserStruct):
+                self._add_value(value._values)
+        elif isinstance(value, rdltypes.ArrayPlaceholder):
+            self._add_value(value.element_type)
+        elif isinstance(value, Expr):
+            for k, v in value.__dict__.items():
+                if k not in ("env", "msg", "src_ref"):
+                    self._add_value(v)
+        elif isinstance(value, (list, tuple)):
+            for v in value:
+                self._add_value(v)
+        elif isinstance(value, dict):
+            for v in value.values():
+                self._add_value(v)
+
+
+class ElabResult(WorkerResult):
+    """
+    Result of elaborating a top-level component in a worker process
+    """
+    def __init__(self, records, is_fatal, top_data):
+        super().__init__(records, is_fatal)
+
+        # Serialized elaborated component. None if it could not be serialized
+        self.top_data = top_data
+
+    def load_top(self, compiler, root_inst, shared):
+        """
+        Deserialize the elaborated top-level component.
+        Returns None if it was not available.
+        """
+        if self.top_data is None:
+            return None
+        unpickler = _ElabUnpickler(io.BytesIO(self.top_data), compiler, root_inst, shared)
+
+        with _gc_paused():
+            return unpickler.load()
+
+
+# State that is inherited by forked elaboration workers.
+# (compiler, top_insts, shared)
+_elab_state = None
+
+def elaborate_in_workers(compiler, top_insts, shared, jobs):
+    """
+    Elaborate each top-level instance in a pool of forked worker processes.
+
+    Yields an ElabResult for each top-level instance, in order.
+    """
+    global _elab_state # pylint: disable=global-statement
+
+    _elab_state = (compiler, top_insts, shared)
+    try:
+        ctx = multiprocessing.get_context("fork")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=ctx) as executor:
+            futures = [
+                executor.submit(_elab_worker, i)
+                for i in range(len(top_insts))
+            ]
+            try:
+                for future in futures:
+                    yield future.result()
+            finally:
+                # Abandon any remaining work if elaboration failed
+                for future in futures:
+                    future.cancel()
+    finally:
+        _elab_state = None
+
+
+def _elab_worker(idx):
+    """
+    Elaborate a top-level instance.
+    This is executed in a forked worker process.
+    """
+    compiler, top_insts, shared = _elab_state
+
+    printer = RecordingPrinter()
+    compiler.msg.printer = printer
+
+    try:
+        root_inst = compiler._create_root_inst() # pylint: disable=protected-access
+        compiler._elaborate(root_inst, [top_insts[idx]]) # pylint: disable=protected-access
+    except messages.RDLCompileError:
+        return ElabResult(printer.records, True, None)
+
+    buf = io.BytesIO()
+    try:
+        with _gc_paused():
+            _ElabPickler(buf, compiler, root_inst, shared).dump(top_insts[idx])
+        top_data = buf.getvalue()
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+        # Parent process elaborates it instead
+        top_data = None
+
+    return ElabResult(printer.records, False, top_data)
+
+
+class _ElabPickler(pickle.Pickler):
+    def __init__(self, file, compiler, root_inst, shared):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.compiler = compiler
+        self.root_inst = root_inst
+        self.shared = shared
+
+        # The worker's $root contents are equivalent to the parent's
+        self.root_children = {
+            id(child): i for i, child in enumerate(root_inst.children)
+        }
+
+    def persistent_id(self, obj): # pylint: disable=method-hidden
+        if obj is self.compiler.env:
+            return ("env",)
+        if obj is self.compiler.msg:
+            return ("msg",)
+        if obj is self.root_inst:
+            return ("root",)
+
+        if isinstance(obj, comp.Component):
+            idx = self.root_children.get(id(obj), None)
+            if idx is not None and idx < len(self.root_inst.children) - 1:
+                return ("root_child", idx)
+
+        pid = self.shared.get(obj)
+        if pid is not None:
+            return pid
+
+        if isinstance(obj, rdltypes.UserEnum):
+            return ("member", type(obj), obj.name)
+
+        if _is_dynamic_type(obj):
+            raise pickle.PicklingError("User-defined type '%s' is not shared" % obj.__name__)
+
+        return None
+
+
+class _ElabUnpickler(pickle.Unpickler):
+    def __init__(self, file, compiler, root_inst, shared):
+        super().__init__(file)
+        self.compiler = compiler
+        self.root_inst = root_inst
+        self.shared = shared
+
+    def persistent_load(self, pid): # pylint: disable=method-hidden
+        kind = pid[0]
+        if kind == "env":
+            return self.compiler.env
+        elif kind == "msg":
+            return self.compiler.msg
+        elif kind == "root":
+            return self.root_inst
+        elif kind == "root_child":
+            return self.root_inst.children[pid[1]]
+        elif kind == "shared":
+            return self.shared.objs[pid[1]]
+        elif kind == "member":
+            return pid[1][pid[2]]
+        else:
+            raise pickle.UnpicklingError("Unknown persistent id: %s" % kind)
@@ -1,5 +1,6 @@
 import hashlib
 import enum
+from copy import deepcopy
 from .. import rdltypes
 
 
@@ -8,17 +9,46 @@ class Parameter:
         self.name = name
         self.param_type = param_type
         
-        self.expr = default_expr
+        self._expr = default_expr
         
         # Stores the evaluated result of self.expr so that subsequent queries do
         # not need to repeatedly re-evaluate it
         self._value = None
     
+    def __deepcopy__(self, memo):
+        """
+        Deepcopy the parameter's expression, but not its evaluated result.
+        The copy's expression may refer to parameters that were also copied
+        and given different values.
+        """
+        result = Parameter(self.param_type, self.name, deepcopy(self._expr, memo))
+        memo[id(self)] = result
+        return result
+    
+    @property
+    def expr(self):
+        """
+        Expression that determines the parameter's value
+        """
+        return self._expr
+    
+    @expr.setter
+    def expr(self, expr):
+        # Overriding the expression changes the value of all expressions that
+        # reference this parameter. Discard any previously evaluated results
+        self._expr = expr
+        self._value = None
+        if expr is not None:
+            expr.env.eval_cache.clear()
+    
     def get_value(self):
         """
         Evaluate self.expr to get the parameter's value
         """
         if (self._value is None) and (self.expr is not None):
+            stats = self.expr.env.stats
+            if stats is not None:
+                stats.count("expr_evals")
             self._value = self.expr.get_value()
         
         return self._value
@@ -132,6 +132,11 @@ class PropertyRule:
                 src_ref
             )
         
+        # Constant expressions are evaluated ahead of time, and shared by all
+        # assignments of the same value
+        if isinstance(value, expressions.Expr):
+            value = expressions.fold_constant(value, share=True)
+        
         # Store the property
         comp_def.properties[self.get_name()] = value
     
@@ -0,0 +1,57 @@
+import contextlib
+
+from .. import messages
+
+#===============================================================================
+# Message recording
+#
+# Messages emitted while compiling are recorded as (severity, text, src_ref)
+# tuples so that they can be reported again later, either when a compile cache
+# entry is reused, or in the parent process after work was done by a worker.
+#===============================================================================
+class RecordingPrinter(messages.MessagePrinter):
+    """
+    Records messages, and optionally passes them on to another printer
+    """
+    def __init__(self, printer=None):
+        self.printer = printer
+        self.records = []
+
+    def print_message(self, severity, text, src_ref):
+        self.records.append((severity, text, src_ref))
+        if self.printer is not None:
+            self.printer.print_message(severity, text, src_ref)
+
+
+@contextlib.contextmanager
+def record_messages(msg):
+    """
+    Record the messages emitted through msg, in addition to printing them.
+    Yields the list of records.
+    """
+    printer = RecordingPrinter(msg.printer)
+    msg.printer = printer
+    try:
+        yield printer.records
+    finally:
+        msg.printer = printer.printer
+
+
+def replay_messages(msg, records, is_fatal=False):
+    """
+    Emit recorded messages through msg, as if they occurred locally.
+    If is_fatal is set, the last record is reported as fatal, which raises
+    RDLCompileError.
+    """
+    if is_fatal:
+        records, last = records[:-1], records[-1]
+
+    for severity, text, src_ref in records:
+        if severity == "warning":
+            msg.warning(text, src_ref)
+        else:
+            msg.error(text, src_ref)
+
+    if is_fatal:
+        _, text, src_ref = last
+        msg.fatal(text, src_ref)
@@ -0,0 +1,139 @@
+from copy import deepcopy
+
+from .. import component as comp
+from .expressions import Expr, ParameterRef, FoldedConstant
+from .parameter import Parameter
+
+def get_specialization_key(comp_def, overrides):
+    """
+    Returns the key that identifies an instantiation of comp_def with the
+    given parameter overrides, or None if its parameter values are not known
+    until elaboration.
+
+    Only overrides that were folded into constants are identified. Others may
+    depend on the parameters of an enclosing component.
+    """
+    values = []
+    for i, assign_expr in overrides:
+        if not isinstance(assign_expr, FoldedConstant):
+            return None
+        # bool and int values that compare equal are kept apart
+        values.append((i, type(assign_expr.val), assign_expr.val))
+    values.sort(key=lambda v: v[0])
+    return (comp_def, tuple(values))
+
+
+def specialize(comp_def, overrides):
+    """
+    Create a copy of comp_def whose parameters are overridden.
+
+    overrides is a list of (parameter index, assign_expr).
+
+    Only the components and parameters whose expressions depend on an
+    overridden parameter are copied. The remainder of the definition is shared
+    with comp_def, along with any results of evaluating its expressions.
+    Parameters are overridden by replacing them, rather than by assigning a new
+    expression to the original, so that results that were already cached for
+    comp_def remain valid.
+    """
+    memo = {}
+    for i, assign_expr in overrides:
+        param = comp_def.parameters[i]
+        memo[id(param)] = Parameter(param.param_type, param.name, assign_expr)
+
+    _Dependencies(memo).visit(comp_def)
+
+    # The copy is always distinct from the original, even if none of the
+    # definition's contents depend on its parameters
+    memo.pop(id(comp_def), None)
+    return deepcopy(comp_def, memo)
+
+
+class _Dependencies:
+    """
+    Finds which parts of a definition depend on the parameters being replaced.
+
+    Parts that are independent are added to the deepcopy memo so that they
+    are shared rather than copied.
+    """
+    def __init__(self, memo):
+        self.memo = memo
+
+        # ids of parameters whose value may change
+        self.dependent_params = set(memo.keys())
+
+        # id(expr) : True if the expression refers to a dependent parameter
+        self.expr_deps = {}
+
+    def visit(self, inst):
+        """
+        Returns True if the component needs to be copied
+        """
+        is_dependent = False
+
+        # Parameters refer to ones of enclosing components, or to ones
+        # declared before them
+        for param in inst.parameters:
+            if id(param) in self.dependent_params:
+                is_dependent = True
+            elif self.refers_to_dependent(param.expr):
+                self.dependent_params.add(id(param))
+                is_dependent = True
+            else:
+                self.memo[id(param)] = param
+
+        for value in inst.properties.values():
+            if self.refers_to_dependent(value):
+                is_dependent = True
+
+        for k in comp._get_slot_names(type(inst)):
+            if k in ("children", "parameters", "properties"):
+                continue
+            if self.refers_to_dependent(getattr(inst, k)):
+                is_dependent = True
+
+        dependent_children = set()
+        for child in inst.children:
+            if self.visit(child):
+                dependent_children.add(id(child))
+
+        # Alias registers refer to a sibling, and are copied along with it
+        for child in inst.children:
+            if (
+                isinstance(child, comp.Reg) and child.is_alias
+                and id(child.alias_primary_inst) in dependent_children
+            ):
+                dependent_children.add(id(child))
+                self.memo.pop(id(child), None)
+
+        if dependent_children:
+            is_dependent = True
+
+        if not is_dependent:
+            self.memo[id(inst)] = inst
+        return is_dependent
+
+    def refers_to_dependent(self, value):
+        if isinstance(value, Expr):
+            if value.is_constant:
+                return False
+            if id(value) in self.expr_deps:
+                return self.expr_deps[id(value)]
+
+            if isinstance(value, ParameterRef):
+                result = id(value.param) in self.dependent_params
+            else:
+                result = any(
+                    self.refers_to_dependent(v)
+                    for k, v in value.__dict__.items()
+                    if k not in ("env", "msg", "src_ref")
+                )
+            self.expr_deps[id(value)] = result
+            if not result:
+                self.memo[id(value)] = value
+            return result
+        elif isinstance(value, (list, tuple)):
+            return any(self.refers_to_dependent(v) for v in value)
+        elif isinstance(value, dict):
+            return any(self.refers_to_dependent(v) for v in value.values())
+        return False
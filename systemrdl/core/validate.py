@@ -1,7 +1,8 @@
+import heapq
 
 from .. import walker
 from .. import rdltypes
-from ..node import RegNode
+from ..node import RegNode, AddressableNode, RootNode
 
 #===============================================================================
 # Validation Listeners
@@ -17,8 +18,12 @@ class ValidateListener(walker.RDLListener):
         self.field_check_buffer = []
         
         # Used in addrmap, regfile, and reg overlap checks
-        # Same concept as the field check buffer, but is also a stack
-        self.addr_check_buffer_stack = [[]]
+        # Stack of address sweeps over each parent's addressable children
+        self.addr_sweep_stack = [_AddressSweep()]
+        
+        # Stack of (end address, node) of the addressable components currently
+        # being visited
+        self.addr_entry_stack = []
     
     
     def enter_Component(self, node):
@@ -34,39 +39,27 @@ class ValidateListener(walker.RDLListener):
     
     
     def enter_AddressableComponent(self, node):
-        addr_check_buffer = self.addr_check_buffer_stack[-1]
-        self.addr_check_buffer_stack.append([])
-        
-        # Check for collision with previous addressable sibling
-        new_addr_check_buffer = []
-        for prev_addressable in addr_check_buffer:
-            if (prev_addressable.inst.addr_offset + prev_addressable.total_size) > node.inst.addr_offset:
-                # Overlaps!
-                
-                # Only allowable overlaps are as follows:
-                #   10.1-h: Registers shall not overlap, unless one contains only
-                #   read-only fields and the other contains only write-only or
-                #   write-once-only fields.
-                overlap_allowed = False
-                if isinstance(prev_addressable, RegNode) and isinstance(node, RegNode):
-                    if (((not prev_addressable.has_sw_writable) and (not node.has_sw_readable))
-                        or ((not prev_addressable.has_sw_readable) and (not node.has_sw_writable))
-                    ):
-                        overlap_allowed = True
-                
-                if not overlap_allowed:
-                    self.msg.error(
-                        "Instance '%s' at offset +0x%X:0x%X overlaps with '%s' at offset +0x%X:0x%X"
-                        % (
-                            node.inst.inst_name, node.inst.addr_offset, node.inst.addr_offset + node.total_size - 1,
-                            prev_addressable.inst.inst_name, prev_addressable.inst.addr_offset, prev_addressable.inst.addr_offset + prev_addressable.total_size - 1,
-                        ),
-                        node.inst.inst_src_ref
-                    )
-                
-                # Keep it in the list since it could collide again
-                new_addr_check_buffer.append(prev_addressable)
-        self.addr_check_buffer_stack[-2] = new_addr_check_buffer
+        sweep = self.addr_sweep_stack[-1]
+        self.addr_sweep_stack.append(_AddressSweep())
+        
+        start = node.inst.addr_offset
+        end = start + node.total_size
+        self.addr_entry_stack.append((end, node))
+        
+        # Top-level components each occupy their own address space
+        if isinstance(node.parent, RootNode):
+            return
+        
+        # Check for collision with previous addressable siblings
+        for prev_addressable in sweep.get_conflicts(start, node):
+            self.msg.error(
+                "Instance '%s' at offset +0x%X:0x%X overlaps with '%s' at offset +0x%X:0x%X"
+                % (
+                    node.inst.inst_name, start, end - 1,
+                    prev_addressable.inst.inst_name, prev_addressable.inst.addr_offset, prev_addressable.inst.addr_offset + prev_addressable.total_size - 1,
+                ),
+                node.inst.inst_src_ref
+            )
     
     
     def enter_Reg(self, node):
@@ -206,7 +199,7 @@ class ValidateListener(walker.RDLListener):
     
     def exit_Regfile(self, node):
         # 12.2-c: At least one reg or regfile shall be instantiated within a regfile.
-        if not self.addr_check_buffer_stack[-1]:
+        if not has_addressable_child(node):
             self.msg.error(
                 "Register file '%s' must contain at least one reg or regfile."
                 % node.inst.inst_name,
@@ -217,7 +210,7 @@ class ValidateListener(walker.RDLListener):
     def exit_Addrmap(self, node):
         # 13.3-b: At least one register, register file, memory, or address map
         # shall be instantiated within an address map
-        if not self.addr_check_buffer_stack[-1]:
+        if not has_addressable_child(node):
             self.msg.error(
                 "Address map '%s' must contain at least one reg, regfile, mem, or addrmap."
                 % node.inst.inst_name,
@@ -226,5 +219,153 @@ class ValidateListener(walker.RDLListener):
 
     
     def exit_AddressableComponent(self, node):
-        self.addr_check_buffer_stack.pop()
-        self.addr_check_buffer_stack[-1].append(node)
+        self.addr_sweep_stack.pop()
+        self.addr_sweep_stack[-1].add(*self.addr_entry_stack.pop())
+
+
+def has_addressable_child(node):
+    """
+    Checks the node's children directly rather than relying on what the walker
+    visited, since a listener may have skipped the node's descendants.
+    """
+    for child in node.children():
+        if isinstance(child, AddressableNode):
+            return True
+    return False
+
+
+def get_reg_access_summary(node):
+    """
+    Returns a (has_sw_readable, has_sw_writable) tuple for a register.
+    Equivalent to the RegNode properties of the same name, but only visits the
+    register's fields once.
+    """
+    readable = False
+    writable = False
+    for field in node.fields():
+        sw = field.get_property('sw')
+        if sw in _SW_READABLE:
+            readable = True
+        if sw in _SW_WRITABLE:
+            writable = True
+        if readable and writable:
+            break
+    return (readable, writable)
+
+_SW_READABLE = (rdltypes.AccessType.rw, rdltypes.AccessType.rw1, rdltypes.AccessType.r)
+_SW_WRITABLE = (
+    rdltypes.AccessType.rw, rdltypes.AccessType.rw1,
+    rdltypes.AccessType.w, rdltypes.AccessType.w1
+)
+
+
+def is_overlap_allowed(prev_access, this_access):
+    """
+    10.1-h: Registers shall not overlap, unless one contains only read-only
+    fields and the other contains only write-only or write-once-only fields.
+
+    Access summaries are None for components that are not registers.
+    """
+    if (prev_access is None) or (this_access is None):
+        return False
+    prev_readable, prev_writable = prev_access
+    this_readable, this_writable = this_access
+    return (
+        ((not prev_writable) and (not this_readable))
+        or ((not prev_readable) and (not this_writable))
+    )
+
+# All possible access summaries, used to classify the active siblings
+_ACCESS_CLASSES = (
+    None,
+    (False, False), (False, True), (True, False), (True, True),
+)
+
+
+class _AddressSweep:
+    """
+    Sweep line over the addressable children of a component.
+
+    Children are visited in ascending address order, so a previous sibling can
+    only overlap future siblings until the sweep passes its end address.
+    Previous siblings that are still active are kept in a heap ordered by end
+    address, and are also grouped by access summary. Groups are updated only
+    as siblings are added or retired. A new sibling is checked against each
+    group, and only the groups it is not allowed to overlap with are listed.
+
+    Access summaries require visiting a register's fields, so they are only
+    determined once a sibling is found to overlap with another. Each sibling's
+    summary is determined at most once.
+    """
+    def __init__(self):
+        # Heap of [end address, sequence number, node, access summary]
+        # Access summary is _UNKNOWN until needed
+        self.active = []
+        self.seq = 0
+        
+        # access summary : {sequence number : node} of active siblings
+        self.groups = {access: {} for access in _ACCESS_CLASSES}
+        
+        # Heap entries of active siblings whose access summary is _UNKNOWN
+        self.unresolved = []
+        
+        # (node, access summary) of the last node passed to get_conflicts()
+        self.last_access = (None, _UNKNOWN)
+    
+    def add(self, end, node):
+        if self.last_access[0] is node:
+            access = self.last_access[1]
+        else:
+            access = _UNKNOWN
+        entry = [end, self.seq, node, access]
+        if access is _UNKNOWN:
+            self.unresolved.append(entry)
+        else:
+            self.groups[access][self.seq] = node
+        heapq.heappush(self.active, entry)
+        self.seq += 1
+    
+    def get_conflicts(self, start, node):
+        """
+        Returns a list of active sibling nodes that illegally overlap with a sibling that begins at address 'start', in the
+        order they were added.
+        """
+        # Retire siblings that end before the current start address
+        while self.active and self.active[0][0] <= start:
+            entry = heapq.heappop(self.active)
+            if entry[3] is _UNKNOWN:
+                entry[3] = _RETIRED
+            else:
+                del self.groups[entry[3]][entry[1]]
+        
+        if not self.active:
+            self.unresolved = []
+            return []
+        
+        for entry in self.unresolved:
+            if entry[3] is _UNKNOWN:
+                entry[3] = _get_access(entry[2])
+                self.groups[entry[3]][entry[1]] = entry[2]
+        self.unresolved = []
+        access = _get_access(node)
+        self.last_access = (node, access)
+        
+        conflicts = []
+        for prev_access, group in self.groups.items():
+            if group and not is_overlap_allowed(prev_access, access):
+                conflicts.extend(group.items())
+        conflicts.sort(key=lambda e: e[0])
+        return [prev_node for _, prev_node in conflicts]
+
+
+# Placeholder for access summaries that were not determined yet
+_UNKNOWN = object()
+
+# Placeholder for siblings that were retired before their access summary was
+# determined
+_RETIRED = object()
+
+def _get_access(node):
+    if isinstance(node, RegNode):
+        return get_reg_access_summary(node)
+    return None
@@ -0,0 +1,314 @@
+import array
+import itertools
+
+from . import rdltypes
+from .node import Node, AddressableNode, RegNode, RootNode, ArrayView
+
+#===============================================================================
+class RegisterTable:
+    """
+    Columns that describe every unrolled register. Row ``i`` of each column
+    describes the same register.
+
+    Numeric columns are :class:`array.array` objects. These support the buffer
+    protocol, so they can be wrapped by ``numpy.asarray()`` without copying.
+    """
+    def __init__(self, properties):
+        #: Hierarchical path of each register
+        self.path = []
+
+        #: Absolute byte address
+        self.address = array.array('Q')
+
+        #: Register width in bits (``regwidth``)
+        self.width = array.array('I')
+
+        #: Row of the register's first field in the :class:`FieldTable`
+        self.field_start = array.array('Q')
+
+        #: Number of fields in the register
+        self.field_count = array.array('I')
+
+        #: Columns of additional properties that were requested.
+        #: Maps each property name to a list of values.
+        #: Values are None if the property is not valid for registers.
+        self.properties = {name: [] for name in properties}
+
+    def __len__(self):
+        return len(self.path)
+
+
+class FieldTable:
+    """
+    Columns that describe every field of every unrolled register. Row ``i``
+    of each column describes the same field.
+
+    Fields are listed in the same order as their registers, and within each
+    register in ascending bit order.
+
+    Numeric columns are :class:`array.array` objects. These support the buffer
+    protocol, so they can be wrapped by ``numpy.asarray()`` without copying.
+    """
+    def __init__(self, properties):
+        #: Hierarchical path of each field
+        self.path = []
+
+        #: Row of the field's register in the :class:`RegisterTable`
+        self.register = array.array('Q')
+
+        #: Least significant bit
+        self.lsb = array.array('I')
+
+        #: Most significant bit
+        self.msb = array.array('I')
+
+        #: Width in bits
+        self.width = array.array('I')
+
+        #: Software access, as the value of a :class:`~systemrdl.rdltypes.AccessType`
+        self.sw = array.array('B')
+
+        #: Hardware access, as the value of a :class:`~systemrdl.rdltypes.AccessType`
+        self.hw = array.array('B')
+
+        #: Reset value. Either an int, a reference to a :class:`~systemrdl.node.Node`
+        #: or None if the field has no reset
+        self.reset = []
+
+        #: Columns of additional properties that were requested.
+        #: Maps each property name to a list of values.
+        #: Values are None if the property is not valid for fields.
+        self.properties = {name: [] for name in properties}
+
+    def __len__(self):
+        return len(self.path)
+
+
+class FlatModel:
+    """
+    Columnar representation of an elaborated register model
+    """
+    def __init__(self, properties):
+        #: :class:`RegisterTable` with one row per register
+        self.registers = RegisterTable(properties)
+
+        #: :class:`FieldTable` with one row per field
+        self.fields = FieldTable(properties)
+
+#===============================================================================
+def flatten(node, properties=(), skip_not_present=True):
+    """
+    Flattens an elaborated register model into columns, with one row per
+    unrolled register and field.
+
+    Properties are only queried once for each register definition instance,
+    and then replicated for each of its array elements. Values that refer to
+    other components are resolved separately for each element.
+
+    Parameters
+    ----------
+    node: :class:`~systemrdl.node.Node`
+        Node to flatten. Typically the :class:`~systemrdl.node.RootNode`.
+        If it is an array whose index is not known, all elements are
+        flattened.
+    properties: list
+        Names of additional properties to collect for each register and field,
+        such as user-defined properties.
+    skip_not_present: bool
+        If True, skips components whose 'ispresent' property is set to False
+
+    Returns
+    -------
+    :class:`FlatModel`
+        Flattened model
+    """
+    flattener = _Flattener(list(properties), skip_not_present)
+    for element in _get_elements(node):
+        if isinstance(element, RegNode):
+            flattener.add_registers(element)
+        else:
+            flattener.add_group(element)
+    return flattener.model
+
+
+def _get_elements(node):
+    """
+    Returns all elements of the node if it is an array with unknown index
+    """
+    if isinstance(node, AddressableNode) and node.inst.is_array and (node.current_idx is None):
+        return ArrayView(node)
+    return [node]
+
+
+def _is_contextual(value):
+    """
+    Values that refer to other nodes depend on which array element they were
+    queried from
+    """
+    return isinstance(value, (Node, rdltypes.PropertyReference))
+
+
+def _get_property_or_none(node, prop_name):
+    try:
+        return node.get_property(prop_name)
+    except LookupError:
+        return None
+
+
+class _RegisterTemplate:
+    """
+    Values shared by all elements of a register instance
+    """
+    def __init__(self, reg, properties, skip_not_present):
+        self.width = reg.get_property('regwidth')
+        self.properties = [_get_property_or_none(reg, name) for name in properties]
+
+        # Properties that need to be resolved for each element
+        self.contextual_properties = [
+            i for i, value in enumerate(self.properties)
+            if _is_contextual(value)
+        ]
+
+        self.field_names = []
+        self.lsb = array.array('I')
+        self.msb = array.array('I')
+        self.width_list = array.array('I')
+        self.sw = array.array('B')
+        self.hw = array.array('B')
+        self.reset = []
+        self.field_properties = {name: [] for name in properties}
+
+        # (field row, column name or None for reset) of values that need to be
+        # resolved for each element
+        self.contextual_fields = []
+
+        for i, field in enumerate(reg.fields(skip_not_present=skip_not_present)):
+            self.field_names.append(field.inst.inst_name)
+            self.lsb.append(field.inst.lsb)
+            self.msb.append(field.inst.msb)
+            self.width_list.append(field.inst.width)
+            self.sw.append(field.get_property('sw').value)
+            self.hw.append(field.get_property('hw').value)
+
+            reset = field.get_property('reset')
+            self.reset.append(reset)
+            if _is_contextual(reset):
+                self.contextual_fields.append((i, None))
+
+            for name in properties:
+                value = _get_property_or_none(field, name)
+                self.field_properties[name].append(value)
+                if _is_contextual(value):
+                    self.contextual_fields.append((i, name))
+
+
+class _Flattener:
+    def __init__(self, properties, skip_not_present):
+        self.properties = properties
+        self.skip_not_present = skip_not_present
+        self.model = FlatModel(properties)
+
+        # id(reg inst) : _RegisterTemplate
+        self.templates = {}
+
+
+    def add_group(self, node):
+        """
+        Add all registers within a group node, in order
+        """
+        # Stack of iterators over each group's remaining children
+        stack = [self._iter_children(node)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+            elif isinstance(child, RegNode):
+                self.add_registers(child)
+            else:
+                stack.append(self._iter_children(child))
+
+
+    def _iter_children(self, node):
+        for child in node.children(skip_not_present=self.skip_not_present):
+            if isinstance(child, RegNode):
+                # Register arrays are expanded by add_registers()
+                yield child
+            elif isinstance(child, AddressableNode):
+                yield from _get_elements(child)
+
+
+    def add_registers(self, reg):
+        """
+        Add all elements of a register node
+        """
+        template = self.templates.get(id(reg.inst), None)
+        if template is None:
+            template = _RegisterTemplate(reg, self.properties, self.skip_not_present)
+            self.templates[id(reg.inst)] = template
+
+        if reg.parent is not None and not isinstance(reg.parent, RootNode):
+            prefix = reg.parent.get_path() + "." + reg.inst.inst_name
+        else:
+            prefix = reg.inst.inst_name
+
+        if reg.inst.is_array and (reg.current_idx is None):
+            view = ArrayView(reg)
+            idx_iter = itertools.product(*[range(n) for n in view.dimensions])
+            elements = zip(idx_iter, view.element_addresses())
+        else:
+            view = None
+            elements = [(reg.current_idx, reg.absolute_address)]
+
+        for idx, address in elements:
+            if idx is None:
+                path = prefix
+            else:
+                path = prefix + "".join("[%d]" % i for i in idx)
+
+            if template.contextual_properties or template.contextual_fields:
+                if view is not None:
+                    element = view[tuple(idx)]
+                else:
+                    element = reg
+            else:
+                element = None
+
+            self._add_register(template, path, address, element)
+
+
+    def _add_register(self, template, path, address, element):
+        regs = self.model.registers
+        fields = self.model.fields
+        row = len(regs.path)
+        field_row = len(fields.path)
+        n_fields = len(template.field_names)
+
+        regs.path.append(path)
+        regs.address.append(address)
+        regs.width.append(template.width)
+        regs.field_start.append(field_row)
+        regs.field_count.append(n_fields)
+        for i, name in enumerate(self.properties):
+            if i in template.contextual_properties:
+                regs.properties[name].append(element.get_property(name))
+            else:
+                regs.properties[name].append(template.properties[i])
+
+        fields.path.extend([path + "." + name for name in template.field_names])
+        fields.register.extend(itertools.repeat(row, n_fields))
+        fields.lsb.extend(template.lsb)
+        fields.msb.extend(template.msb)
+        fields.width.extend(template.width_list)
+        fields.sw.extend(template.sw)
+        fields.hw.extend(template.hw)
+        fields.reset.extend(template.reset)
+        for name in self.properties:
+            fields.properties[name].extend(template.field_properties[name])
+
+        # Resolve references for this specific element
+        for i, name in template.contextual_fields:
+            field = element.get_child_by_name(template.field_names[i])
+            if name is None:
+                fields.reset[field_row + i] = field.get_property('reset')
+            else:
+                fields.properties[name][field_row + i] = field.get_property(name)
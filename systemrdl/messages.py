@@ -1,5 +1,9 @@
 
+import os
+import re
 import sys
+import bisect
+from collections import OrderedDict
 
 from antlr4.error.ErrorListener import ErrorListener
 from antlr4.Token import CommonToken
@@ -91,41 +95,25 @@ class SourceRef:
         else:
             end_filename = self.filename
         
-        line_start = 0
-        lineno = 1
-        file_pos = 0
-        
         # Skip deriving end coordinate if selection spans multiple files
         if self.filename != end_filename:
             get_end = False
         else:
             get_end = True
         
+        line_index = _line_index_cache.get(self.filename)
         
-        with open(self.filename, 'r', newline='', encoding='utf_8') as fp:
+        start_line_idx = line_index.find_line(self.start)
+        if start_line_idx is not None:
+            self.start_line = start_line_idx + 1
+            self.start_col = self.start - line_index.line_starts[start_line_idx]
+            self.start_line_text = line_index.get_line_text(start_line_idx)
             
-            while True:
-                line_text = fp.readline()
-                
-                file_pos += len(line_text)
-                
-                if line_text == "":
-                    break
-                
-                if (self.start_line is None) and (self.start < file_pos):
-                    self.start_line = lineno
-                    self.start_col = self.start - line_start
-                    self.start_line_text = line_text.rstrip("\n").rstrip("\r")
-                    if not get_end:
-                        break
-                
-                if get_end and (self.end_line is None) and (self.end < file_pos):
-                    self.end_line = lineno
-                    self.end_col = self.end - line_start
-                    break
-                
-                lineno += 1
-                line_start = file_pos
+            if get_end:
+                end_line_idx = line_index.find_line(self.end)
+                if end_line_idx is not None:
+                    self.end_line = end_line_idx + 1
+                    self.end_col = self.end - line_index.line_starts[end_line_idx]
         
         # If no end coordinate was derived, just do a single char selection
         if not get_end:
@@ -184,6 +172,91 @@ class SourceRef:
         src_ref = cls(idx, idx, seg_map=seg_map)
         return src_ref
 
+#===============================================================================
+class LineIndexCache:
+    """
+    Size-bounded cache of :class:`LineIndex` objects, keyed by file path.
+    
+    A file is read and indexed again if its modification time or size changed.
+    Once more than max_entries files are indexed, the least recently used one
+    is discarded.
+    """
+    def __init__(self, max_entries=64):
+        #: Maximum number of files that are kept indexed
+        self.max_entries = max_entries
+        
+        # path : LineIndex
+        self._entries = OrderedDict()
+    
+    def get(self, path):
+        """
+        Returns the :class:`LineIndex` for the file at path
+        """
+        st = os.stat(path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        
+        entry = self._entries.get(path, None)
+        if entry is not None and entry.stat_key == stat_key:
+            self._entries.move_to_end(path)
+            return entry
+        
+        with open(path, 'r', newline='', encoding='utf_8') as fp:
+            text = fp.read()
+        entry = LineIndex(text, stat_key)
+        self._entries[path] = entry
+        self._entries.move_to_end(path)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+    
+    def clear(self):
+        """
+        Discard all indexed files
+        """
+        self._entries.clear()
+
+
+class LineIndex:
+    """
+    Offsets of the start of each line in a file's text.
+    
+    Lines end the same way they do when reading a file opened with
+    ``newline=''``: at ``\\n``, ``\\r\\n`` or a lone ``\\r``.
+    """
+    _line_end_regex = re.compile(r'\r\n|\r|\n')
+    
+    def __init__(self, text, stat_key=None):
+        self.text = text
+        self.stat_key = stat_key
+        
+        #: Character offset of the first character of each line
+        self.line_starts = [0]
+        self.line_starts.extend(m.end() for m in self._line_end_regex.finditer(text))
+    
+    def find_line(self, offset):
+        """
+        Returns the 0-based index of the line that contains the character
+        offset, or None if the offset is past the end of the text.
+        """
+        if offset >= len(self.text):
+            return None
+        return max(bisect.bisect_right(self.line_starts, offset) - 1, 0)
+    
+    def get_line_text(self, idx):
+        """
+        Returns the text of line idx, without its line ending
+        """
+        start = self.line_starts[idx]
+        if idx + 1 < len(self.line_starts):
+            end = self.line_starts[idx + 1]
+        else:
+            end = len(self.text)
+        return self.text[start:end].rstrip("\n").rstrip("\r")
+
+#: Line indexes shared by all :class:`SourceRef` objects
+_line_index_cache = LineIndexCache()
+
 #===============================================================================
 class MessagePrinter:
     """
@@ -1,4 +1,6 @@
 import re
+import copy
+import bisect
 import itertools
 import operator
 import functools
@@ -17,6 +19,9 @@ class Node:
     
     """
     
+    # Nodes are created for every element that is visited. Keep them compact
+    __slots__ = ["env", "inst", "parent", "_property_cache"]
+    
     def __init__(self, inst, env, parent):
         """
         Generic Node constructor.
@@ -29,6 +34,10 @@ class Node:
         
         #: Reference to parent :class:`~Node`
         self.parent = parent
+        
+        # (cache token, {prop_name : resolved value})
+        # See get_property()
+        self._property_cache = None
     
     def __repr__(self):
         return "<%s %s at 0x%x>" % (
@@ -102,11 +111,7 @@ class Node:
                 
             if unroll and isinstance(child_inst, comp.AddressableComponent) and child_inst.is_array:
                 # Unroll the array
-                range_list = [range(n) for n in child_inst.array_dimensions]
-                for idxs in itertools.product(*range_list):
-                    N = Node._factory(child_inst, self.env, self)
-                    N.current_idx = idxs # pylint: disable=attribute-defined-outside-init
-                    yield N
+                yield from ArrayView(Node._factory(child_inst, self.env, self))
             else:
                 yield Node._factory(child_inst, self.env, self)
     
@@ -219,15 +224,8 @@ class Node:
         IndexError
             If an array index in the path is invalid
         """
-        pathparts = path.split('.')
         current_node = self
-        for pathpart in pathparts:
-            m = re.fullmatch(r'^(\w+)((?:\[(?:\d+|0[xX][\da-fA-F]+)\])*)$', pathpart)
-            if not m:
-                raise ValueError("Invalid path")
-            inst_name, array_suffix = m.group(1,2)
-            idx_list = [ int(s,0) for s in re.findall(r'\[(\d+|0[xX][\da-fA-F]+)\]', array_suffix) ]
-            
+        for inst_name, idx_list in _parse_path(path):
             current_node = current_node.get_child_by_name(inst_name)
             if current_node is None:
                 return None
@@ -238,11 +236,10 @@ class Node:
                     if len(idx_list) != len(current_node.inst.array_dimensions):
                         raise IndexError("Wrong number of array dimensions")
                     
-                    current_node.current_idx = [] # pylint: disable=attribute-defined-outside-init
                     for i in range(len(idx_list)):
                         if idx_list[i] >= current_node.inst.array_dimensions[i]:
                             raise IndexError("Array index out of range")
-                        current_node.current_idx.append(idx_list[i])
+                    current_node.current_idx = list(idx_list)
                 else:
                     raise IndexError("Index attempted on non-array component")
             
@@ -260,6 +257,11 @@ class Node:
         Properties values that are a reference to a component instance are
         converted to a :class:`~Node` overlay object.
         
+        Once elaboration completes, resolved values are cached by the node for
+        the array indexes currently assigned to it and its ancestors, so
+        repeated queries return the same object. Returned values are shared
+        and shall be treated as read-only. See :meth:`invalidate_cache`
+        
         Parameters
         ----------
         prop_name: str
@@ -285,6 +287,48 @@ class Node:
         if kwargs:
             raise TypeError("got an unexpected keyword argument '%s'" % list(kwargs.keys())[0])
         
+        if ovr_default and (prop_name not in self.inst.properties):
+            # Default value is being overridden by user. Return their value
+            return default
+        
+        # Once elaborated, resolved values are cached by the node. References
+        # to other nodes are resolved relative to the array indexes of this
+        # node's lineage
+        token = self.env.derived_cache_token
+        if token is None:
+            return self._resolve_property(prop_name)
+        
+        idx = self._get_idx_lineage()
+        cache = self._property_cache
+        if (cache is None) or (cache[0] is not token) or (cache[1] != idx):
+            self._property_cache = (token, idx, {})
+        resolved = self._property_cache[2]
+        if prop_name not in resolved:
+            resolved[prop_name] = self._resolve_property(prop_name)
+        return resolved[prop_name]
+    
+    
+    def _get_idx_lineage(self):
+        """
+        Returns the array indexes of this node and each of its addressable
+        ancestors
+        """
+        lineage = []
+        node = self
+        while node is not None:
+            if isinstance(node, AddressableNode):
+                if node.current_idx is None:
+                    lineage.append(None)
+                else:
+                    lineage.append(tuple(node.current_idx))
+            node = node.parent
+        return tuple(lineage)
+    
+    
+    def _resolve_property(self, prop_name):
+        """
+        Derive the value of a property for get_property()
+        """
         # If its already in the component, then safe to bypass checks
         if prop_name in self.inst.properties:
             prop_value = self.inst.properties[prop_name]
@@ -293,14 +337,13 @@ class Node:
                 # If this is a hierarchical component reference, convert it to a Node reference
                 prop_value = prop_value.build_node_ref(self, self.env)
             if isinstance(prop_value, rdltypes.PropertyReference):
+                # Reference is shared by all nodes of the component. Resolve
+                # a copy so that it remains specific to this node
+                prop_value = copy.copy(prop_value)
                 prop_value._resolve_node(self)
             
             return prop_value
         
-        if ovr_default:
-            # Default value is being overridden by user. Return their value
-            return default
-        
         # Otherwise, return its default value based on the property's rules
         rule = self.env.property_rules.lookup_property(prop_name)
         
@@ -399,6 +442,22 @@ class Node:
             return None
         return rdlformatcode.rdlfc_to_html(desc_str, self)
     
+    def invalidate_cache(self):
+        """
+        Discards cached addresses, sizes and property values.
+        
+        Once elaboration completes, the addresses, sizes and property values of
+        nodes are cached as they are queried. If the elaborated model is modified afterwards,
+        call this so that they are re-derived. This applies to all nodes
+        elaborated by the same compiler.
+        
+        The array indexes of a node's ancestors are assumed not to change after
+        its address has been queried. Modifying them also requires the cache to
+        be invalidated.
+        """
+        if self.env.derived_cache_token is not None:
+            self.env.derived_cache_token = object()
+    
     def __eq__(self, other):
         # Nodes are equal if they represent the same hierarchical position
         # in the register model
@@ -409,6 +468,7 @@ class AddressableNode(Node):
     """
     Base-class for any kind of node that can have an address
     """
+    __slots__ = ["current_idx", "_address_cache"]
     
     def __init__(self, inst, env, parent):
         super().__init__(inst, env, parent)
@@ -418,6 +478,10 @@ class AddressableNode(Node):
         #: 
         #: If None, then the current index is unknown
         self.current_idx = None
+        
+        # (cache token, array indexes of lineage, absolute address)
+        # See absolute_address
+        self._address_cache = None
     
     
     def get_path_segment(self, array_suffix="[{index:d}]", empty_array_suffix="[]"):
@@ -454,20 +518,7 @@ class AddressableNode(Node):
             if self.current_idx is None:
                 raise ValueError("Index of array element must be known to derive address")
             
-            # Calculate the "flattened" index of a general multidimensional array
-            # For example, a component array declared as:
-            #   foo[S0][S1][S2]
-            # and referenced as:
-            #   foo[I0][I1][I2]
-            # Is flattened like this:
-            #   idx = I0*S1*S2 + I1*S2 + I2
-            idx = 0
-            for i in range(len(self.current_idx)):
-                sz = 1
-                for j in range(i+1, len(self.inst.array_dimensions)):
-                    sz *= self.inst.array_dimensions[j]
-                idx += sz * self.current_idx[i]
-            
+            idx = _flatten_array_index(self.current_idx, self.inst.array_dimensions)
             offset = self.inst.addr_offset + idx * self.inst.array_stride
                     
         else:
@@ -476,6 +527,36 @@ class AddressableNode(Node):
         return offset
     
     
+    def array_view(self):
+        """
+        Get a view of all elements of this array node.
+        
+        Only valid if this node is an array.
+        See :class:`~ArrayView`
+        
+        Raises
+        ------
+        ValueError
+            If this node is not an array
+        """
+        return ArrayView(self)
+    
+    
+    def _get_element(self, idx):
+        """
+        Create a copy of this node that references the array element at idx
+        """
+        cls = self.__class__
+        element = cls.__new__(cls)
+        element.env = self.env
+        element.inst = self.inst
+        element.parent = self.parent
+        element.current_idx = idx
+        element._address_cache = None
+        element._property_cache = None
+        return element
+    
+    
     @property
     def absolute_address(self):
         """
@@ -490,10 +571,24 @@ class AddressableNode(Node):
             fully defined
         
         """
+        token = self.env.derived_cache_token
+        
+        # Once elaborated, the address is cached for this node's position.
+        # The position depends on the array indexes of all of its ancestors
+        if token is not None:
+            idx = self._get_idx_lineage()
+            cache = self._address_cache
+            if (cache is not None) and (cache[0] is token) and (cache[1] == idx):
+                return cache[2]
+        
         if self.parent and not isinstance(self.parent, RootNode):
-            return self.parent.absolute_address + self.address_offset
+            address = self.parent.absolute_address + self.address_offset
         else:
-            return self.address_offset
+            address = self.address_offset
+        
+        if token is not None:
+            self._address_cache = (token, idx, address)
+        return address
     
     
     @property
@@ -503,8 +598,19 @@ class AddressableNode(Node):
         
         If an array, returns the size of a single element
         """
-        # must be overridden
-        raise NotImplementedError
+        # Sizes do not depend on where the component is in the hierarchy, so
+        # once elaborated they are cached by the component.
+        token = self.env.derived_cache_token
+        if token is not None:
+            cache = self.inst._size_cache
+            if (cache is not None) and (cache[0] is token):
+                return cache[1]
+        
+        size = self._get_element_size()
+        
+        if token is not None:
+            self.inst._size_cache = (token, size)
+        return size
     
     
     @property
@@ -519,18 +625,145 @@ class AddressableNode(Node):
         else:
             return self.size
     
+    
+    def _get_element_size(self):
+        # must be overridden
+        raise NotImplementedError
+    
+    
+    def find_by_address(self, address):
+        """
+        Finds the deepest addressable node that occupies the absolute address.
+        
+        Addresses are resolved using an index of each component's children that
+        is built on first use. Arrays are resolved arithmetically rather than
+        being unrolled, so lookup time grows logarithmically with the number of
+        children at each level of the hierarchy.
+        
+        Alias registers are never returned since they share the address of
+        their primary register. Children whose ``ispresent`` property is False
+        are ignored. Memories that do not contain virtual registers are
+        returned as a whole.
+        
+        Indexes of all arrays in this node's lineage must be known.
+        
+        Parameters
+        ----------
+        address: int
+            Absolute byte address
+        
+        Returns
+        -------
+        :class:`~AddressableNode` or None
+            Node that occupies the address, with the array indexes of it and its
+            ancestors assigned. None if the address is not occupied.
+        """
+        offset = address - self.absolute_address
+        if (offset < 0) or (offset >= self.size):
+            return None
+        
+        node = self
+        while True:
+            index = _get_address_index(node)
+            if not index.starts:
+                # Does not contain any addressable children
+                return node
+            
+            # Last child that starts at or before the offset. Siblings may
+            # overlap, so scan back through any earlier ones that could still
+            # contain the offset
+            i = bisect.bisect_right(index.starts, offset) - 1
+            while (i >= 0) and (offset < index.max_ends[i]):
+                if offset < index.ends[i]:
+                    child_inst = index.insts[i]
+                    child_offset = offset - index.starts[i]
+                    if not child_inst.is_array:
+                        element = None
+                        break
+                    element, child_offset = divmod(child_offset, child_inst.array_stride)
+                    if child_offset < index.element_sizes[i]:
+                        break
+                    # Lands in the space between array elements
+                i -= 1
+            else:
+                return None
+            
+            child = Node._factory(child_inst, node.env, node)
+            if element is not None:
+                child.current_idx = _unflatten_array_index(element, child_inst.array_dimensions)
+            offset = child_offset
+            node = child
+    
+    
+    def find_by_address_range(self, address, size):
+        """
+        Finds the deepest addressable nodes that overlap the range of absolute
+        addresses from ``address`` to ``address + size - 1``.
+        
+        The same rules as :meth:`find_by_address` apply.
+        Only array elements that overlap the range are visited.
+        
+        Parameters
+        ----------
+        address: int
+            Absolute byte address of the start of the range
+        size: int
+            Size of the range in bytes
+        
+        Yields
+        ------
+        :class:`~AddressableNode`
+            Nodes that overlap the range, in order of ascending address
+        """
+        low = address - self.absolute_address
+        high = low + size
+        yield from _iter_address_range(self, max(low, 0), min(high, self.size))
+    
 #===============================================================================
 class VectorNode(Node):
     """
     Base-class for any kind of node that is vector-like.
     """
+    __slots__ = []
 
 #===============================================================================
 class RootNode(Node):
+    __slots__ = []
+    
+    def find_by_address(self, address):
+        """
+        Finds the deepest addressable node that occupies the absolute address
+        of the top-level addrmap.
+        
+        If the root contains several top-level addrmaps, only the first one
+        is searched. See :attr:`top`.
+        
+        See :meth:`AddressableNode.find_by_address`
+        """
+        return self.top.find_by_address(address)
+    
+    
+    def find_by_address_range(self, address, size):
+        """
+        Finds the deepest addressable nodes that overlap the range of absolute
+        addresses of the top-level addrmap.
+        
+        If the root contains several top-level addrmaps, only the first one
+        is searched. See :attr:`top`.
+        
+        See :meth:`AddressableNode.find_by_address_range`
+        """
+        return self.top.find_by_address_range(address, size)
+    
     @property
     def top(self):
         """
         Returns the top-level addrmap node
+        
+        If the root contains several top-level addrmaps, as elaborated by
+        :meth:`~systemrdl.RDLCompiler.elaborate_all`, returns the first one.
+        Each top-level addrmap has its own address space, so the others can
+        only be reached by name.
         """
         for child in self.children(skip_not_present=False):
             if not isinstance(child, AddrmapNode):
@@ -540,10 +773,11 @@ class RootNode(Node):
     
 #===============================================================================
 class SignalNode(VectorNode):
-    pass
+    __slots__ = []
 
 #===============================================================================
 class FieldNode(VectorNode):
+    __slots__ = []
     
     @property
     def is_virtual(self):
@@ -611,9 +845,9 @@ class FieldNode(VectorNode):
 
 #===============================================================================
 class RegNode(AddressableNode):
+    __slots__ = []
     
-    @property
-    def size(self):
+    def _get_element_size(self):
         return self.get_property('regwidth') // 8
     
     @property
@@ -648,23 +882,23 @@ class RegNode(AddressableNode):
 
 #===============================================================================
 class RegfileNode(AddressableNode):
+    __slots__ = []
     
-    @property
-    def size(self):
+    def _get_element_size(self):
         return get_group_node_size(self)
         
 #===============================================================================
 class AddrmapNode(AddressableNode):
+    __slots__ = []
     
-    @property
-    def size(self):
+    def _get_element_size(self):
         return get_group_node_size(self)
 
 #===============================================================================
 class MemNode(AddressableNode):
+    __slots__ = []
     
-    @property
-    def size(self):
+    def _get_element_size(self):
         entry_size = self.get_property('memwidth') // 8
         num_entries = self.get_property('mementries')
         return entry_size * num_entries
@@ -687,3 +921,252 @@ def get_group_node_size(node):
         last_child_node.inst.addr_offset
         + last_child_node.total_size
     )
+
+#===============================================================================
+class ArrayView:
+    """
+    Sequence of the elements of an array node.
+    
+    Element nodes are only created when they are indexed or iterated. Nothing
+    is retained per element, so iterating over very large arrays uses constant
+    memory as long as the caller does not keep the element nodes.
+    
+    Elements can be indexed by their flattened position, or by a tuple that
+    contains an index for each array dimension::
+    
+        view = node.array_view()
+        view[5]
+        view[1, 2]
+    """
+    __slots__ = ["node", "dimensions", "strides", "n_elements"]
+    
+    def __init__(self, node):
+        if not (isinstance(node, AddressableNode) and node.inst.is_array):
+            raise ValueError("Node '%s' is not an array" % node.get_path())
+        
+        #: The array :class:`~AddressableNode` being viewed
+        self.node = node
+        
+        #: Array dimensions
+        self.dimensions = tuple(node.inst.array_dimensions)
+        
+        #: Number of elements that each index of a dimension spans
+        self.strides = _get_index_strides(self.dimensions)
+        
+        #: Total number of elements
+        self.n_elements = self.strides[0] * self.dimensions[0]
+    
+    
+    def __len__(self):
+        return self.n_elements
+    
+    
+    def __iter__(self):
+        get_element = self.node._get_element
+        # itertools.product() materializes each of its inputs. Avoid doing so
+        # for the last dimension, which may be very large
+        *outer_dimensions, last_dimension = self.dimensions
+        for outer_idx in itertools.product(*[range(n) for n in outer_dimensions]):
+            for i in range(last_dimension):
+                yield get_element(outer_idx + (i,))
+    
+    
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            if len(key) != len(self.dimensions):
+                raise IndexError("Wrong number of array dimensions")
+            for i, dim in zip(key, self.dimensions):
+                if not 0 <= i < dim:
+                    raise IndexError("Array index out of range")
+            idx = key
+        else:
+            if key < 0:
+                key += self.n_elements
+            if not 0 <= key < self.n_elements:
+                raise IndexError("Array index out of range")
+            idx = tuple(
+                (key // stride) % dim
+                for stride, dim in zip(self.strides, self.dimensions)
+            )
+        return self.node._get_element(idx)
+    
+    
+    def element_addresses(self):
+        """
+        Returns an iterator of the absolute address of each element, in
+        the same order as the elements are iterated.
+        
+        Addresses are computed without creating any element nodes.
+        Indexes of all arrays in the parent's lineage must be known.
+        """
+        node = self.node
+        base = node.inst.addr_offset
+        if node.parent and not isinstance(node.parent, RootNode):
+            base += node.parent.absolute_address
+        stride = node.inst.array_stride
+        return range(base, base + self.n_elements * stride, stride)
+
+
+@functools.lru_cache(maxsize=1024)
+def _get_index_strides(array_dimensions):
+    strides = []
+    stride = 1
+    for dim in reversed(array_dimensions):
+        strides.append(stride)
+        stride *= dim
+    strides.reverse()
+    return tuple(strides)
+
+#===============================================================================
+# Address lookup
+#===============================================================================
+class _AddressIndex:
+    """
+    Addressable children of a component, sorted by address offset.
+    Offsets are relative to the parent component.
+    """
+    __slots__ = [
+        "children", "n_children", "starts", "ends", "max_ends", "element_sizes",
+        "insts",
+    ]
+    
+    def __init__(self, node):
+        # Index is valid as long as the component's children are unchanged
+        self.children = node.inst.children
+        self.n_children = len(node.inst.children)
+        
+        entries = []
+        for child in node.children(skip_not_present=True):
+            if not isinstance(child, AddressableNode):
+                continue
+            if isinstance(child, RegNode) and child.inst.is_alias:
+                continue
+            start = child.inst.addr_offset
+            entries.append((start, start + child.total_size, child.size, child.inst))
+        entries.sort(key=lambda entry: entry[0])
+        
+        self.starts = [entry[0] for entry in entries]
+        self.ends = [entry[1] for entry in entries]
+        
+        # Siblings are allowed to overlap, such as read-only and write-only
+        # registers at the same offset, so ends are not necessarily sorted.
+        # Largest end of each child and all children before it
+        self.max_ends = []
+        max_end = 0
+        for end in self.ends:
+            max_end = max(max_end, end)
+            self.max_ends.append(max_end)
+        self.element_sizes = [entry[2] for entry in entries]
+        self.insts = [entry[3] for entry in entries]
+
+
+def _get_address_index(node):
+    index = node.inst._addr_index
+    if (index is None) or (index.children is not node.inst.children) or (index.n_children != len(node.inst.children)):
+        index = _AddressIndex(node)
+        node.inst._addr_index = index
+    return index
+
+
+def _flatten_array_index(idx, array_dimensions):
+    """
+    Calculate the "flattened" index of a general multidimensional array
+    For example, a component array declared as:
+      foo[S0][S1][S2]
+    and referenced as:
+      foo[I0][I1][I2]
+    Is flattened like this:
+      idx = I0*S1*S2 + I1*S2 + I2
+    """
+    flat_idx = 0
+    for i, dim in zip(idx, array_dimensions):
+        flat_idx = flat_idx * dim + i
+    return flat_idx
+
+
+def _unflatten_array_index(element, array_dimensions):
+    """
+    Converts a flattened array element number back to its list of indexes
+    """
+    idx = []
+    for dim in reversed(array_dimensions):
+        element, i = divmod(element, dim)
+        idx.append(i)
+    idx.reverse()
+    return idx
+
+
+def _iter_address_range(node, low, high):
+    """
+    Yields the deepest addressable nodes that overlap the range of offsets
+    [low, high) relative to node
+    """
+    if low >= high:
+        return
+    
+    index = _get_address_index(node)
+    if not index.starts:
+        yield node
+        return
+    
+    # First child that could end after the start of the range
+    i = bisect.bisect_right(index.max_ends, low)
+    while (i < len(index.starts)) and (index.starts[i] < high):
+        if index.ends[i] <= low:
+            # Overlapped by an earlier sibling that ends later
+            i += 1
+            continue
+        start = index.starts[i]
+        element_size = index.element_sizes[i]
+        child_inst = index.insts[i]
+        
+        if child_inst.is_array:
+            stride = child_inst.array_stride
+            n_elements = functools.reduce(operator.mul, child_inst.array_dimensions)
+            first = max(low - start, 0) // stride
+            last = min((high - 1 - start) // stride, n_elements - 1)
+            for element in range(first, last + 1):
+                element_start = start + element * stride
+                if element_start + element_size <= low:
+                    continue
+                child = Node._factory(child_inst, node.env, node)
+                child.current_idx = _unflatten_array_index(element, child_inst.array_dimensions)
+                yield from _iter_address_range(
+                    child,
+                    max(low - element_start, 0),
+                    min(high - element_start, element_size)
+                )
+        else:
+            child = Node._factory(child_inst, node.env, node)
+            yield from _iter_address_range(
+                child,
+                max(low - start, 0),
+                min(high - start, element_size)
+            )
+        i += 1
+
+#===============================================================================
+_PATH_SEGMENT_RE = re.compile(r'(\w+)((?:\[(?:\d+|0[xX][\da-fA-F]+)\])*)')
+_PATH_INDEX_RE = re.compile(r'\[(\d+|0[xX][\da-fA-F]+)\]')
+
+@functools.lru_cache(maxsize=4096)
+def _parse_path(path):
+    """
+    Splits a relative path string into a tuple of segments:
+        (inst_name, (idx, ...))
+    
+    Parsed paths are cached since the same paths tend to be queried repeatedly.
+    Raises ValueError if the path is malformed.
+    """
+    segments = []
+    for pathpart in path.split('.'):
+        m = _PATH_SEGMENT_RE.fullmatch(pathpart)
+        if not m:
+            raise ValueError("Invalid path")
+        inst_name, array_suffix = m.group(1, 2)
+        if array_suffix:
+            idx_list = tuple(int(s, 0) for s in _PATH_INDEX_RE.findall(array_suffix))
+        else:
+            idx_list = ()
+        segments.append((inst_name, idx_list))
+    return tuple(segments)
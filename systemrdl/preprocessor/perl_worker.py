@@ -0,0 +1,238 @@
+import os
+import time
+import atexit
+import select
+import threading
+import subprocess
+
+RUNNER_PATH = os.path.join(os.path.dirname(__file__), "ppp_runner.pl")
+
+#===============================================================================
+class PerlResult:
+    """
+    Outcome of running a Perl preprocessor miniscript.
+    Mirrors the attributes of :class:`subprocess.CompletedProcess` that the
+    preprocessor uses.
+    """
+    def __init__(self, returncode, stdout, stderr):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+def run_miniscript(miniscript, timeout):
+    """
+    Run a Perl preprocessor miniscript and return its :class:`PerlResult`.
+
+    Uses a persistent worker process if possible. Otherwise, a new Perl
+    process is started for this miniscript only.
+
+    Raises :class:`subprocess.TimeoutExpired` if the miniscript does not
+    complete in time.
+    """
+    if _pool is not None:
+        try:
+            return _pool.run(miniscript, timeout)
+        except WorkerError:
+            # Worker exited unexpectedly. Run the miniscript in isolation so
+            # that the result is the same as if no worker was used.
+            pass
+    return _run_standalone(miniscript, timeout)
+
+
+def _run_standalone(miniscript, timeout):
+    result = subprocess.run(
+        ["perl", RUNNER_PATH],
+        input=miniscript,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        timeout=timeout, check=False
+    )
+    return PerlResult(result.returncode, result.stdout, result.stderr)
+
+#===============================================================================
+class WorkerError(Exception):
+    """
+    A worker process exited or responded unexpectedly
+    """
+
+
+class PerlWorker:
+    """
+    A long-lived Perl process that runs miniscripts sent to it over a pipe.
+
+    Each miniscript is executed in a fresh Safe compartment, so no state is
+    carried over between miniscripts.
+    """
+    def __init__(self):
+        # The worker inherits the environment and working directory. Remember
+        # them so that the worker is not reused if they change.
+        self.context = _get_process_context()
+        # The process outlives this call. It is stopped by close()
+        self.proc = subprocess.Popen( # pylint: disable=consider-using-with
+            ["perl", RUNNER_PATH, "--server"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.stdout_fd = self.proc.stdout.fileno()
+        self.buffer = b""
+
+
+    def run(self, miniscript, timeout):
+        try:
+            self.proc.stdin.write(b"%d\n" % len(miniscript))
+            self.proc.stdin.write(miniscript)
+            self.proc.stdin.flush()
+        except OSError as e:
+            self.close()
+            raise WorkerError from e
+
+        deadline = time.monotonic() + timeout
+        header = self._read_until(b"\n", deadline, timeout)
+        status, _, length = header.decode("ascii", "replace").partition(" ")
+        if not length.isdigit():
+            self.close()
+            raise WorkerError("Unexpected response from Perl worker: %s" % header)
+        payload = self._read_exact(int(length), deadline, timeout)
+
+        if status == "ok":
+            return PerlResult(0, payload, b"")
+        elif status == "error":
+            return PerlResult(1, b"", payload)
+        self.close()
+        raise WorkerError("Unexpected response from Perl worker: %s" % status)
+
+
+    def _read_until(self, delimiter, deadline, timeout):
+        while True:
+            idx = self.buffer.find(delimiter)
+            if idx >= 0:
+                data = self.buffer[:idx]
+                self.buffer = self.buffer[idx+1:]
+                return data
+            self._fill(deadline, timeout)
+
+
+    def _read_exact(self, length, deadline, timeout):
+        while len(self.buffer) < length:
+            self._fill(deadline, timeout)
+        data = self.buffer[:length]
+        self.buffer = self.buffer[length:]
+        return data
+
+
+    def _fill(self, deadline, timeout):
+        remaining = deadline - time.monotonic()
+        if remaining > 0:
+            readable, _, _ = select.select([self.stdout_fd], [], [], remaining)
+        else:
+            readable = []
+        if not readable:
+            # The miniscript may never complete. Discard the worker
+            self.close()
+            raise subprocess.TimeoutExpired(["perl", RUNNER_PATH], timeout)
+
+        data = os.read(self.stdout_fd, 65536)
+        if not data:
+            self.close()
+            raise WorkerError("Perl worker exited unexpectedly")
+        self.buffer += data
+
+
+    def is_alive(self):
+        return self.proc.poll() is None
+
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdin.close()
+        self.proc.stdout.close()
+
+
+class PerlWorkerPool:
+    """
+    Pool of idle Perl workers.
+
+    Workers are reused across files and compiler instances. A worker is
+    started whenever none are idle, so concurrent threads do not wait for
+    each other.
+    """
+    def __init__(self, max_idle=4):
+        self.max_idle = max_idle
+        self.idle = []
+        self.lock = threading.Lock()
+
+        # Process that owns the workers
+        self.pid = os.getpid()
+
+        #: Number of worker processes that were started
+        self.spawned = 0
+
+
+    def run(self, miniscript, timeout):
+        worker = self._acquire()
+        result = worker.run(miniscript, timeout)
+        self._release(worker)
+        return result
+
+
+    def _acquire(self):
+        if self.pid != os.getpid():
+            # This is a forked child process. The idle workers' pipes belong
+            # to the parent, so they cannot be used.
+            self.pid = os.getpid()
+            self.idle = []
+            self.lock = threading.Lock()
+
+        context = _get_process_context()
+        with self.lock:
+            while self.idle:
+                worker = self.idle.pop()
+                if worker.context == context and worker.is_alive():
+                    return worker
+                worker.close()
+            self.spawned += 1
+        return PerlWorker()
+
+
+    def _release(self, worker):
+        with self.lock:
+            if len(self.idle) < self.max_idle:
+                self.idle.append(worker)
+                return
+        worker.close()
+
+
+    def shutdown(self):
+        """
+        Stop all idle workers
+        """
+        if self.pid != os.getpid():
+            # Workers belong to the parent process
+            return
+        with self.lock:
+            idle = self.idle
+            self.idle = []
+        for worker in idle:
+            worker.close()
+
+
+def _get_process_context():
+    return (dict(os.environ), os.getcwd())
+
+#-------------------------------------------------------------------------------
+# Pipes cannot be polled with select() on Windows. Always use standalone
+# processes there.
+if os.name == "posix":
+    _pool = PerlWorkerPool()
+    atexit.register(_pool.shutdown)
+else:
+    _pool = None
+
+def get_pool():
+    """
+    Returns the process-wide :class:`PerlWorkerPool`, or None if workers are
+    not supported on this platform
+    """
+    return _pool
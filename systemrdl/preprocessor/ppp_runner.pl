@@ -26,25 +26,22 @@ sub emit_text {
 #===============================================================================
 package main;
 
-# Collect preprocess miniscript from stdin
-my $miniscript;
-while(<>) {
-    $miniscript .= $_;
-}
-
 # Run miniscript in restricted context
-my $compartment = new Safe;
-$compartment->permit(':load', ':base_math', ':browse');
-$compartment->share_from('main', [
-    '%ENV',
-    'rdlppp_utils::emit_ref',
-    'rdlppp_utils::emit_text'
-]);
-$compartment->reval($miniscript);
-
-if($@) {
-    print STDERR $@;
-    exit 1;
+# Returns the error message, if any
+sub run_miniscript {
+    my ($miniscript) = @_;
+    @emit_list = ();
+
+    my $compartment = new Safe;
+    $compartment->permit(':load', ':base_math', ':browse');
+    $compartment->share_from('main', [
+        '%ENV',
+        'rdlppp_utils::emit_ref',
+        'rdlppp_utils::emit_text'
+    ]);
+    $compartment->reval($miniscript);
+
+    return $@;
 }
 
 
@@ -69,19 +66,97 @@ sub escape_string {
     return $arg;
 }
 
-my @json_array_entries;
-foreach my $entry (@emit_list) {
-    my $entry_json;
-    
-    $entry_json .= '{';
-    $entry_json .= '"type":"'.$entry->{type}.'",';
-    $entry_json .= '"ref":'.$entry->{ref};
-    
-    if($entry->{type} eq "text") {
-        $entry_json .= ',"text":"' . escape_string($entry->{text}) . '"';
+sub get_emit_list_json {
+    my @json_array_entries;
+    foreach my $entry (@emit_list) {
+        my $entry_json;
+
+        $entry_json .= '{';
+        $entry_json .= '"type":"'.$entry->{type}.'",';
+        $entry_json .= '"ref":'.$entry->{ref};
+
+        if($entry->{type} eq "text") {
+            $entry_json .= ',"text":"' . escape_string($entry->{text}) . '"';
+        }
+        $entry_json .= "}";
+        push @json_array_entries, $entry_json;
     }
-    $entry_json .= "}";
-    push @json_array_entries, $entry_json;
+
+    return "[" . join(",\n", @json_array_entries) . "]\n";
+}
+
+#===============================================================================
+# Server mode
+#
+# Runs miniscripts repeatedly. Each request is:
+#   <length in bytes>\n<miniscript>
+# Each response is one of:
+#   ok <length in bytes>\n<miniscript output><emit list JSON>
+#   error <length in bytes>\n<miniscript error output><error message>
+# These are the same as what a one-shot run writes to stdout or stderr.
+#===============================================================================
+sub serve {
+    binmode(STDIN);
+
+    # Keep the protocol on a separate handle so that the miniscripts' own
+    # output cannot corrupt it
+    open(my $out, ">&", \*STDOUT) or die "Cannot dup STDOUT: $!";
+    binmode($out);
+    $out->autoflush(1);
+
+    while(defined(my $header = <STDIN>)) {
+        chomp $header;
+        my $length = int($header);
+        my $miniscript = '';
+        while(length($miniscript) < $length) {
+            my $n = read(STDIN, $miniscript, $length - length($miniscript), length($miniscript));
+            last if(!$n);
+        }
+
+        # Capture anything the miniscript prints
+        my $stdout_text = '';
+        my $stderr_text = '';
+        my $err;
+        {
+            # Changes the miniscript makes to the environment must not be
+            # visible to later ones
+            local %ENV = %ENV;
+            local *STDOUT;
+            local *STDERR;
+            open(STDOUT, '>', \$stdout_text);
+            open(STDERR, '>', \$stderr_text);
+            $err = run_miniscript($miniscript);
+        }
+
+        my ($status, $payload);
+        if($err) {
+            $status = "error";
+            $payload = $stderr_text . $err;
+        } else {
+            $status = "ok";
+            $payload = $stdout_text . get_emit_list_json();
+        }
+        utf8::encode($payload) if(utf8::is_utf8($payload));
+        print $out $status . " " . length($payload) . "\n" . $payload;
+    }
+}
+
+#===============================================================================
+if(@ARGV && $ARGV[0] eq "--server") {
+    serve();
+    exit 0;
+}
+
+# Collect preprocess miniscript from stdin
+my $miniscript;
+while(<>) {
+    $miniscript .= $_;
+}
+
+my $err = run_miniscript($miniscript);
+if($err) {
+    print STDERR $err;
+    exit 1;
 }
 
-print("[" . join(",\n", @json_array_entries) . "]\n");
+print(get_emit_list_json());
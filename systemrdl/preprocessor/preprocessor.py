@@ -1,15 +1,78 @@
 
 import re
 import os
-import subprocess
 import json
 import shutil
 
 from antlr4 import InputStream
 
 from . import segment_map
+from . import perl_worker
 from .. import messages
+from ..stats import record_phase
 
+class PreprocessorCache:
+    """
+    Cache of source file contents, and the results of scanning them for
+    preprocessor directives.
+    
+    Files are identified by their resolved path. A file is read and scanned
+    again if its modification time or size changed.
+    
+    Only the contents of each file are cached. Include paths are resolved and
+    each include site's IncludeRef lineage is built whenever a file is
+    preprocessed.
+    """
+    def __init__(self):
+        #: Number of files that were reused from the cache
+        self.hits = 0
+        
+        #: Number of files that had to be read
+        self.misses = 0
+        
+        # real path : _CachedFile
+        self._entries = {}
+    
+    def get(self, path):
+        """
+        Returns the cached contents of the file at path
+        """
+        real_path = os.path.realpath(path)
+        st = os.stat(real_path)
+        stat_key = (st.st_mtime_ns, st.st_size)
+        
+        entry = self._entries.get(real_path, None)
+        if entry is not None and entry.stat_key == stat_key:
+            self.hits += 1
+            return entry
+        
+        self.misses += 1
+        with open(path, 'r', newline='', encoding='utf_8') as f:
+            text = f.read()
+        entry = _CachedFile(stat_key, text)
+        self._entries[real_path] = entry
+        return entry
+    
+    def clear(self):
+        """
+        Discard all cached files
+        """
+        self._entries = {}
+
+
+class _CachedFile:
+    def __init__(self, stat_key, text):
+        self.stat_key = stat_key
+        self.text = text
+        
+        # Result of FilePreprocessor.tokenize()
+        self.tokens = None
+        
+        # List of (typ, start, end, incl_info) directives derived from tokens.
+        # See FilePreprocessor.get_directives()
+        self.directives = None
+
+#===============================================================================
 class FilePreprocessor:
     
     def __init__(self, env, path, search_paths, incl_ref=None):
@@ -18,8 +81,8 @@ class FilePreprocessor:
         self.search_paths = search_paths
         self.incl_ref = incl_ref
         
-        with open(path, 'r', newline='', encoding='utf_8') as f:
-            self.text = f.read()
+        self._cached = env.preprocessor_cache.get(path)
+        self.text = self._cached.text
     
     #---------------------------------------------------------------------------
     def preprocess(self):
@@ -107,6 +170,9 @@ class FilePreprocessor:
             - typ is "perl" or "incl"
             - start/end mark the first/last char offset of the token
         """
+        if self._cached.tokens is not None:
+            return self._cached.tokens
+        
         tokens = []
         token_spec = [
             ('mlc', r'/\*.*?\*/'),
@@ -118,6 +184,7 @@ class FilePreprocessor:
         for m in re.finditer(tok_regex, self.text, re.DOTALL):
             if m.lastgroup in ("incl", "perl"):
                 tokens.append((m.lastgroup, m.start(0), m.end(0)-1))
+        self._cached.tokens = tokens
         return tokens
     
     #---------------------------------------------------------------------------
@@ -131,6 +198,22 @@ class FilePreprocessor:
             - end: last char in include
             - incl_path: Resolved path to include
         """
+        end, incl_path_raw, path_start = self.scan_include(start)
+        incl_path = self.resolve_include(incl_path_raw, path_start, end)
+        return(end, incl_path)
+    
+    def scan_include(self, start):
+        """
+        Extract the include directive's raw path from text based on start
+        position of token
+        
+        Returns
+        -------
+        (end, incl_path_raw, path_start)
+            - end: last char in include
+            - incl_path_raw: Path as written in the include directive
+            - path_start: first char of the path
+        """
         # Seek back to start of line
         i = start
         while i:
@@ -169,6 +252,14 @@ class FilePreprocessor:
                 messages.SourceRef(end+1, m.end(0)-1, filename=self.path)
             )
         
+        return (end, incl_path_raw, path_start)
+    
+    def resolve_include(self, incl_path_raw, path_start, end):
+        """
+        Resolve the path of an include, relative to this include site
+        
+        Returns the resolved path
+        """
         # Resolve include path.
         if os.path.isabs(incl_path_raw):
             incl_path = incl_path_raw
@@ -198,58 +289,96 @@ class FilePreprocessor:
                 )
             incl_ref = incl_ref.parent
         
-        return(end, incl_path)
+        return incl_path
     
     #---------------------------------------------------------------------------
-    def get_perl_segments(self, tokens):
+    def get_directives(self, tokens):
         """
-        Build a list of perl preprocessor segments:
-            PPPUnalteredSegment
-            PPPPerlSegment
-            PPPMacroSegment
-        returns:
-            (pl_segments, has_perl_tags)
+        Classify the text into directives, based on the tokens.
+        
+        Returns
+        -------
+        list
+            List of tuples: (typ, start, end, incl_info)
+            
+            Where:
+            
+            - typ is "text", "perl", "macro" or "incl"
+            - start/end mark the first/last char offset of the directive
+            - incl_info is (incl_path_raw, path_start) for includes. None otherwise.
         """
-        pl_segments = []
-        has_perl_tags = False
+        if tokens is self._cached.tokens and self._cached.directives is not None:
+            return self._cached.directives
+        
+        directives = []
         pos = 0
         
         for typ, start, end in tokens:
             
             # Capture any leading text
             if start != pos:
-                pl_seg = PPPUnalteredSegment(self, pos, start-1)
-                pl_segments.append(pl_seg)
+                directives.append(("text", pos, start-1, None))
             
             if typ == "incl":
                 # Got an `include ...
                 
                 # Extract the path and actual end position
-                end, incl_path = self.parse_include(start)
-                
-                incl_ref = segment_map.IncludeRef(start, end, self.path, self.incl_ref)
-                incl_file_pp = FilePreprocessor(self.env, incl_path, self.search_paths, incl_ref)
-                incl_tokens = incl_file_pp.tokenize()
-                incl_pl_segments, incl_has_pl_tags = incl_file_pp.get_perl_segments(incl_tokens)
-                pl_segments.extend(incl_pl_segments)
-                has_perl_tags = has_perl_tags or incl_has_pl_tags
+                end, incl_path_raw, path_start = self.scan_include(start)
+                directives.append(("incl", start, end, (incl_path_raw, path_start)))
                 
             else:
                 # Got a Perl tag <% ... %>
                 if self.text[start+2] == "=":
-                    pl_seg = PPPMacroSegment(self, start, end)
+                    directives.append(("macro", start, end, None))
                 else:
-                    pl_seg = PPPPerlSegment(self, start, end)
-                pl_segments.append(pl_seg)
-                has_perl_tags = True
+                    directives.append(("perl", start, end, None))
             
             pos = end+1
         
         # Capture any trailing text
         text_len = len(self.text)
         if text_len > pos:
-            pl_seg = PPPUnalteredSegment(self, pos, text_len-1)
-            pl_segments.append(pl_seg)
+            directives.append(("text", pos, text_len-1, None))
+        
+        if tokens is self._cached.tokens:
+            self._cached.directives = directives
+        return directives
+    
+    #---------------------------------------------------------------------------
+    def get_perl_segments(self, tokens):
+        """
+        Build a list of perl preprocessor segments:
+            PPPUnalteredSegment
+            PPPPerlSegment
+            PPPMacroSegment
+        returns:
+            (pl_segments, has_perl_tags)
+        """
+        pl_segments = []
+        has_perl_tags = False
+        
+        for typ, start, end, incl_info in self.get_directives(tokens):
+            if typ == "text":
+                pl_segments.append(PPPUnalteredSegment(self, start, end))
+            
+            elif typ == "incl":
+                incl_path_raw, path_start = incl_info
+                incl_path = self.resolve_include(incl_path_raw, path_start, end)
+                
+                incl_ref = segment_map.IncludeRef(start, end, self.path, self.incl_ref)
+                incl_file_pp = FilePreprocessor(self.env, incl_path, self.search_paths, incl_ref)
+                incl_tokens = incl_file_pp.tokenize()
+                incl_pl_segments, incl_has_pl_tags = incl_file_pp.get_perl_segments(incl_tokens)
+                pl_segments.extend(incl_pl_segments)
+                has_perl_tags = has_perl_tags or incl_has_pl_tags
+            
+            elif typ == "macro":
+                pl_segments.append(PPPMacroSegment(self, start, end))
+                has_perl_tags = True
+            
+            else:
+                pl_segments.append(PPPPerlSegment(self, start, end))
+                has_perl_tags = True
         
         return (pl_segments, has_perl_tags)
 
@@ -296,12 +425,8 @@ class FilePreprocessor:
         miniscript = '\n'.join(lines)
         
         # Run miniscript
-        result = subprocess.run(
-            ["perl", os.path.join(os.path.dirname(__file__), "ppp_runner.pl")],
-            input=miniscript.encode("utf-8"),
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-            timeout=5
-        )
+        with record_phase(self.env.stats, "perl"):
+            result = perl_worker.run_miniscript(miniscript.encode("utf-8"), timeout=5)
         if result.returncode:
             self.env.msg.fatal(
                 "Encountered a Perl syntax error while executing embedded Perl preprocessor commands:\n"
@@ -1,9 +1,37 @@
+import bisect
+
 import colorama
 
 class SegmentMap:
     
     def __init__(self):
         self.segments = []
+        
+        # Sorted end offsets of all segments, used to look up segments by
+        # offset. Built on demand. See _get_end_offsets()
+        self._end_offsets = None
+    
+    def __getstate__(self):
+        # Lookup index is rebuilt on demand
+        state = self.__dict__.copy()
+        state['_end_offsets'] = None
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._end_offsets = None
+    
+    def _get_end_offsets(self):
+        """
+        Returns the end offset of each segment.
+        
+        Segments are contiguous and appended in order, so end offsets are
+        sorted. The list is rebuilt if segments were appended since it was
+        last built.
+        """
+        if (self._end_offsets is None) or (len(self._end_offsets) != len(self.segments)):
+            self._end_offsets = [segment.end for segment in self.segments]
+        return self._end_offsets
     
     def derive_source_offset(self, offset, is_end=False):
         """
@@ -20,27 +48,43 @@ class SegmentMap:
             - include_ref describes any `include lineage using a IncludeRef object
                 Is none if file was not referenced via include
         """
-        for segment in self.segments:
-            if offset <= segment.end:
-                if isinstance(segment, MacroSegment):
-                    if is_end:
-                        return (
-                            segment.src_end,
-                            segment.src,
-                            segment.incl_ref
-                        )
-                    else:
-                        return (
-                            segment.src_start,
-                            segment.src,
-                            segment.incl_ref
-                        )
+        return self._derive(self._get_end_offsets(), offset, is_end)
+    
+    def derive_source_offsets(self, offsets, is_end=False):
+        """
+        Same as :meth:`derive_source_offset`, but translates many coordinates
+        at once.
+        
+        Returns a list of (src_offset, src_path, include_ref) tuples, in the
+        same order as offsets.
+        """
+        end_offsets = self._get_end_offsets()
+        return [self._derive(end_offsets, offset, is_end) for offset in offsets]
+    
+    def _derive(self, end_offsets, offset, is_end):
+        # Find the first segment that ends at or after the offset
+        idx = bisect.bisect_left(end_offsets, offset)
+        if idx < len(end_offsets):
+            segment = self.segments[idx]
+            if isinstance(segment, MacroSegment):
+                if is_end:
+                    return (
+                        segment.src_end,
+                        segment.src,
+                        segment.incl_ref
+                    )
                 else:
                     return (
-                        segment.src_start + (offset - segment.start),
+                        segment.src_start,
                         segment.src,
                         segment.incl_ref
                     )
+            else:
+                return (
+                    segment.src_start + (offset - segment.start),
+                    segment.src,
+                    segment.incl_ref
+                )
         
         # Reached end. Assume end of last segment
         return (
@@ -0,0 +1,753 @@
+import mmap
+import enum
+import struct
+import inspect
+from collections import OrderedDict
+
+from . import component as comp
+from . import rdltypes
+from .node import RootNode
+from .compiler import Environment
+from .core.properties import UserProperty
+from .core.helpers import write_atomic
+
+#===============================================================================
+# Snapshot file format
+#
+# All integers are little-endian. Variable-length integers (varint) use 7 bits
+# per byte, least significant group first. Signed varints are zigzag encoded.
+#
+#   Header:
+#       magic           8 bytes
+#       version         u32
+#       reserved        u32
+#       root_offset     u64     Offset of the root component record
+#       strings_offset  u64     Offset of the string table
+#       types_offset    u64     Offset of the type table
+#       defs_offset     u64     Offset of the definition table
+#       udps_offset     u64     Offset of the user-defined property table
+#
+#   Component records:
+#       Written children-first, so each record can list the offsets of its
+#       children. Records are only decoded when their parent's children are
+#       accessed.
+#
+#   String table:
+#       count           u32
+#       offsets         u32 * (count + 1), relative to the start of the data
+#       data            UTF-8
+#
+#   Type, definition and user-defined property tables are small, and are
+#   decoded when the snapshot is opened.
+#===============================================================================
+MAGIC = b"RDLSNAP\x00"
+
+#: Version of the snapshot format. Incremented whenever the format changes.
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sIIQQQQQ")
+
+_COMPONENT_CLASSES = (
+    comp.Root, comp.Signal, comp.Field, comp.Reg, comp.Regfile, comp.Addrmap,
+    comp.Mem,
+)
+_COMPONENT_KINDS = {cls: i for i, cls in enumerate(_COMPONENT_CLASSES)}
+
+# Types that are referenced by name rather than being described
+_BUILTIN_TYPES = OrderedDict(
+    [(t.__name__, t) for t in (int, str, bool, rdltypes.UserEnum, rdltypes.UserStruct)]
+    + [(cls.__name__, cls) for cls in _COMPONENT_CLASSES]
+    + [
+        (name, obj) for name, obj in vars(rdltypes).items()
+        if inspect.isclass(obj) and issubclass(obj, rdltypes.AutoEnum)
+        and obj is not rdltypes.AutoEnum
+    ]
+)
+_BUILTIN_TYPE_NAMES = {t: name for name, t in _BUILTIN_TYPES.items()}
+
+# Component record flags
+_F_EXTERNAL_SET = 0x01
+_F_EXTERNAL = 0x02
+_F_ARRAY = 0x04
+_F_ALIAS = 0x08
+_F_INSTANCE = 0x10
+
+# Value tags
+_V_NONE = 0
+_V_FALSE = 1
+_V_TRUE = 2
+_V_INT = 3
+_V_STR = 4
+_V_LIST = 5
+_V_ENUM = 6
+_V_STRUCT = 7
+_V_TYPE = 8
+_V_COMP_REF = 9
+_V_PROP_REF = 10
+_V_ARRAY_TYPE = 11
+
+# Type table entry kinds
+_T_BUILTIN = 0
+_T_ENUM = 1
+_T_STRUCT = 2
+
+#===============================================================================
+def save_snapshot(root, path):
+    """
+    Save an elaborated design to a snapshot file.
+
+    Snapshots are a compact binary representation of the elaborated component
+    tree that can be loaded quickly by :func:`load_snapshot`.
+    Source references and parameter definitions are not saved.
+
+    Parameters
+    ----------
+    root: :class:`~systemrdl.node.RootNode`
+        Elaborated root node, as returned by :meth:`~systemrdl.RDLCompiler.elaborate`
+    path: str
+        Path of the snapshot file to write
+
+    Raises
+    ------
+    TypeError
+        If the design contains a property value that cannot be saved
+    """
+    if not isinstance(root, RootNode):
+        raise TypeError("Snapshot can only be saved from a RootNode")
+
+    writer = _SnapshotWriter(root.env)
+    data = writer.write(root.inst)
+
+    write_atomic(path, data)
+
+
+def load_snapshot(path, message_printer=None):
+    """
+    Load an elaborated design from a snapshot file.
+
+    The file is memory-mapped, and components are only decoded once the
+    children of their parent are first accessed. Loading is therefore fast
+    regardless of the size of the design, and only the parts of the design
+    that are queried are decoded.
+
+    Parameters
+    ----------
+    path: str
+        Path of a snapshot file written by :func:`save_snapshot`
+    message_printer: :class:`~systemrdl.messages.MessagePrinter`
+        Override the default message printer
+
+    Raises
+    ------
+    ValueError
+        If the file is not a snapshot, or was written using an unsupported
+        format version
+
+    Returns
+    -------
+    :class:`~systemrdl.node.RootNode`
+        Elaborated root meta-component's Node object.
+    """
+    args = {}
+    if message_printer is not None:
+        args['message_printer'] = message_printer
+    env = Environment(args)
+
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    reader = _SnapshotReader(env, data)
+    root_inst = reader.load()
+
+    # Loaded design is final
+    env.derived_cache_token = object()
+
+    return RootNode(root_inst, env, None)
+
+#===============================================================================
+def _write_uint(buf, n):
+    while n >= 0x80:
+        buf.append((n & 0x7F) | 0x80)
+        n >>= 7
+    buf.append(n)
+
+
+def _write_int(buf, n):
+    if n >= 0:
+        _write_uint(buf, n << 1)
+    else:
+        _write_uint(buf, ((-n) << 1) - 1)
+
+
+class _SnapshotWriter:
+    def __init__(self, env):
+        self.env = env
+        self.buf = bytearray(_HEADER.size)
+
+        # str : index
+        self.strings = {}
+
+        # id(type) : index
+        self.type_ids = {}
+        self.type_entries = []
+
+        # id(definition) : index
+        self.def_ids = {}
+        self.def_entries = []
+
+        # id(component) : offset of its record
+        self.comp_offsets = {}
+
+        # Keeps objects alive while their ids are in use
+        self.keepalive = []
+
+
+    def write(self, root_inst):
+        root_offset = self.write_component(root_inst)
+
+        udps = bytearray()
+        user_properties = self.env.property_rules.user_properties
+        _write_uint(udps, len(user_properties))
+        for udp in user_properties.values():
+            _write_uint(udps, self.get_string_id(udp.name))
+            _write_uint(udps, len(udp.bindable_to))
+            for comp_type in udp.bindable_to:
+                udps.append(_COMPONENT_KINDS[comp_type])
+            self.write_value(udps, list(udp.valid_types))
+            self.write_value(udps, udp.default)
+            udps.append(int(bool(udp.constr_componentwidth)))
+
+        defs = bytearray()
+        _write_uint(defs, len(self.def_entries))
+        for entry in self.def_entries:
+            defs.extend(entry)
+
+        types = bytearray()
+        _write_uint(types, len(self.type_entries))
+        for entry in self.type_entries:
+            types.extend(entry)
+
+        # String table is last since all other sections contribute strings
+        strings = sorted(self.strings.items(), key=lambda item: item[1])
+        encoded = [s.encode('utf-8') for s, _ in strings]
+        string_table = bytearray(struct.pack("<I", len(encoded)))
+        offset = 0
+        offsets = [0]
+        for s in encoded:
+            offset += len(s)
+            offsets.append(offset)
+        string_table.extend(struct.pack("<%dI" % len(offsets), *offsets))
+        for s in encoded:
+            string_table.extend(s)
+
+        buf = self.buf
+        udps_offset = len(buf)
+        buf.extend(udps)
+        defs_offset = len(buf)
+        buf.extend(defs)
+        types_offset = len(buf)
+        buf.extend(types)
+        strings_offset = len(buf)
+        buf.extend(string_table)
+
+        _HEADER.pack_into(
+            buf, 0, MAGIC, FORMAT_VERSION, 0,
+            root_offset, strings_offset, types_offset, defs_offset, udps_offset
+        )
+        return bytes(buf)
+
+    #---------------------------------------------------------------------------
+    def get_string_id(self, s):
+        idx = self.strings.get(s, None)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings[s] = idx
+        return idx
+
+
+    def get_optional_string_id(self, s):
+        if s is None:
+            return 0
+        return self.get_string_id(s) + 1
+
+
+    def get_def_id(self, comp_def):
+        if comp_def is None:
+            return 0
+        idx = self.def_ids.get(id(comp_def), None)
+        if idx is None:
+            entry = bytearray()
+            entry.append(_COMPONENT_KINDS[type(comp_def)])
+            _write_uint(entry, self.get_optional_string_id(comp_def.type_name))
+            idx = len(self.def_entries)
+            self.def_entries.append(entry)
+            self.def_ids[id(comp_def)] = idx
+            self.keepalive.append(comp_def)
+        return idx + 1
+
+
+    def get_type_id(self, t):
+        idx = self.type_ids.get(id(t), None)
+        if idx is not None:
+            return idx
+
+        # Entries only refer to types that precede them
+        entry = bytearray()
+        if t in _BUILTIN_TYPE_NAMES:
+            entry.append(_T_BUILTIN)
+            _write_uint(entry, self.get_string_id(_BUILTIN_TYPE_NAMES[t]))
+        elif rdltypes.is_user_enum(t):
+            entry.append(_T_ENUM)
+            _write_uint(entry, self.get_string_id(t.__name__))
+            members = list(t)
+            _write_uint(entry, len(members))
+            for member in members:
+                _write_uint(entry, self.get_string_id(member.name))
+                _write_int(entry, member.value)
+                self.write_value(entry, member.rdl_name)
+                self.write_value(entry, member.rdl_desc)
+        elif rdltypes.is_user_struct(t):
+            base = t.__bases__[0]
+            base_id = self.get_type_id(base)
+            members = [
+                (k, v) for k, v in t._members.items()
+                if k not in base._members
+            ]
+            entry.append(_T_STRUCT)
+            _write_uint(entry, self.get_string_id(t.__name__))
+            _write_uint(entry, base_id)
+            entry.append(int(bool(t._is_abstract)))
+            _write_uint(entry, len(members))
+            for name, member_type in members:
+                _write_uint(entry, self.get_string_id(name))
+                self.write_value(entry, member_type)
+        else:
+            raise TypeError("Cannot save type '%s' in a snapshot" % t.__qualname__)
+
+        idx = len(self.type_entries)
+        self.type_entries.append(entry)
+        self.type_ids[id(t)] = idx
+        self.keepalive.append(t)
+        return idx
+
+    #---------------------------------------------------------------------------
+    def write_value(self, buf, value):
+        if value is None:
+            buf.append(_V_NONE)
+        elif value is True:
+            buf.append(_V_TRUE)
+        elif value is False:
+            buf.append(_V_FALSE)
+        elif isinstance(value, enum.Enum):
+            buf.append(_V_ENUM)
+            _write_uint(buf, self.get_type_id(type(value)))
+            _write_uint(buf, self.get_string_id(value.name))
+        elif isinstance(value, int):
+            buf.append(_V_INT)
+            _write_int(buf, value)
+        elif isinstance(value, str):
+            buf.append(_V_STR)
+            _write_uint(buf, self.get_string_id(value))
+        elif isinstance(value, (list, tuple)):
+            buf.append(_V_LIST)
+            _write_uint(buf, len(value))
+            for v in value:
+                self.write_value(buf, v)
+        elif inspect.isclass(value):
+            buf.append(_V_TYPE)
+            _write_uint(buf, self.get_type_id(value))
+        elif isinstance(value, rdltypes.UserStruct):
+            buf.append(_V_STRUCT)
+            _write_uint(buf, self.get_type_id(type(value)))
+            _write_uint(buf, len(value._values))
+            for k, v in value._values.items():
+                _write_uint(buf, self.get_string_id(k))
+                self.write_value(buf, v)
+        elif isinstance(value, rdltypes.ComponentRef):
+            buf.append(_V_COMP_REF)
+            self.write_comp_ref(buf, value)
+        elif isinstance(value, rdltypes.PropertyReference):
+            buf.append(_V_PROP_REF)
+            _write_uint(buf, self.get_string_id(value.get_name()))
+            self.write_comp_ref(buf, value._comp_ref)
+        elif isinstance(value, rdltypes.ArrayPlaceholder):
+            buf.append(_V_ARRAY_TYPE)
+            self.write_value(buf, value.element_type)
+        else:
+            raise TypeError(
+                "Cannot save value of type '%s' in a snapshot" % type(value).__qualname__
+            )
+
+
+    def write_comp_ref(self, buf, comp_ref):
+        _write_uint(buf, self.get_def_id(comp_ref.ref_root))
+        _write_uint(buf, len(comp_ref.ref_elements))
+        for name, idx_list, _ in comp_ref.ref_elements:
+            _write_uint(buf, self.get_string_id(name))
+            self.write_value(buf, idx_list)
+
+    #---------------------------------------------------------------------------
+    def write_component(self, inst, siblings=()):
+        offset = self.comp_offsets.get(id(inst), None)
+        if offset is not None:
+            # Already written. Shared by multiple parents
+            return offset
+
+        # Children are written first so that their offsets are known
+        child_offsets = [
+            self.write_component(child, inst.children) for child in inst.children
+        ]
+
+        rec = bytearray()
+        flags = 0
+        if inst.external is not None:
+            flags |= _F_EXTERNAL_SET
+            if inst.external:
+                flags |= _F_EXTERNAL
+        if inst.is_instance:
+            flags |= _F_INSTANCE
+        if isinstance(inst, comp.AddressableComponent) and inst.is_array:
+            flags |= _F_ARRAY
+        if isinstance(inst, comp.Reg) and inst.is_alias:
+            flags |= _F_ALIAS
+        rec.append(_COMPONENT_KINDS[type(inst)])
+        rec.append(flags)
+        _write_uint(rec, self.get_optional_string_id(inst.type_name))
+        _write_uint(rec, self.get_optional_string_id(inst.inst_name))
+        _write_uint(rec, self.get_def_id(inst.original_def))
+
+        if isinstance(inst, comp.AddressableComponent):
+            self.write_value(rec, inst.addr_offset)
+            self.write_value(rec, inst.addr_align)
+            if inst.is_array:
+                self.write_value(rec, inst.array_dimensions)
+                self.write_value(rec, inst.array_stride)
+        elif isinstance(inst, comp.VectorComponent):
+            for v in (inst.width, inst.msb, inst.lsb, inst.high, inst.low):
+                self.write_value(rec, v)
+
+        if flags & _F_ALIAS:
+            # Primary is a sibling. Refer to it by its position
+            for i, sibling in enumerate(siblings):
+                if sibling is inst.alias_primary_inst:
+                    _write_uint(rec, i)
+                    break
+            else:
+                raise RuntimeError("Alias primary register is not a sibling")
+
+        _write_uint(rec, len(inst.properties))
+        for k, v in inst.properties.items():
+            _write_uint(rec, self.get_string_id(k))
+            self.write_value(rec, v)
+
+        _write_uint(rec, len(child_offsets))
+        for child_offset in child_offsets:
+            _write_uint(rec, child_offset)
+
+        offset = len(self.buf)
+        self.buf.extend(rec)
+        self.comp_offsets[id(inst)] = offset
+        self.keepalive.append(inst)
+        return offset
+
+#===============================================================================
+class _SnapshotReader:
+    def __init__(self, env, data):
+        self.env = env
+        self.data = data
+
+        # offset : component
+        self.components = {}
+
+        (magic, version, _, self.root_offset, strings_offset, types_offset,
+            defs_offset, udps_offset) = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError("File is not a SystemRDL snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                "Unsupported snapshot format version %d. Expected %d"
+                % (version, FORMAT_VERSION)
+            )
+
+        # Strings are decoded on demand
+        n_strings, = struct.unpack_from("<I", data, strings_offset)
+        self.string_offsets_pos = strings_offset + 4
+        self.string_data_pos = self.string_offsets_pos + 4 * (n_strings + 1)
+        self.strings = [None] * n_strings
+
+        self.types = []
+        pos = types_offset
+        n_types, pos = self.read_uint(pos)
+        for _ in range(n_types):
+            pos = self.read_type(pos)
+
+        self.defs = []
+        pos = defs_offset
+        n_defs, pos = self.read_uint(pos)
+        for _ in range(n_defs):
+            cls = _COMPONENT_CLASSES[data[pos]]
+            type_name, pos = self.read_optional_string(pos + 1)
+            comp_def = cls()
+            comp_def.type_name = type_name
+            self.defs.append(comp_def)
+
+        pos = udps_offset
+        n_udps, pos = self.read_uint(pos)
+        for _ in range(n_udps):
+            name, pos = self.read_string(pos)
+            n_bindable, pos = self.read_uint(pos)
+            bindable_to = [_COMPONENT_CLASSES[data[pos + i]] for i in range(n_bindable)]
+            pos += n_bindable
+            valid_types, pos = self.read_value(pos)
+            default, pos = self.read_value(pos)
+            constr_componentwidth = bool(data[pos])
+            pos += 1
+            env.property_rules.user_properties[name] = UserProperty(
+                env, name, bindable_to, valid_types, default, constr_componentwidth
+            )
+
+
+    def load(self):
+        return self.read_component(self.root_offset)
+
+    #---------------------------------------------------------------------------
+    def read_uint(self, pos):
+        data = self.data
+        result = 0
+        shift = 0
+        while True:
+            b = data[pos]
+            pos += 1
+            result |= (b & 0x7F) << shift
+            if b < 0x80:
+                return result, pos
+            shift += 7
+
+
+    def read_int(self, pos):
+        n, pos = self.read_uint(pos)
+        if n & 1:
+            return -((n + 1) >> 1), pos
+        return n >> 1, pos
+
+
+    def get_string(self, idx):
+        s = self.strings[idx]
+        if s is None:
+            start, end = struct.unpack_from("<II", self.data, self.string_offsets_pos + 4 * idx)
+            s = self.data[self.string_data_pos + start:self.string_data_pos + end].decode('utf-8')
+            self.strings[idx] = s
+        return s
+
+
+    def read_string(self, pos):
+        idx, pos = self.read_uint(pos)
+        return self.get_string(idx), pos
+
+
+    def read_optional_string(self, pos):
+        idx, pos = self.read_uint(pos)
+        if idx == 0:
+            return None, pos
+        return self.get_string(idx - 1), pos
+
+
+    def read_def(self, pos):
+        idx, pos = self.read_uint(pos)
+        if idx == 0:
+            return None, pos
+        return self.defs[idx - 1], pos
+
+
+    def read_type(self, pos):
+        kind = self.data[pos]
+        pos += 1
+        if kind == _T_BUILTIN:
+            name, pos = self.read_string(pos)
+            t = _BUILTIN_TYPES[name]
+        elif kind == _T_ENUM:
+            name, pos = self.read_string(pos)
+            n_members, pos = self.read_uint(pos)
+            entries = []
+            for _ in range(n_members):
+                member_name, pos = self.read_string(pos)
+                value, pos = self.read_int(pos)
+                rdl_name, pos = self.read_value(pos)
+                rdl_desc, pos = self.read_value(pos)
+                entries.append((member_name, (value, rdl_name, rdl_desc)))
+            # Functional API of the enum metaclass, whose signature pylint
+            # does not infer
+            t = rdltypes.UserEnum(name, OrderedDict(entries)) # pylint: disable=no-value-for-parameter,too-many-function-args
+        elif kind == _T_STRUCT:
+            name, pos = self.read_string(pos)
+            base_id, pos = self.read_uint(pos)
+            is_abstract = bool(self.data[pos])
+            pos += 1
+            n_members, pos = self.read_uint(pos)
+            members = OrderedDict()
+            for _ in range(n_members):
+                member_name, pos = self.read_string(pos)
+                members[member_name], pos = self.read_value(pos)
+            t = self.types[base_id].define_new(name, members, is_abstract)
+        else:
+            raise ValueError("Snapshot contains an unknown type entry")
+        self.types.append(t)
+        return pos
+
+
+    def read_value(self, pos):
+        tag = self.data[pos]
+        pos += 1
+        if tag == _V_NONE:
+            return None, pos
+        elif tag == _V_FALSE:
+            return False, pos
+        elif tag == _V_TRUE:
+            return True, pos
+        elif tag == _V_INT:
+            return self.read_int(pos)
+        elif tag == _V_STR:
+            return self.read_string(pos)
+        elif tag == _V_LIST:
+            n, pos = self.read_uint(pos)
+            values = []
+            for _ in range(n):
+                v, pos = self.read_value(pos)
+                values.append(v)
+            return values, pos
+        elif tag == _V_ENUM:
+            type_id, pos = self.read_uint(pos)
+            member_name, pos = self.read_string(pos)
+            return self.types[type_id][member_name], pos
+        elif tag == _V_TYPE:
+            type_id, pos = self.read_uint(pos)
+            return self.types[type_id], pos
+        elif tag == _V_STRUCT:
+            type_id, pos = self.read_uint(pos)
+            n, pos = self.read_uint(pos)
+            values = OrderedDict()
+            for _ in range(n):
+                k, pos = self.read_string(pos)
+                values[k], pos = self.read_value(pos)
+            struct_type = self.types[type_id]
+            return struct_type(values), pos
+        elif tag == _V_COMP_REF:
+            return self.read_comp_ref(pos)
+        elif tag == _V_PROP_REF:
+            prop_name, pos = self.read_string(pos)
+            comp_ref, pos = self.read_comp_ref(pos)
+            prop_ref_cls = self.env.property_rules.lookup_prop_ref_type(prop_name)
+            return prop_ref_cls(None, self.env, comp_ref), pos
+        elif tag == _V_ARRAY_TYPE:
+            element_type, pos = self.read_value(pos)
+            return rdltypes.ArrayPlaceholder(element_type), pos
+        else:
+            raise ValueError("Snapshot contains an unknown value type")
+
+
+    def read_comp_ref(self, pos):
+        ref_root, pos = self.read_def(pos)
+        n, pos = self.read_uint(pos)
+        ref_elements = []
+        for _ in range(n):
+            name, pos = self.read_string(pos)
+            idx_list, pos = self.read_value(pos)
+            ref_elements.append((name, idx_list, None))
+        return rdltypes.ComponentRef(ref_root, ref_elements), pos
+
+    #---------------------------------------------------------------------------
+    def read_component(self, offset):
+        inst = self.components.get(offset, None)
+        if inst is not None:
+            # Shared by multiple parents
+            return inst
+
+        data = self.data
+        cls = _COMPONENT_CLASSES[data[offset]]
+        flags = data[offset + 1]
+        pos = offset + 2
+
+        inst = cls()
+        inst.type_name, pos = self.read_optional_string(pos)
+        inst.inst_name, pos = self.read_optional_string(pos)
+        inst.original_def, pos = self.read_def(pos)
+        inst.is_instance = bool(flags & _F_INSTANCE)
+        if flags & _F_EXTERNAL_SET:
+            inst.external = bool(flags & _F_EXTERNAL)
+
+        if isinstance(inst, comp.AddressableComponent):
+            inst.addr_offset, pos = self.read_value(pos)
+            inst.addr_align, pos = self.read_value(pos)
+            if flags & _F_ARRAY:
+                inst.is_array = True
+                inst.array_dimensions, pos = self.read_value(pos)
+                inst.array_stride, pos = self.read_value(pos)
+        elif isinstance(inst, comp.VectorComponent):
+            inst.width, pos = self.read_value(pos)
+            inst.msb, pos = self.read_value(pos)
+            inst.lsb, pos = self.read_value(pos)
+            inst.high, pos = self.read_value(pos)
+            inst.low, pos = self.read_value(pos)
+
+        if flags & _F_ALIAS:
+            inst.is_alias = True
+            # Resolved to the sibling once the parent's children are loaded
+            inst.alias_primary_inst, pos = self.read_uint(pos)
+
+        n_props, pos = self.read_uint(pos)
+        properties = {}
+        for _ in range(n_props):
+            k, pos = self.read_string(pos)
+            properties[k], pos = self.read_value(pos)
+        inst.properties = properties
+
+        n_children, _ = self.read_uint(pos)
+        if n_children:
+            inst.children = _LazyChildren(self, inst, pos)
+
+        self.components[offset] = inst
+        return inst
+
+
+    def read_children(self, pos):
+        n_children, pos = self.read_uint(pos)
+        children = []
+        for _ in range(n_children):
+            child_offset, pos = self.read_uint(pos)
+            children.append(self.read_component(child_offset))
+
+        for child in children:
+            if isinstance(child, comp.Reg) and child.is_alias and isinstance(child.alias_primary_inst, int):
+                child.alias_primary_inst = children[child.alias_primary_inst]
+        return children
+
+
+class _LazyChildren:
+    """
+    Placeholder for a component's children that have not been loaded yet.
+    On first use, the children are loaded and replace this placeholder.
+    """
+    __slots__ = ["reader", "owner", "pos"]
+
+    def __init__(self, reader, owner, pos):
+        self.reader = reader
+        self.owner = owner
+        self.pos = pos
+
+    def _load(self):
+        owner = self.owner
+        if owner.children is self:
+            owner.children = self.reader.read_children(self.pos)
+        return owner.children
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def __getitem__(self, key):
+        return self._load()[key]
+
+    def __bool__(self):
+        return bool(self._load())
@@ -0,0 +1,247 @@
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from . import walker
+
+class PhaseStats:
+    """
+    Statistics recorded for one compiler phase.
+
+    If a phase occurs more than once, its statistics are accumulated.
+    """
+    def __init__(self, name):
+        #: Name of the phase
+        self.name = name
+
+        #: Number of times the phase occurred
+        self.calls = 0
+
+        #: Total wall time spent in the phase, in seconds.
+        #: Includes the time spent in any nested phases.
+        self.wall_time = 0.0
+
+        #: Highest amount of memory allocated during the phase, in bytes,
+        #: relative to the start of the phase.
+        #: None if memory was not traced.
+        self.peak_memory = None
+
+        #: Event counts that occurred during the phase, including those of any
+        #: nested phases. Maps the counter name to its count.
+        self.counters = OrderedDict()
+
+    def to_dict(self):
+        """
+        Returns the statistics as a dictionary of builtin types
+        """
+        d = OrderedDict()
+        d["name"] = self.name
+        d["calls"] = self.calls
+        d["wall_time"] = self.wall_time
+        d["peak_memory"] = self.peak_memory
+        d["counters"] = OrderedDict(self.counters)
+        return d
+
+
+class CompilerStats:
+    """
+    Records statistics about each phase of compilation and elaboration.
+
+    Pass an instance to :class:`~systemrdl.RDLCompiler` using the ``stats``
+    argument, and query it once compilation or elaboration completes.
+
+    The following phases are recorded:
+
+    ``preprocess``
+        Preprocessing of a file and its includes
+    ``perl``
+        Execution of the Perl preprocessor. Nested within ``preprocess``.
+    ``parse``
+        Lexing and parsing of the preprocessed text
+    ``visit``
+        Compilation of the parse tree into the root namespace
+    ``elaborate``
+        The entire :meth:`~systemrdl.RDLCompiler.elaborate` call
+    ``elaborate.expressions``, ``elaborate.placement``, ``elaborate.validate``
+        Each walker pass of elaboration. Nested within ``elaborate``.
+
+    The following counters are recorded:
+
+    ``nodes``
+        Number of nodes visited by an elaboration walker pass
+    ``deepcopies``
+        Number of component definitions that were deep-copied in order to
+        be instantiated with parameter overrides. Instantiations with the same
+        constant parameter values share one copy, but each is still elaborated
+        individually.
+    ``expr_evals``
+        Number of top-level expressions that were evaluated. This includes
+        parameter values, instance array and address allocators, vector
+        dimensions and property assignments.
+
+    Files that are preprocessed and parsed in worker processes by
+    :meth:`~systemrdl.RDLCompiler.compile_files` do not record the
+    ``preprocess``, ``perl`` and ``parse`` phases.
+    Likewise, top-level components that are elaborated in worker processes
+    by :meth:`~systemrdl.RDLCompiler.elaborate_all` do not record the nested
+    ``elaborate.*`` phases or any counters.
+
+    To implement custom tracing, subclass this and extend
+    :meth:`phase_started` and :meth:`phase_finished`.
+
+    Parameters
+    ----------
+    trace_memory: bool
+        If True, the peak memory of each phase is measured using
+        :mod:`tracemalloc`. Tracing is started if it is not already active,
+        and significantly slows down compilation.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+
+        #: Maps phase names to their :class:`PhaseStats`, in the order each
+        #: phase first occurred
+        self.phases = OrderedDict()
+
+        #: Counts of all events. Maps the counter name to its count.
+        self.counters = OrderedDict()
+
+        # Stack of (PhaseStats, start time, start memory) of active phases
+        self._active = []
+
+        # Set if this object started tracemalloc itself
+        self._started_tracing = False
+
+    def phase(self, name):
+        """
+        Returns a context manager that records the enclosed code as the
+        named phase.
+        """
+        return _PhaseContext(self, name)
+
+    def count(self, name, n=1):
+        """
+        Increment the named counter of each active phase by n
+        """
+        self.counters[name] = self.counters.get(name, 0) + n
+        for phase, _, _ in self._active:
+            phase.counters[name] = phase.counters.get(name, 0) + n
+
+    def get_phase(self, name):
+        """
+        Returns the :class:`PhaseStats` of the named phase, or None if it
+        never occurred
+        """
+        return self.phases.get(name, None)
+
+    def to_dict(self):
+        """
+        Returns all statistics as a dictionary of builtin types, which can be
+        serialized as JSON.
+        """
+        d = OrderedDict()
+        d["phases"] = [phase.to_dict() for phase in self.phases.values()]
+        d["counters"] = OrderedDict(self.counters)
+        return d
+
+    def phase_started(self, name):
+        """
+        Called when a phase begins
+        """
+
+    def phase_finished(self, name, phase):
+        """
+        Called when a phase ends, with its updated :class:`PhaseStats`
+        """
+
+    #---------------------------------------------------------------------------
+    def _start_phase(self, name):
+        phase = self.phases.get(name, None)
+        if phase is None:
+            phase = PhaseStats(name)
+            self.phases[name] = phase
+        phase.calls += 1
+
+        start_mem = None
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            self._update_peaks()
+            start_mem = tracemalloc.get_traced_memory()[0]
+            if phase.peak_memory is None:
+                phase.peak_memory = 0
+
+        self.phase_started(name)
+        self._active.append((phase, time.perf_counter(), start_mem))
+
+    def _finish_phase(self):
+        end = time.perf_counter()
+        phase, start, _ = self._active[-1]
+        phase.wall_time += end - start
+        if self.trace_memory:
+            self._update_peaks()
+        self._active.pop()
+
+        if self._started_tracing and not self._active:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+        self.phase_finished(phase.name, phase)
+
+    def _update_peaks(self):
+        """
+        Fold the peak memory since the last update into all active phases,
+        then restart peak measurement so nested phases can be measured
+        """
+        _, peak = tracemalloc.get_traced_memory()
+        for phase, _, start_mem in self._active:
+            phase.peak_memory = max(phase.peak_memory, peak - start_mem)
+        # Python < 3.9 cannot reset the peak. It then includes anything
+        # allocated since tracing started
+        if hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+
+
+class _PhaseContext:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.stats._start_phase(self.name)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stats._finish_phase()
+        return False
+
+#-------------------------------------------------------------------------------
+class _NullPhaseContext:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_PHASE = _NullPhaseContext()
+
+def record_phase(stats, name):
+    """
+    Returns a context manager that records the named phase if stats are
+    being collected
+    """
+    if stats is None:
+        return _NULL_PHASE
+    return stats.phase(name)
+
+
+class NodeCountListener(walker.RDLListener):
+    """
+    Counts the component nodes visited by a walker pass
+    """
+    def __init__(self, stats):
+        self.stats = stats
+
+    def enter_Component(self, node):
+        self.stats.count("nodes")
@@ -1,8 +1,25 @@
 
+import enum
+import functools
+
 from .node import AddressableNode, VectorNode, FieldNode, RegNode, RegfileNode
 from .node import AddrmapNode, MemNode, SignalNode
 from .node import RootNode
 
+#===============================================================================
+class WalkerAction(enum.Enum):
+    """
+    Listener ``enter_*()`` callbacks may return one of these values in order to
+    control how the walker proceeds.
+    Returning ``None`` is equivalent to :attr:`Continue`.
+    """
+    #: Continue traversing into the node's children
+    Continue = 0
+    
+    #: Do not traverse any of the node's descendants.
+    #: The node's ``exit_*()`` callbacks are still executed.
+    SkipDescendants = 1
+
 #===============================================================================
 class RDLListener:
     """
@@ -73,7 +90,8 @@ class RDLWalker:
     1. Run :func:`~RDLListener.enter_Component` callback
     2. Run :func:`~RDLListener.enter_AddressableComponent` or :func:`~RDLListener.enter_VectorComponent` callback
     3. Run type-specific ``enter_*()`` callback, such as :func:`~RDLListener.enter_Reg`
-    4. Traverse any children
+    4. Traverse any children, unless an ``enter_*()`` callback returned
+       :attr:`WalkerAction.SkipDescendants`
     5. Run type-specific ``exit_*()`` callback, such as :func:`~RDLListener.exit_Reg`
     6. Run :func:`~RDLListener.exit_AddressableComponent` or :func:`~RDLListener.exit_VectorComponent` callback
     7. Run :func:`~RDLListener.exit_Component` callback
@@ -102,6 +120,10 @@ class RDLWalker:
         Calls the corresponding callback for each of the ``listeners`` provided in
         the order that they are listed.
         
+        Traversal is iterative, so the depth of the hierarchy is not limited by
+        Python's recursion limit. Only callbacks that a listener overrides are
+        invoked.
+        
         Parameters
         ----------
         node : :class:`~systemrdl.node.Node`
@@ -114,60 +136,181 @@ class RDLWalker:
             Listener callbacks are executed in the same order as provided by this
             parameter.
         """
+        if (type(self).do_enter is RDLWalker.do_enter) and (type(self).do_exit is RDLWalker.do_exit):
+            dispatcher = _Dispatcher(listeners)
+            enter = dispatcher.enter
+            exit_ = dispatcher.exit
+        else:
+            # Walker was extended. Defer to its callback handlers
+            def enter(node):
+                actions = [self.do_enter(node, listener) for listener in listeners]
+                return WalkerAction.SkipDescendants in actions
+            def exit_(node):
+                for listener in listeners:
+                    self.do_exit(node, listener)
+        
+        unroll = self.unroll
+        skip_not_present = self.skip_not_present
         
+        # Stack of nodes being traversed, and an iterator of their remaining
+        # children. Iterator is None if descendants are skipped
+        stack = []
+        if enter(node):
+            stack.append((node, None))
+        else:
+            stack.append((node, node.children(unroll, skip_not_present)))
         
-        for listener in listeners:
-            self.do_enter(node, listener)
-        for child in node.children(unroll=self.unroll, skip_not_present=self.skip_not_present):
-            self.walk(child, *listeners)
-        for listener in listeners:
-            self.do_exit(node, listener)
+        while stack:
+            node, children = stack[-1]
+            
+            if children is not None:
+                child = next(children, None)
+            else:
+                child = None
+            
+            if child is None:
+                stack.pop()
+                exit_(node)
+            elif enter(child):
+                stack.append((child, None))
+            else:
+                stack.append((child, child.children(unroll, skip_not_present)))
     
     
     def do_enter(self, node, listener:RDLListener):
+        """
+        Run the listener's enter callbacks for the node.
+        Returns :attr:`WalkerAction.SkipDescendants` if any of the callbacks
+        requested it.
+        """
+        enter_names, _ = _get_callback_names(type(node))
+        actions = [getattr(listener, name)(node) for name in enter_names]
         
-        # Skip RootNode since it isn't really a component
-        if not isinstance(node, RootNode):
-            listener.enter_Component(node)
-        
-        if isinstance(node, AddressableNode):
-            listener.enter_AddressableComponent(node)
-        elif isinstance(node, VectorNode):
-            listener.enter_VectorComponent(node)
-        
-        if isinstance(node, FieldNode):
-            listener.enter_Field(node)
-        elif isinstance(node, RegNode):
-            listener.enter_Reg(node)
-        elif isinstance(node, RegfileNode):
-            listener.enter_Regfile(node)
-        elif isinstance(node, AddrmapNode):
-            listener.enter_Addrmap(node)
-        elif isinstance(node, MemNode):
-            listener.enter_Mem(node)
-        elif isinstance(node, SignalNode):
-            listener.enter_Signal(node)
+        if WalkerAction.SkipDescendants in actions:
+            return WalkerAction.SkipDescendants
+        return WalkerAction.Continue
     
     
     def do_exit(self, node, listener:RDLListener):
-        if isinstance(node, FieldNode):
-            listener.exit_Field(node)
-        elif isinstance(node, RegNode):
-            listener.exit_Reg(node)
-        elif isinstance(node, RegfileNode):
-            listener.exit_Regfile(node)
-        elif isinstance(node, AddrmapNode):
-            listener.exit_Addrmap(node)
-        elif isinstance(node, MemNode):
-            listener.exit_Mem(node)
-        elif isinstance(node, SignalNode):
-            listener.exit_Signal(node)
+        """
+        Run the listener's exit callbacks for the node.
+        """
+        _, exit_names = _get_callback_names(type(node))
+        for name in exit_names:
+            getattr(listener, name)(node)
+
+#===============================================================================
+# Callback dispatch
+#===============================================================================
+# Type-specific callbacks. Only the first match applies
+_TYPE_CALLBACKS = (
+    (FieldNode, "Field"),
+    (RegNode, "Reg"),
+    (RegfileNode, "Regfile"),
+    (AddrmapNode, "Addrmap"),
+    (MemNode, "Mem"),
+    (SignalNode, "Signal"),
+)
+
+@functools.lru_cache(maxsize=None)
+def _get_callback_names(node_cls):
+    """
+    Returns the names of the enter and exit callbacks that apply to a node
+    type, in the order that they are called.
+    """
+    names = []
+    
+    # Skip RootNode since it isn't really a component
+    if not issubclass(node_cls, RootNode):
+        names.append("Component")
+    
+    if issubclass(node_cls, AddressableNode):
+        names.append("AddressableComponent")
+    elif issubclass(node_cls, VectorNode):
+        names.append("VectorComponent")
+    
+    for cls, name in _TYPE_CALLBACKS:
+        if issubclass(node_cls, cls):
+            names.append(name)
+            break
+    
+    enter_names = tuple("enter_" + name for name in names)
+    exit_names = tuple("exit_" + name for name in reversed(names))
+    return enter_names, exit_names
+
+
+@functools.lru_cache(maxsize=None)
+def _get_overridden_callbacks(listener_cls):
+    """
+    Returns the names of the callbacks that a listener class overrides
+    """
+    overridden = set()
+    for name, base_callback in vars(RDLListener).items():
+        if not name.startswith(("enter_", "exit_")):
+            continue
+        if getattr(listener_cls, name, base_callback) is not base_callback:
+            overridden.add(name)
+    return frozenset(overridden)
+
+
+class _Dispatcher:
+    """
+    Dispatches nodes to the listener callbacks that apply to them.
+    
+    Callbacks are resolved once per node type and cached in a table.
+    Callbacks that a listener does not override are never called.
+    """
+    def __init__(self, listeners):
+        self.listeners = listeners
         
-        if isinstance(node, AddressableNode):
-            listener.exit_AddressableComponent(node)
-        elif isinstance(node, VectorNode):
-            listener.exit_VectorComponent(node)
+        # node type : tuple of bound callbacks
+        self.enter_table = {}
+        self.exit_table = {}
+    
+    
+    def _build(self, node_cls):
+        enter_names, exit_names = _get_callback_names(node_cls)
+        enter_callbacks = []
+        exit_callbacks = []
+        for listener in self.listeners:
+            overridden = _get_overridden_callbacks(type(listener))
+            # Callbacks may also have been assigned to the listener object
+            instance_attrs = getattr(listener, "__dict__", {})
+            for name in enter_names:
+                if (name in overridden) or (name in instance_attrs):
+                    enter_callbacks.append(getattr(listener, name))
+            for name in exit_names:
+                if (name in overridden) or (name in instance_attrs):
+                    exit_callbacks.append(getattr(listener, name))
+        self.enter_table[node_cls] = tuple(enter_callbacks)
+        self.exit_table[node_cls] = tuple(exit_callbacks)
+    
+    
+    def enter(self, node):
+        """
+        Run enter callbacks for the node.
+        Returns True if descendants of the node shall be skipped.
+        """
+        callbacks = self.enter_table.get(type(node), None)
+        if callbacks is None:
+            self._build(type(node))
+            callbacks = self.enter_table[type(node)]
+        
+        skip = False
+        for callback in callbacks:
+            if callback(node) == WalkerAction.SkipDescendants:
+                skip = True
+        return skip
+    
+    
+    def exit(self, node):
+        """
+        Run exit callbacks for the node.
+        """
+        callbacks = self.exit_table.get(type(node), None)
+        if callbacks is None:
+            self._build(type(node))
+            callbacks = self.exit_table[type(node)]
         
-        # Skip RootNode since it isn't really a component
-        if not isinstance(node, RootNode):
-            listener.exit_Component(node)
+        for callback in callbacks:
+            callback(node)
@@ -0,0 +1,92 @@
+from .unittest_utils import RDLSourceTestCase
+
+class TestAddressLookup(RDLSourceTestCase):
+
+    def test_find_by_address(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "top"
+        )
+
+        expected = [
+            (0x0, "top.r0"),
+            (0x3, "top.r0"),
+            (0x100, "top.r_array[0][0]"),
+            (0x108, "top.r_array[0][1]"),
+            (0x12B, "top.r_array[1][2]"),
+            (0x200, "top.rf[0].a"),
+            (0x218, "top.rf[1].b"),
+            (0x1004, "top.sub.y"),
+            (0x2000, "top.ram.entries[0]"),
+            (0x201C, "top.ram.entries[7]"),
+            (0x3000, "top.r_last"),
+        ]
+        for address, path in expected:
+            with self.subTest(address=hex(address)):
+                node = root.find_by_address(address)
+                self.assertEqual(node.get_path(), path)
+                self.assertLessEqual(node.absolute_address, address)
+                self.assertLess(address, node.absolute_address + node.size)
+
+        # Unoccupied addresses
+        for address in [0x4, 0x10, 0x104, 0x12C, 0x20C, 0x1008, 0x2020, 0x3004, -1]:
+            with self.subTest(address=hex(address)):
+                self.assertIsNone(root.find_by_address(address))
+
+        # Lookup relative to a specific array element
+        rf1 = root.find_by_path("top.rf[1]")
+        self.assertEqual(rf1.find_by_address(0x210).get_path(), "top.rf[1].a")
+        self.assertIsNone(rf1.find_by_address(0x200))
+
+        # Index is rebuilt if children change
+        top = root.find_by_path("top")
+        top.find_by_address(0x0)
+        top.inst.children = [c for c in top.inst.children if c.inst_name != "r0"]
+        self.assertIsNone(root.find_by_address(0x0))
+
+    def test_find_by_address_range(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "top"
+        )
+
+        def paths(address, size):
+            return [node.get_path() for node in root.find_by_address_range(address, size)]
+
+        self.assertEqual(paths(0x0, 0x100), ["top.r0"])
+        self.assertEqual(paths(0x104, 0xD), ["top.r_array[0][1]", "top.r_array[0][2]"])
+        self.assertEqual(paths(0x10A, 0x1), ["top.r_array[0][1]"])
+        self.assertEqual(paths(0x10C, 0x4), [])
+        self.assertEqual(
+            paths(0x208, 0xC),
+            ["top.rf[0].b", "top.rf[1].a"]
+        )
+        self.assertEqual(
+            paths(0x1000, 0x1004),
+            ["top.sub.x", "top.sub.y", "top.ram.entries[0]"]
+        )
+        self.assertEqual(len(paths(0x0, 0x4000)), 1 + 6 + 4 + 2 + 8 + 1)
+        self.assertEqual(paths(0x3000, 0), [])
+
+    def test_overlapping_siblings(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "overlap_top"
+        )
+
+        def paths(address, size):
+            return [node.get_path() for node in root.find_by_address_range(address, size)]
+
+        self.assertEqual(root.find_by_address(0x4).get_path(), "overlap_top.ro_wide")
+        self.assertEqual(root.find_by_address(0x8).get_path(), "overlap_top.after")
+        self.assertIn(
+            root.find_by_address(0x0).get_path(),
+            ["overlap_top.ro_wide", "overlap_top.wo_narrow"]
+        )
+
+        self.assertEqual(paths(0x4, 0x4), ["overlap_top.ro_wide"])
+        self.assertEqual(paths(0x4, 0x8), ["overlap_top.ro_wide", "overlap_top.after"])
+        self.assertEqual(
+            sorted(paths(0x0, 0x4)),
+            ["overlap_top.ro_wide", "overlap_top.wo_narrow"]
+        )
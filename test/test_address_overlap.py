@@ -0,0 +1,79 @@
+from unittest import mock
+
+from systemrdl.core import validate
+from .unittest_utils import RDLSourceTestCase
+
+class TestAddressOverlap(RDLSourceTestCase):
+
+    def test_legal_overlap(self):
+        root = self.compile(
+            ["rdl_testcases/address_overlap.rdl"],
+            "legal_overlap"
+        )
+        top = root.top
+        self.assertEqual(top.get_child_by_name("command").absolute_address, 0x0)
+        self.assertEqual(top.get_child_by_name("last").absolute_address, 0x20)
+
+    def test_access_summary_only_for_overlaps(self):
+        summary = mock.Mock(wraps=validate.get_reg_access_summary)
+        with mock.patch.object(validate, "get_reg_access_summary", summary):
+            self.compile(
+                ["rdl_testcases/address_lookup.rdl"],
+                "top"
+            )
+            self.assertEqual(summary.call_count, 0)
+
+            self.compile(
+                ["rdl_testcases/address_overlap.rdl"],
+                "legal_overlap"
+            )
+            self.assertGreater(summary.call_count, 0)
+
+    def test_sweep_groups(self):
+        ro, wo, rw = (True, False), (False, True), (True, True)
+        access = {"ro": ro, "wo": wo, "rw1": rw, "rw2": rw, "ro2": ro}
+        sweep = validate._AddressSweep()
+        with mock.patch.object(validate, "_get_access", side_effect=access.get) as get_access:
+            self.assertEqual(sweep.get_conflicts(0, "ro"), [])
+            sweep.add(0x100, "ro")
+            self.assertEqual(sweep.get_conflicts(0, "wo"), [])
+            sweep.add(0x100, "wo")
+            self.assertEqual(sweep.get_conflicts(0, "rw1"), ["ro", "wo"])
+            sweep.add(0x8, "rw1")
+            self.assertEqual(sweep.get_conflicts(0x4, "rw2"), ["ro", "wo", "rw1"])
+            sweep.add(0x8, "rw2")
+
+            # Retired siblings are removed from their groups
+            self.assertEqual(sweep.get_conflicts(0x8, "ro2"), ["ro"])
+
+            # Each access summary is only determined once
+            self.assertEqual(
+                sorted(call.args[0] for call in get_access.call_args_list),
+                ["ro", "ro2", "rw1", "rw2", "wo"]
+            )
+
+    def test_illegal_reg_overlap(self):
+        self.assertRDLCompileError(
+            ["rdl_testcases/address_overlap.rdl"],
+            "illegal_reg_overlap",
+            r"Instance 'ctrl' at offset \+0x0:0x3 overlaps with 'status' at offset \+0x0:0x3"
+        )
+        self.assertRDLCompileError(
+            ["rdl_testcases/address_overlap.rdl"],
+            "illegal_reg_overlap",
+            r"Instance 'ctrl' at offset \+0x0:0x3 overlaps with 'command' at offset \+0x0:0x3"
+        )
+
+    def test_illegal_array_overlap(self):
+        self.assertRDLCompileError(
+            ["rdl_testcases/address_overlap.rdl"],
+            "illegal_array_overlap",
+            r"Instance 'b' at offset \+0x8:0xB overlaps with 'a' at offset \+0x0:0xF"
+        )
+
+    def test_illegal_group_overlap(self):
+        self.assertRDLCompileError(
+            ["rdl_testcases/address_overlap.rdl"],
+            "illegal_group_overlap",
+            r"Instance 'status' at offset \+0x4:0x7 overlaps with 'rf' at offset \+0x0:0x7"
+        )
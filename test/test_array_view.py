@@ -0,0 +1,50 @@
+from systemrdl.node import ArrayView
+
+from .unittest_utils import RDLSourceTestCase
+
+class TestArrayView(RDLSourceTestCase):
+
+    def test_array_view(self):
+        root = self.compile(
+            ["rdl_testcases/child_lookup.rdl"],
+            "top"
+        )
+        top = root.find_by_path("top")
+        view = top.get_child_by_name("r_array").array_view()
+
+        self.assertEqual(len(view), 6)
+        self.assertEqual(view.strides, (3, 1))
+
+        paths = [node.get_path() for node in view]
+        self.assertEqual(paths, [
+            "top.r_array[0][0]", "top.r_array[0][1]", "top.r_array[0][2]",
+            "top.r_array[1][0]", "top.r_array[1][1]", "top.r_array[1][2]",
+        ])
+        self.assertEqual(
+            list(view.element_addresses()),
+            [node.absolute_address for node in view]
+        )
+
+        # Unrolled children are equivalent
+        unrolled = [
+            node.get_path() for node in top.children(unroll=True)
+            if node.inst.inst_name == "r_array"
+        ]
+        self.assertEqual(unrolled, paths)
+
+        self.assertEqual(view[4].get_path(), "top.r_array[1][1]")
+        self.assertEqual(view[-1].get_path(), "top.r_array[1][2]")
+        self.assertEqual(view[1, 2].absolute_address, 0x114)
+
+        # Elements are independent of each other and of the viewed node
+        self.assertIsNot(view[0], view[0])
+        self.assertIsNone(view.node.current_idx)
+
+        with self.assertRaises(IndexError):
+            view[6] # pylint: disable=pointless-statement
+        with self.assertRaises(IndexError):
+            view[2, 0] # pylint: disable=pointless-statement
+        with self.assertRaises(IndexError):
+            view[1,] # pylint: disable=pointless-statement
+        with self.assertRaises(ValueError):
+            ArrayView(top.get_child_by_name("r0"))
@@ -0,0 +1,79 @@
+from systemrdl import component as comp
+
+from .unittest_utils import RDLSourceTestCase
+
+class TestChildLookup(RDLSourceTestCase):
+
+    def test_lookup_after_sort(self):
+        root = self.compile(
+            ["rdl_testcases/child_lookup.rdl"],
+            "top"
+        )
+        top = root.find_by_path("top")
+
+        # Children were re-ordered by placement
+        self.assertEqual(
+            [child.inst.inst_name for child in top.children()],
+            ["r0", "r1", "r2", "r3", "r_array"]
+        )
+
+        for i in range(4):
+            with self.subTest(i=i):
+                reg = top.get_child_by_name("r%d" % i)
+                self.assertEqual(reg.inst.inst_name, "r%d" % i)
+                self.assertEqual(reg.absolute_address, 0x10 * i)
+                self.assertIs(top.inst.get_child_by_name("r%d" % i), reg.inst)
+
+        self.assertIsNone(top.get_child_by_name("r4"))
+
+    def test_find_by_path(self):
+        root = self.compile(
+            ["rdl_testcases/child_lookup.rdl"],
+            "top"
+        )
+        self.assertEqual(root.find_by_path("top.r2.f2").get_path(), "top.r2.f2")
+        self.assertEqual(root.find_by_path("top.r_array[1][2]").absolute_address, 0x114)
+        self.assertEqual(root.find_by_path("top.r_array[0x1][0x2].f1").get_path(), "top.r_array[1][2].f1")
+        self.assertIsNone(root.find_by_path("top.r9.f1"))
+
+        # Cached path parse results do not leak array indexes between queries
+        node1 = root.find_by_path("top.r_array[1][0]")
+        node2 = root.find_by_path("top.r_array[1][0]")
+        node1.current_idx[1] = 2
+        self.assertEqual(node2.current_idx, [1, 0])
+
+        with self.assertRaises(ValueError):
+            root.find_by_path("top.r1.")
+        with self.assertRaises(ValueError):
+            root.find_by_path("top.r1[x]")
+        with self.assertRaises(IndexError):
+            root.find_by_path("top.r_array[2][0]")
+        with self.assertRaises(IndexError):
+            root.find_by_path("top.r_array[1]")
+        with self.assertRaises(IndexError):
+            root.find_by_path("top.r1[0]")
+
+    def test_index_updates(self):
+        parent = comp.Addrmap()
+        regs = []
+        for i in range(4):
+            reg = comp.Reg()
+            reg.inst_name = "r%d" % i
+            regs.append(reg)
+
+        # Appended children are added to the existing index
+        parent.children.append(regs[0])
+        index = parent._get_child_index()
+        parent.children.append(regs[1])
+        self.assertIs(parent.get_child_by_name("r1"), regs[1])
+        self.assertIs(parent._get_child_index(), index)
+
+        # Removing children rebuilds it
+        parent.children.remove(regs[0])
+        self.assertIsNone(parent.get_child_by_name("r0"))
+        self.assertIsNot(parent._get_child_index(), index)
+
+        # As does replacing the list
+        parent.children = [regs[2], regs[3]]
+        self.assertIsNone(parent.get_child_by_name("r1"))
+        self.assertIs(parent.get_child_by_name("r3"), regs[3])
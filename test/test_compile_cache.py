@@ -0,0 +1,186 @@
+import os
+import tempfile
+import shutil
+import enum
+
+from systemrdl import RDLCompiler, RDLWalker, RDLListener
+from systemrdl import rdltypes
+from systemrdl.node import Node
+from systemrdl.messages import MessagePrinter, SourceRef
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+
+#===============================================================================
+def normalize_value(value):
+    """
+    Convert a property value into something that can be compared between
+    separate compiler sessions
+    """
+    if isinstance(value, Node):
+        return ("node", value.get_path())
+    elif isinstance(value, rdltypes.PropertyReference):
+        return ("propref", value.node.get_path(), value.name)
+    elif isinstance(value, enum.Enum):
+        return ("enum", type(value).__name__, value.name)
+    elif isinstance(value, rdltypes.UserStruct):
+        return ("struct", type(value).__name__, [
+            (k, normalize_value(v)) for k, v in value._values.items()
+        ])
+    elif isinstance(value, list):
+        return [normalize_value(v) for v in value]
+    elif isinstance(value, type):
+        return ("type", value.__name__)
+    return value
+
+
+class DumpListener(RDLListener):
+    def __init__(self):
+        self.entries = []
+
+    def enter_Component(self, node):
+        props = []
+        for prop_name in sorted(node.list_properties()):
+            props.append((prop_name, normalize_value(node.get_property(prop_name))))
+        self.entries.append((node.get_path(), node.inst.type_name, props))
+
+
+def dump_design(root):
+    listener = DumpListener()
+    RDLWalker(unroll=True).walk(root, listener)
+    return listener.entries
+
+class RecordingPrinter(MessagePrinter):
+    def __init__(self):
+        self.records = []
+
+    def print_message(self, severity, text, src_ref):
+        self.records.append((severity, text, src_ref))
+
+#===============================================================================
+class TestCompileCache(RDLSourceTestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def compile_cached(self, files, top_name, cache_dir=None):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter(), cache_dir=cache_dir)
+        for file in files:
+            rdlc.compile_file(os.path.join(this_dir, file))
+        return rdlc, rdlc.elaborate(top_name)
+
+    def test_equivalence(self):
+        testcases = [
+            (["rdl_testcases/enums.rdl"], "enum_test1"),
+            (["rdl_testcases/structs.rdl"], "struct_test"),
+            (["rdl_testcases/struct_compositions.rdl"], "top"),
+            (["rdl_testcases/parameters.rdl"], "myAmap"),
+            (["rdl_testcases/references_direct_lhs.rdl"], "top"),
+            (["rdl_testcases/references_dynamic_lhs.rdl"], "top"),
+            (["rdl_testcases/udp_15.2.2_ex1.rdl"], "foo"),
+            (["rdl_testcases/preprocessor.rdl"], "top"),
+        ]
+        for files, top_name in testcases:
+            with self.subTest(files[0]):
+                _, root = self.compile_cached(files, top_name)
+                expected = dump_design(root)
+
+                rdlc, root = self.compile_cached(files, top_name, self.cache_dir)
+                self.assertEqual(rdlc.cache.misses, 1)
+                self.assertEqual(dump_design(root), expected)
+
+                rdlc, root = self.compile_cached(files, top_name, self.cache_dir)
+                self.assertEqual(rdlc.cache.hits, 1)
+                self.assertEqual(rdlc.cache.misses, 0)
+                self.assertEqual(dump_design(root), expected)
+
+    def test_multi_file(self):
+        src_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, src_dir)
+
+        file1 = os.path.join(src_dir, "types.rdl")
+        with open(file1, "w") as f:
+            f.write("""
+                enum my_enum { A = 0; B = 1; };
+                struct base_s { longint x; };
+                struct my_s : base_s { boolean y; };
+                property my_udp { type = my_s; component = reg; };
+                reg my_reg_t {
+                    field { encode = my_enum; } f1[2];
+                };
+            """)
+        file2 = os.path.join(src_dir, "top.rdl")
+        with open(file2, "w") as f:
+            f.write("""
+                addrmap top {
+                    my_reg_t r1;
+                    my_reg_t r2;
+                    r2.f1->reset = 1;
+                    r2->my_udp = my_s'{x:5, y:true};
+                };
+            """)
+
+        results = []
+        for _ in range(2):
+            rdlc = RDLCompiler(message_printer=TestPrinter(), cache_dir=self.cache_dir)
+            rdlc.compile_file(file1)
+            rdlc.compile_file(file2)
+            root = rdlc.elaborate("top")
+            results.append((rdlc, root))
+
+        self.assertEqual(results[0][0].cache.misses, 2)
+        self.assertEqual(results[1][0].cache.hits, 2)
+        self.assertEqual(dump_design(results[0][1]), dump_design(results[1][1]))
+
+        # Types referenced across files must retain their identity
+        rdlc, root = results[1]
+        my_enum = rdlc.namespace.type_ns_stack[0]["my_enum"]
+        my_s = rdlc.namespace.type_ns_stack[0]["my_s"]
+        self.assertIs(root.find_by_path("top.r1.f1").get_property("encode"), my_enum)
+        self.assertIs(type(root.find_by_path("top.r2").get_property("my_udp")), my_s)
+        self.assertIs(
+            root.find_by_path("top.r1").inst.original_def,
+            rdlc.root.comp_defs["my_reg_t"]
+        )
+
+        # Changing an earlier file invalidates everything that follows
+        with open(file1, "a") as f:
+            f.write("\n// modified\n")
+        rdlc = RDLCompiler(message_printer=TestPrinter(), cache_dir=self.cache_dir)
+        rdlc.compile_file(file1)
+        rdlc.compile_file(file2)
+        self.assertEqual(rdlc.cache.misses, 2)
+
+    def test_warnings(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        path = os.path.join(this_dir, "rdl_testcases/address_packing.rdl")
+
+        results = []
+        for _ in range(2):
+            printer = RecordingPrinter()
+            rdlc = RDLCompiler(message_printer=printer, cache_dir=self.cache_dir)
+
+            # Emit a warning whenever the file is actually compiled
+            visit = rdlc.visitor.visit
+            def visit_and_warn(tree, rdlc=rdlc, visit=visit):
+                if tree.parentCtx is None:
+                    rdlc.msg.warning("compile warning", SourceRef(10, 20, filename=path))
+                return visit(tree)
+            rdlc.visitor.visit = visit_and_warn
+
+            rdlc.compile_file(path)
+            results.append((rdlc, printer))
+
+        self.assertEqual(results[0][0].cache.misses, 1)
+        self.assertEqual(results[1][0].cache.hits, 1)
+
+        # Warnings from the original compilation are replayed on a cache hit
+        for rdlc, printer in results:
+            self.assertEqual(rdlc.msg.warning_count, 1)
+            self.assertEqual(len(printer.records), 1)
+            severity, text, src_ref = printer.records[0]
+            self.assertEqual((severity, text), ("warning", "compile warning"))
+            self.assertEqual((src_ref.start, src_ref.end, src_ref.filename), (10, 20, path))
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import shutil
+
+from systemrdl import RDLCompiler, RDLCompileError
+from systemrdl.messages import MessagePrinter
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+from .test_compile_cache import dump_design
+
+class RecordingPrinter(MessagePrinter):
+    def __init__(self):
+        self.records = []
+
+    def print_message(self, severity, text, src_ref):
+        if src_ref is not None:
+            src_ref.derive_coordinates()
+            location = (src_ref.filename, src_ref.start_line, src_ref.start_col)
+        else:
+            location = None
+        self.records.append((severity, text, location))
+
+
+class TestCompileFiles(RDLSourceTestCase):
+
+    def setUp(self):
+        self.src_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.src_dir)
+
+    def write_files(self, sources):
+        paths = []
+        for i, text in enumerate(sources):
+            path = os.path.join(self.src_dir, "file%d.rdl" % i)
+            with open(path, "w") as f:
+                f.write(text)
+            paths.append(path)
+        return paths
+
+    def get_messages(self, paths, jobs):
+        printer = RecordingPrinter()
+        rdlc = RDLCompiler(message_printer=printer)
+        with self.assertRaises(RDLCompileError):
+            rdlc.compile_files(paths, jobs=jobs)
+        return printer.records
+
+    def test_equivalence(self):
+        paths = self.write_files([
+            """
+            enum my_enum { A = 0; B = 1; };
+            reg my_reg_t {
+                field { encode = my_enum; } f1[2] = 1;
+                <% for($i = 0; $i < 3; $i++) { %>
+                field {} x<%=$i%>;
+                <% } %>
+            };
+            """,
+            """
+            regfile my_rf_t {
+                my_reg_t r1;
+                my_reg_t r2[4];
+            };
+            """,
+            """
+            addrmap top {
+                my_rf_t rf1;
+                my_reg_t r3;
+                rf1.r1.f1->reset = 2;
+            };
+            """,
+        ])
+
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        for path in paths:
+            rdlc.compile_file(path)
+        expected = dump_design(rdlc.elaborate("top"))
+        expected_defs = list(rdlc.root.comp_defs.keys())
+
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        rdlc.compile_files(paths, jobs=2)
+        self.assertEqual(list(rdlc.root.comp_defs.keys()), expected_defs)
+        self.assertEqual(dump_design(rdlc.elaborate("top")), expected)
+
+    def test_duplicate_type(self):
+        paths = self.write_files([
+            "reg my_reg_t { field {} f; };",
+            "addrmap top { my_reg_t r1; };",
+            "reg my_reg_t {\n    field {} g;\n};",
+        ])
+        expected = self.get_messages(paths, jobs=1)
+        self.assertEqual(self.get_messages(paths, jobs=3), expected)
+        self.assertEqual(expected[0][2], (paths[2], 1, 4))
+
+    def test_parse_error(self):
+        paths = self.write_files([
+            "reg my_reg_t { field {} f; }",
+            "addrmap top {\n    my_reg_t r1;\n};",
+            "addrmap top2 {\n    my_reg_t r1\n};",
+        ])
+        expected = self.get_messages(paths, jobs=1)
+        self.assertEqual(self.get_messages(paths, jobs=3), expected)
+        # Error in first file is reported before anything from later files
+        self.assertEqual(expected[0][2][0], paths[0])
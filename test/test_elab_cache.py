@@ -0,0 +1,128 @@
+import os
+import tempfile
+import shutil
+
+from systemrdl import RDLCompiler, ElaborationCache
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+from .test_compile_cache import dump_design
+
+class TestElabCache(RDLSourceTestCase):
+
+    def elaborate(self, files, top_name, elab_cache=None):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter(), elab_cache=elab_cache)
+        for file in files:
+            rdlc.compile_file(os.path.join(this_dir, file))
+        return rdlc.elaborate(top_name)
+
+    def test_equivalence(self):
+        testcases = [
+            (["rdl_testcases/parameters.rdl"], "myAmap", True),
+            (["rdl_testcases/enums.rdl"], "enum_test1", True),
+            (["rdl_testcases/structs.rdl"], "struct_test", True),
+            (["rdl_testcases/address_packing.rdl"], "hier", True),
+            (["rdl_testcases/udp_15.2.2_ex1.rdl"], "foo", True),
+            # References to root-level signals prevent reuse
+            (["rdl_testcases/references_direct_lhs.rdl"], "top", False),
+            (["rdl_testcases/references_dynamic_lhs.rdl"], "top", False),
+        ]
+        for files, top_name, reusable in testcases:
+            with self.subTest(files[0]):
+                expected = dump_design(self.elaborate(files, top_name))
+
+                elab_cache = ElaborationCache()
+                root = self.elaborate(files, top_name, elab_cache)
+                self.assertEqual(elab_cache.hits, 0)
+                self.assertEqual(dump_design(root), expected)
+
+                root = self.elaborate(files, top_name, elab_cache)
+                self.assertEqual(elab_cache.hits > 0, reusable)
+                self.assertEqual(dump_design(root), expected)
+
+    def test_partial_reuse(self):
+        src_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, src_dir)
+
+        def elaborate_src(elab_cache, sub_b_reset):
+            path = os.path.join(src_dir, "top.rdl")
+            with open(path, "w") as f:
+                f.write("""
+                    addrmap sub_a {
+                        reg { field {} f[8]; } r1;
+                        reg { field {} f[8]; } r2;
+                    };
+                    addrmap sub_b {
+                        reg { field { reset = %d; } f[8]; } r1;
+                    };
+                    addrmap top {
+                        sub_a a1;
+                        sub_a a2 @ 0x100;
+                        sub_b b;
+                    };
+                """ % sub_b_reset)
+            rdlc = RDLCompiler(message_printer=TestPrinter(), elab_cache=elab_cache)
+            rdlc.compile_file(path)
+            return rdlc.elaborate("top")
+
+        expected = dump_design(elaborate_src(None, 2))
+
+        elab_cache = ElaborationCache()
+        elaborate_src(elab_cache, 1)
+        self.assertEqual(elab_cache.hits, 0)
+
+        # Only sub_b's body changed. Both sub_a instances are reused
+        root = elaborate_src(elab_cache, 2)
+        self.assertEqual(elab_cache.hits, 2)
+        self.assertEqual(dump_design(root), expected)
+        self.assertEqual(root.find_by_path("top.b.r1.f").get_property("reset"), 2)
+        self.assertEqual(root.find_by_path("top.a2.r2").absolute_address, 0x104)
+
+    def test_reuse_across_compilers(self):
+        src_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, src_dir)
+
+        def elaborate_src(elab_cache, top_reset):
+            path = os.path.join(src_dir, "top.rdl")
+            with open(path, "w") as f:
+                f.write("""
+                    addrmap sub {
+                        reg {
+                            field {sw=rw;} a;
+                            field {sw=rw;} b;
+                        } r1;
+                        r1.b->next = r1.a;
+                        r1.a->next = r1.b->anded;
+                    };
+                    addrmap top {
+                        sub s;
+                        reg { field { reset = %d; } f; } r2;
+                    };
+                """ % top_reset)
+            rdlc = RDLCompiler(message_printer=TestPrinter(), elab_cache=elab_cache)
+            rdlc.compile_file(path)
+            return rdlc.elaborate("top")
+
+        expected = dump_design(elaborate_src(None, 1))
+
+        elab_cache = ElaborationCache()
+        root0 = elaborate_src(elab_cache, 0)
+        self.assertEqual(elab_cache.hits, 0)
+
+        # The body of sub is reused by a compiler with a different top
+        root = elaborate_src(elab_cache, 1)
+        self.assertEqual(elab_cache.hits, 1)
+        self.assertEqual(dump_design(root), expected)
+        self.assertEqual(root.find_by_path("top.r2.f").get_property("reset"), 1)
+
+        r1 = root.find_by_path("top.s.r1")
+        a = r1.get_child_by_name("a")
+        b = r1.get_child_by_name("b")
+        self.assertEqual(b.get_property("next"), a)
+        prop_ref = a.get_property("next")
+        self.assertEqual(prop_ref.node, b)
+        self.assertEqual(prop_ref.name, "anded")
+
+        # The design that the body was originally elaborated for is unaffected
+        b0 = root0.find_by_path("top.s.r1.b")
+        self.assertEqual(b0.get_property("next"), root0.find_by_path("top.s.r1.a"))
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import shutil
+
+from systemrdl import RDLCompiler, CompilerStats
+from systemrdl.core import parallel
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+from .test_compile_cache import dump_design
+
+class TestElaborateAll(RDLSourceTestCase):
+
+    def compile_rdl(self, files):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        for file in files:
+            rdlc.compile_file(os.path.join(this_dir, file))
+        return rdlc
+
+    def dump_tops(self, root, top_names):
+        entries = []
+        for path, type_name, props in dump_design(root):
+            if path.split(".")[0].split("[")[0] in top_names:
+                entries.append((path, type_name, props))
+        return entries
+
+    def check_equivalence(self, jobs):
+        testcases = [
+            ["rdl_testcases/address_packing.rdl"],
+            ["rdl_testcases/instance_sharing.rdl"],
+            ["rdl_testcases/parameter_specialization.rdl"],
+            ["rdl_testcases/enums.rdl", "rdl_testcases/structs.rdl"],
+            ["rdl_testcases/references_direct_lhs.rdl"],
+        ]
+        for files in testcases:
+            with self.subTest(files[0]):
+                rdlc = self.compile_rdl(files)
+                top_names = [
+                    name for name, comp_def in rdlc.root.comp_defs.items()
+                    if type(comp_def).__name__ == "Addrmap"
+                ]
+
+                expected = []
+                for top_name in top_names:
+                    root = rdlc.elaborate(top_name)
+                    expected.extend(self.dump_tops(root, [top_name]))
+
+                root = rdlc.elaborate_all(jobs=jobs)
+                self.assertEqual(
+                    [top.inst.inst_name for top in root.children() if top.inst.inst_name in top_names],
+                    top_names
+                )
+                self.assertEqual(self.dump_tops(root, top_names), expected)
+
+    def test_sequential(self):
+        self.check_equivalence(1)
+
+    def test_parallel(self):
+        if not parallel.can_fork():
+            self.skipTest("Worker processes cannot be forked")
+        self.check_equivalence(2)
+
+    def test_shared_definitions(self):
+        rdlc = self.compile_rdl(["rdl_testcases/instance_sharing.rdl"])
+        for jobs in (1, 2):
+            with self.subTest(jobs=jobs):
+                if jobs > 1 and not parallel.can_fork():
+                    self.skipTest("Worker processes cannot be forked")
+                root = rdlc.elaborate_all(["top2", "top"], jobs=jobs)
+                self.assertEqual(root.top.inst.inst_name, "top2")
+
+                # Elaborated components still refer to the compiled definitions
+                my_reg = rdlc.root.comp_defs["my_reg"]
+                self.assertIs(root.find_by_path("top.s2.r1").inst.original_def, my_reg)
+                self.assertIs(root.find_by_path("top2.r_inst").inst.original_def, my_reg)
+                self.assertEqual(root.find_by_path("top.s2.r1.a").get_property("reset"), 1)
+                self.assertEqual(root.find_by_path("top2.r_reset.b").get_property("reset"), 0xF)
+
+    def test_select_tops(self):
+        rdlc = self.compile_rdl(["rdl_testcases/address_packing.rdl"])
+        root = rdlc.elaborate_all(["hier", "example_5_1_2_5_ex1"])
+        self.assertEqual(
+            [top.inst.inst_name for top in root.children()],
+            ["hier", "example_5_1_2_5_ex1"]
+        )
+
+    def test_shared_bodies(self):
+        src_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, src_dir)
+        path = os.path.join(src_dir, "top.rdl")
+        with open(path, "w") as f:
+            f.write("""
+                addrmap sub {
+                    reg { field {} f[8]; } r1[4];
+                    reg { field {} f[8]; } r2;
+                };
+                addrmap top1 {
+                    sub s;
+                };
+                addrmap top2 {
+                    reg { field {} f; } r0;
+                    sub s @ 0x100;
+                };
+            """)
+
+        counts = {}
+        for name in ("separate", "all"):
+            stats = CompilerStats()
+            rdlc = RDLCompiler(message_printer=TestPrinter(), stats=stats)
+            rdlc.compile_file(path)
+            if name == "separate":
+                rdlc.elaborate("top1")
+                rdlc.elaborate("top2")
+            else:
+                root = rdlc.elaborate_all(["top1", "top2"])
+            counts[name] = stats.counters["nodes"]
+
+        # The body of sub is elaborated for top1, and reused by top2
+        s1 = root.find_by_path("top1.s")
+        s2 = root.find_by_path("top2.s")
+        self.assertIs(s1.inst.children[0], s2.inst.children[0])
+        self.assertEqual(root.find_by_path("top2.s.r2").absolute_address, 0x110)
+        self.assertLess(counts["all"], counts["separate"])
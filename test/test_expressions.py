@@ -1,5 +1,14 @@
+import copy
 
-from .unittest_utils import RDLSourceTestCase
+from antlr4 import InputStream, CommonTokenStream
+
+from systemrdl import RDLCompiler
+from systemrdl.parser.SystemRDLLexer import SystemRDLLexer
+from systemrdl.parser.SystemRDLParser import SystemRDLParser
+from systemrdl.core.ExprVisitor import ExprVisitor
+from systemrdl.core import expressions as e
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
 
 import systemrdl.rdltypes as rdlt
 
@@ -673,3 +682,56 @@ class TestAdvanced(RDLSourceTestCase):
         self.assertEqual((int, 0x0008), self.eval_RDL_expr("(1'b1 << 3) + 8'b0"))
         self.assertEqual((int, 0x0000), self.eval_RDL_expr("(|(~(4'hF))) + 8'b0"))
         self.assertEqual((int, 0x00FF), self.eval_RDL_expr("(~(&(4'b1))) + 8'b0"))
+
+#===============================================================================
+class TestConstantFolding(RDLSourceTestCase):
+    def visit_RDL_expr(self, expr_text):
+        input_stream = InputStream(expr_text)
+        parser = SystemRDLParser(CommonTokenStream(SystemRDLLexer(input_stream)))
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        return ExprVisitor(rdlc).visit(parser.expr())
+
+    def test_folded(self):
+        expr = self.visit_RDL_expr("(4'h3 == 3) && {4'h1, 4'h2} > 8'h11")
+        self.assertIsInstance(expr, e.FoldedConstant)
+        self.assertEqual(expr.predict_type(), bool)
+        self.assertIs(expr.get_value(), True)
+
+        expr = self.visit_RDL_expr("{4'h1, 4'h2}")
+        self.assertIsInstance(expr, e.FoldedConstant)
+        self.assertEqual(expr.get_min_eval_width(), 8)
+        self.assertEqual(expr.get_value(), 0x12)
+
+    def test_context_width(self):
+        # Operands that depend on the evaluation width are not folded on their
+        # own, since their parent determines it
+        expr = self.visit_RDL_expr("(8'hFF + 8'h1) + 16'h0")
+        self.assertIsInstance(expr, e.Add)
+        self.assertIsInstance(expr.l, e.Add)
+        self.assertEqual(expr.get_value(), 0x100)
+
+        folded = e.fold_constant(expr)
+        self.assertIsInstance(folded, e.FoldedConstant)
+        self.assertEqual(folded.get_value(), 0x100)
+        self.assertEqual(folded.get_min_eval_width(), 16)
+
+    def test_not_folded(self):
+        # Aggregate values are not folded
+        expr = self.visit_RDL_expr("'{1, 2}")
+        self.assertIs(e.fold_constant(expr), expr)
+
+        # Errors are still only reported once the expression is evaluated
+        expr = self.visit_RDL_expr("(4 / 0) + 1")
+        self.assertFalse(expr.is_constant)
+        self.assertRDLExprError("(4 / 0) + 1", "Division by zero")
+
+    def test_shared(self):
+        expr1 = e.fold_constant(self.visit_RDL_expr("2 + 2"))
+        self.assertIs(copy.deepcopy(expr1), expr1)
+
+        a = self.visit_RDL_expr("4")
+        b = self.visit_RDL_expr("2 * 2")
+        c = self.visit_RDL_expr("(4 == 4)")
+        a.env.constant_pool = b.env.constant_pool = c.env.constant_pool = {}
+        self.assertIs(e.fold_constant(a, share=True), e.fold_constant(b, share=True))
+        self.assertIsNot(e.fold_constant(a, share=True), e.fold_constant(c, share=True))
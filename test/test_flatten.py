@@ -0,0 +1,98 @@
+from systemrdl import RDLWalker, RDLListener
+from systemrdl.flatten import flatten
+
+from .unittest_utils import RDLSourceTestCase
+
+class FieldCollector(RDLListener):
+    def __init__(self):
+        self.registers = []
+        self.fields = []
+
+    def enter_Reg(self, node):
+        self.registers.append((
+            node.get_path(), node.absolute_address, node.get_property('regwidth')
+        ))
+
+    def enter_Field(self, node):
+        self.fields.append((
+            node.get_path(), node.inst.lsb, node.inst.msb, node.inst.width,
+            node.get_property('sw').value, node.get_property('hw').value,
+            node.get_property('reset'),
+        ))
+
+
+class TestFlatten(RDLSourceTestCase):
+
+    def test_equivalence(self):
+        testcases = [
+            (["rdl_testcases/address_lookup.rdl"], "top"),
+            (["rdl_testcases/address_packing.rdl"], "hier"),
+            (["rdl_testcases/field_packing.rdl"], "msb_packing"),
+        ]
+        for files, top_name in testcases:
+            with self.subTest(files[0]):
+                root = self.compile(files, top_name)
+                collector = FieldCollector()
+                RDLWalker(unroll=True).walk(root, collector)
+
+                model = flatten(root)
+                regs = model.registers
+                fields = model.fields
+
+                self.assertEqual(len(regs), len(collector.registers))
+                self.assertEqual(
+                    list(zip(regs.path, regs.address, regs.width)),
+                    collector.registers
+                )
+                self.assertEqual(len(fields), len(collector.fields))
+                self.assertEqual(
+                    list(zip(
+                        fields.path, fields.lsb, fields.msb, fields.width,
+                        fields.sw, fields.hw, fields.reset
+                    )),
+                    collector.fields
+                )
+
+                # Fields refer back to their register
+                for i in range(len(regs)):
+                    start = regs.field_start[i]
+                    for j in range(start, start + regs.field_count[i]):
+                        self.assertEqual(fields.register[j], i)
+                        self.assertTrue(fields.path[j].startswith(regs.path[i] + "."))
+
+    def test_subtree_and_properties(self):
+        root = self.compile(
+            ["rdl_testcases/references_dynamic_lhs.rdl"],
+            "top"
+        )
+
+        model = flatten(root.find_by_path("top.reg2"), ["ref_prop", "next", "fieldwidth"])
+        regs = model.registers
+        fields = model.fields
+
+        self.assertEqual(regs.path, ["top.reg2[0]", "top.reg2[1]"])
+        self.assertEqual(list(regs.address), [0x4, 0x8])
+        self.assertEqual(
+            [ref.get_path() for ref in regs.properties["ref_prop"]],
+            ["top.reg2[1].x", "top.reg2[1].x"]
+        )
+        # Not valid for registers
+        self.assertEqual(regs.properties["fieldwidth"], [None, None])
+
+        self.assertEqual(
+            fields.path,
+            ["top.reg2[0].x", "top.reg2[0].y", "top.reg2[1].x", "top.reg2[1].y"]
+        )
+        self.assertEqual(fields.properties["fieldwidth"], [1, 1, 1, 1])
+
+        # References are resolved relative to each array element
+        next_props = fields.properties["next"]
+        self.assertIsNone(next_props[0])
+        self.assertEqual(next_props[1].node.get_path(), "top.reg2[0].x")
+        self.assertEqual(next_props[3].node.get_path(), "top.reg2[1].x")
+        self.assertEqual(next_props[1].name, "anded")
+
+        # A specific element
+        model = flatten(root.find_by_path("top.reg2[1]"))
+        self.assertEqual(model.registers.path, ["top.reg2[1]"])
+        self.assertEqual(list(model.fields.register), [0, 0])
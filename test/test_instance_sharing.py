@@ -0,0 +1,80 @@
+import os
+
+from systemrdl import RDLCompiler
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+
+class TestInstanceSharing(RDLSourceTestCase):
+
+    def test_divergent_assignments(self):
+        top = self.compile(
+            ["rdl_testcases/instance_sharing.rdl"],
+            "top"
+        )
+
+        # Dynamic assignments only affect the targeted instance
+        for path, value in [
+                ("top.s1.r1.a", 0),
+                ("top.s2.r1.a", 1),
+                ("top.s3.r1.a", 0),
+                ("top.s1.r2.a", 0),
+                ("top.s2.r2.a", 0),
+            ]:
+            with self.subTest(path):
+                self.assertEqual(top.find_by_path(path).get_property("reset"), value)
+
+        self.assertEqual(top.find_by_path("top.s3.r2").get_property("name"), "renamed")
+        self.assertEqual(top.find_by_path("top.s3.r1").get_property("name"), "r1")
+        self.assertEqual(top.find_by_path("top.s1.r2").get_property("name"), "r2")
+
+    def test_unique_instances(self):
+        top = self.compile(
+            ["rdl_testcases/instance_sharing.rdl"],
+            "top"
+        )
+        s1 = top.find_by_path("top.s1")
+        s2 = top.find_by_path("top.s2")
+        self.assertIsNot(s1.inst, s2.inst)
+        self.assertIsNot(
+            top.find_by_path("top.s1.r2.b").inst,
+            top.find_by_path("top.s2.r2.b").inst
+        )
+
+        # Alias registers refer to the primary of their own parent instance
+        for sub in (s1, s2):
+            alias = sub.get_child_by_name("r1_alias")
+            self.assertIs(alias.inst.alias_primary_inst, sub.get_child_by_name("r1").inst)
+
+        # Addresses are placed independently per instance
+        self.assertEqual(top.find_by_path("top.s2.r2").absolute_address, 0x14)
+
+    def test_field_reset_override(self):
+        top2 = self.compile(["rdl_testcases/instance_sharing.rdl"], "top2")
+        self.assertEqual(top2.find_by_path("top2.r_reset.b").get_property("reset"), 0xF)
+        self.assertEqual(top2.find_by_path("top2.r_inst.b").get_property("reset"), 0)
+        self.assertEqual(top2.find_by_path("top2.r_reset").absolute_address, 0x10)
+
+    def test_definitions_are_preserved(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        rdlc.compile_file(os.path.join(this_dir, "rdl_testcases/instance_sharing.rdl"))
+
+        # Elaborating multiple tops from the same compiler does not modify the
+        # shared definitions
+        top = rdlc.elaborate("top").get_child_by_name("top")
+        top2 = rdlc.elaborate("top2").get_child_by_name("top2")
+        top_again = rdlc.elaborate("top").get_child_by_name("top")
+
+        self.assertEqual(
+            top_again.find_by_path("s2.r1.a").get_property("reset"), 1
+        )
+        self.assertEqual(
+            top_again.find_by_path("s1.r1.a").get_property("reset"), 0
+        )
+        self.assertEqual(top2.find_by_path("s1.r2").absolute_address, 0x4)
+        self.assertEqual(top.find_by_path("s3.r2").get_property("name"), "renamed")
+
+        # Definitions remain unelaborated
+        my_reg = rdlc.root.comp_defs["my_reg"]
+        self.assertIsNone(my_reg.children[0].lsb)
+        self.assertEqual(my_reg.children[1].properties["reset"].get_value(), 0)
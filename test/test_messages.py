@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+
+from systemrdl.messages import SourceRef, LineIndex, LineIndexCache
+
+def linear_coordinates(path, start, end):
+    """
+    Reference implementation that reads the file line by line
+    """
+    start_line = start_col = start_line_text = end_line = end_col = None
+    line_start = 0
+    lineno = 1
+    file_pos = 0
+    with open(path, 'r', newline='', encoding='utf_8') as fp:
+        while True:
+            line_text = fp.readline()
+            file_pos += len(line_text)
+            if line_text == "":
+                break
+            if (start_line is None) and (start < file_pos):
+                start_line = lineno
+                start_col = start - line_start
+                start_line_text = line_text.rstrip("\n").rstrip("\r")
+            if (end_line is None) and (end < file_pos):
+                end_line = lineno
+                end_col = end - line_start
+                break
+            lineno += 1
+            line_start = file_pos
+    return (start_line, start_col, start_line_text, end_line, end_col)
+
+
+class TestLineIndex(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".rdl")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write(self, text):
+        with open(self.path, 'w', newline='', encoding='utf_8') as fp:
+            fp.write(text)
+
+    def test_coordinates(self):
+        text = "addrmap top {\n\treg {\r\n  field {} f;\r} r;\n\n};\n"
+        self.write(text)
+        for start in range(len(text)):
+            for end in range(start, len(text) + 2):
+                src_ref = SourceRef(start, end, filename=self.path)
+                src_ref.derive_coordinates()
+                self.assertEqual(
+                    (src_ref.start_line, src_ref.start_col, src_ref.start_line_text,
+                     src_ref.end_line, src_ref.end_col),
+                    linear_coordinates(self.path, start, end)
+                )
+
+    def test_no_trailing_newline(self):
+        index = LineIndex("ab\ncd")
+        self.assertEqual(index.find_line(4), 1)
+        self.assertEqual(index.get_line_text(1), "cd")
+        self.assertIsNone(index.find_line(5))
+
+    def test_cache(self):
+        cache = LineIndexCache(max_entries=2)
+        self.write("a\nb\n")
+        index = cache.get(self.path)
+        self.assertIs(cache.get(self.path), index)
+
+        # Modified file is indexed again
+        self.write("a\nbb\nc\n")
+        index2 = cache.get(self.path)
+        self.assertIsNot(index2, index)
+        self.assertEqual(index2.line_starts, [0, 2, 5, 7])
+
+    def test_eviction(self):
+        paths = []
+        try:
+            for _ in range(3):
+                fd, path = tempfile.mkstemp(suffix=".rdl")
+                os.close(fd)
+                paths.append(path)
+
+            cache = LineIndexCache(max_entries=2)
+            first = cache.get(paths[0])
+            cache.get(paths[1])
+            self.assertIs(cache.get(paths[0]), first)
+
+            # Least recently used file is discarded
+            cache.get(paths[2])
+            self.assertEqual(len(cache._entries), 2)
+            self.assertNotIn(paths[1], cache._entries)
+            self.assertIs(cache.get(paths[0]), first)
+        finally:
+            for path in paths:
+                os.remove(path)
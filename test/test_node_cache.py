@@ -0,0 +1,85 @@
+from .unittest_utils import RDLSourceTestCase
+
+class TestNodeCache(RDLSourceTestCase):
+
+    def test_cached_addresses_and_sizes(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "top"
+        )
+        rf = root.find_by_path("top.rf[1]")
+        reg = rf.get_child_by_name("b")
+        self.assertEqual(reg.absolute_address, 0x218)
+        self.assertEqual(rf.size, 0xC)
+        self.assertEqual(rf.total_size, 0x1C)
+
+        # Address follows changes to the node's own index
+        rf.current_idx = [0]
+        self.assertEqual(rf.absolute_address, 0x200)
+
+        # Modifying the model requires invalidation
+        rf.inst.addr_offset = 0x400
+        reg.inst.properties['regwidth'] = 64
+        self.assertEqual(rf.absolute_address, 0x200)
+        self.assertEqual(reg.size, 4)
+
+        reg.invalidate_cache()
+        self.assertEqual(rf.absolute_address, 0x400)
+        self.assertEqual(reg.absolute_address, 0x408)
+        self.assertEqual(reg.size, 8)
+        self.assertEqual(rf.size, 0x10)
+
+    def test_cached_address_of_array_parent(self):
+        root = self.compile(
+            ["rdl_testcases/address_packing.rdl"],
+            "hier"
+        )
+        reg = root.find_by_path("hier.y[0].b[1]")
+        self.assertEqual(reg.absolute_address, 0x140)
+
+        # Address follows changes to the index of an ancestor
+        reg.parent.current_idx = [2]
+        expected = root.find_by_path("hier.y[2].b[1]").absolute_address
+        self.assertNotEqual(expected, 0x140)
+        self.assertEqual(reg.absolute_address, expected)
+
+    def test_cached_properties(self):
+        root = self.compile(
+            ["rdl_testcases/references_dynamic_lhs.rdl"],
+            "top"
+        )
+        reg20_y = root.find_by_path("top.reg2[0].y")
+        reg21_y = root.find_by_path("top.reg2[1].y")
+
+        # References resolved for one node are not affected by another
+        next0 = reg20_y.get_property("next")
+        next1 = reg21_y.get_property("next")
+        self.assertEqual(next0.node.get_path(), "top.reg2[0].x")
+        self.assertEqual(next1.node.get_path(), "top.reg2[1].x")
+        self.assertIs(reg20_y.get_property("next"), next0)
+
+        # References are resolved again if the index of an ancestor changes
+        reg20_y.parent.current_idx = [1]
+        next_moved = reg20_y.get_property("next")
+        self.assertIsNot(next_moved, next0)
+        self.assertEqual(next_moved.node.get_path(), "top.reg2[1].x")
+        reg20_y.parent.current_idx = [0]
+        next0 = reg20_y.get_property("next")
+        self.assertEqual(next0.node.get_path(), "top.reg2[0].x")
+
+        reg1 = root.find_by_path("top.reg1")
+        ref = reg1.get_property("ref_prop")
+        self.assertEqual(ref.get_path(), "top.reg2[0]")
+        self.assertIs(reg1.get_property("ref_prop"), ref)
+
+        # Overridden defaults are not cached
+        self.assertEqual(reg20_y.get_property("reset"), None)
+        self.assertEqual(reg20_y.get_property("reset", default=5), 5)
+        self.assertEqual(reg20_y.get_property("next", default=5), next0)
+
+        # Modifying the model requires invalidation
+        reg20_y.inst.properties['reset'] = 1
+        self.assertEqual(reg20_y.get_property("reset"), None)
+        reg20_y.invalidate_cache()
+        self.assertEqual(reg20_y.get_property("reset"), 1)
+        self.assertEqual(reg20_y.get_property("reset", default=5), 1)
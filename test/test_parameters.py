@@ -1,5 +1,8 @@
+import os
 
-from .unittest_utils import RDLSourceTestCase
+from systemrdl import RDLCompiler, CompilerStats
+from systemrdl.messages import RDLCompileError
+from .unittest_utils import RDLSourceTestCase, TestPrinter
 
 class TestParameters(RDLSourceTestCase):
     
@@ -86,3 +89,121 @@ class TestParameters(RDLSourceTestCase):
             self.assertEqual(reg3.get_property("shared"), True)
             data = reg3.get_child_by_name("data")
             self.assertEqual(data.get_property("hdl_path_slice"), ["foo"])
+    
+    def test_chain(self):
+        root = self.compile(
+            ["rdl_testcases/parameter_chain.rdl"],
+            "chain_top"
+        )
+        
+        # Shared sub-expressions are only evaluated once
+        self.assertEqual(root.find_by_path("chain_top.c1.reg_x").address_offset, 1 << 31)
+        
+        # Overriding a parameter invalidates previously evaluated results
+        self.assertEqual(root.find_by_path("chain_top.c2.reg_x").address_offset, 1 << 32)
+    
+    def test_specialization(self):
+        root = self.compile(
+            ["rdl_testcases/parameter_specialization.rdl"],
+            "spec_top"
+        )
+        
+        a = root.find_by_path("spec_top.a")
+        b = root.find_by_path("spec_top.b")
+        c = root.find_by_path("spec_top.c")
+        d = root.find_by_path("spec_top.d")
+        e = root.find_by_path("spec_top.e")
+        
+        # Instantiations with the same constant parameter values share a copy
+        # of the definition
+        self.assertIs(b.inst.parameters, c.inst.parameters)
+        self.assertIsNot(a.inst.parameters, b.inst.parameters)
+        self.assertIsNot(a.inst.parameters, d.inst.parameters)
+        
+        self.assertEqual(a.inst.type_name, "spec_reg_SIZE_10")
+        self.assertEqual(b.inst.type_name, "spec_reg_SIZE_10_SHARED_f")
+        self.assertEqual(c.inst.type_name, "spec_reg_SIZE_10_SHARED_f")
+        self.assertEqual(d.inst.type_name, "spec_reg_SIZE_8")
+        self.assertEqual(e.inst.type_name, "spec_reg_SIZE_10")
+        
+        self.assertEqual(b.get_property("shared"), False)
+        
+        # Only one copy is made per distinct set of constant parameter values
+        stats = CompilerStats()
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter(), stats=stats)
+        rdlc.compile_file(os.path.join(this_dir, "rdl_testcases/parameter_specialization.rdl"))
+        # a, b/c, d/sku_common.rev, and the non-constant e and sku_top.fifo
+        self.assertEqual(stats.counters["deepcopies"], 5)
+        self.assertEqual(c.get_child_by_name("data").inst.width, 15)
+        self.assertEqual(d.get_child_by_name("data").inst.width, 7)
+        self.assertEqual(e.get_child_by_name("data").inst.width, 15)
+    
+    def test_top_parameters(self):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter())
+        rdlc.compile_file(os.path.join(this_dir, "rdl_testcases/parameter_specialization.rdl"))
+        
+        with self.subTest("default"):
+            root = rdlc.elaborate("sku_top")
+            top = root.find_by_path("sku_top")
+            self.assertEqual(top.inst.type_name, "sku_top")
+            self.assertEqual(root.find_by_path("sku_top.fifo").inst.array_dimensions, [2])
+            self.assertEqual(root.find_by_path("sku_top.fifo[0].data").inst.width, 7)
+            self.assertEqual(root.find_by_path("sku_top.dbg").get_property("ispresent"), False)
+        
+        with self.subTest("overridden"):
+            root = rdlc.elaborate("sku_top", "sku_a", {
+                "CHANNELS": 8,
+                "DEPTH": 16,
+                "HAS_DBG": True,
+            })
+            top = root.find_by_path("sku_a")
+            self.assertEqual(top.inst.type_name, "sku_top_CHANNELS_8_DEPTH_10_DEPTH_BITS_20_HAS_DBG_t")
+            self.assertEqual(root.find_by_path("sku_a.fifo").inst.array_dimensions, [8])
+            self.assertEqual(root.find_by_path("sku_a.fifo[7].data").inst.width, 31)
+            self.assertEqual(root.find_by_path("sku_a.fifo[7]").absolute_address, 0x11c)
+            self.assertEqual(root.find_by_path("sku_a.dbg").get_property("ispresent"), True)
+            self.assertEqual(root.find_by_path("sku_a.common.rev.data").inst.width, 7)
+        
+        with self.subTest("sharing"):
+            top_def = rdlc.root.comp_defs["sku_top"]
+            rdlc.elaborate("sku_top", parameters={"DEPTH": 8})
+            rdlc.elaborate("sku_top", parameters={"DEPTH": 8})
+            rdlc.elaborate("sku_top", parameters={"DEPTH": 32})
+            templates = [
+                t for (comp_def, _), t in rdlc.specializations.items()
+                if comp_def is top_def
+            ]
+            self.assertEqual(len(templates), 3)
+            
+            # Only parts that depend on the overridden parameters are copied
+            for template in templates:
+                self.assertIsNot(template, top_def)
+                self.assertIs(template.children[0], top_def.children[0])
+                self.assertIsNot(template.children[1], top_def.children[1])
+        
+        with self.subTest("definitions are preserved"):
+            root = rdlc.elaborate("sku_top")
+            self.assertEqual(root.find_by_path("sku_top.fifo").inst.array_dimensions, [2])
+            self.assertEqual(root.find_by_path("sku_top.fifo[0].data").inst.width, 7)
+        
+        with self.subTest("fresh values"):
+            for depth in (8, 4, 8):
+                root = rdlc.elaborate("sku_top", parameters={"DEPTH": depth})
+                self.assertEqual(root.find_by_path("sku_top.fifo[0].data").inst.width, depth * 2 - 1)
+                # Evaluated expressions are not retained after elaboration
+                self.assertEqual(rdlc.env.eval_cache.values, {})
+                self.assertEqual(rdlc.env.eval_cache.widths, {})
+        
+        with self.subTest("errors"):
+            with self.assertRaises(RDLCompileError):
+                rdlc.elaborate("sku_top", parameters={"NOPE": 1})
+            with self.assertRaises(RDLCompileError):
+                rdlc.elaborate("sku_top", parameters={"DEPTH": "deep"})
+            with self.assertRaises(RDLCompileError):
+                rdlc.elaborate("sku_top", parameters={"DEPTH": 1.5})
+            with self.assertRaises(RDLCompileError):
+                rdlc.elaborate("sku_top", parameters={"DEPTH": -1})
+            with self.assertRaises(RDLCompileError):
+                rdlc.elaborate("sku_top", parameters={"DEPTH": 1 << 64})
@@ -1,5 +1,15 @@
 
-from .unittest_utils import RDLSourceTestCase
+import os
+import json
+import shutil
+import tempfile
+import subprocess
+
+from systemrdl import RDLCompiler, RDLCompileError
+from systemrdl.preprocessor import perl_worker
+from systemrdl.preprocessor.preprocessor import FilePreprocessor
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
 
 class TestPreprocessor(RDLSourceTestCase):
     
@@ -27,3 +37,158 @@ class TestPreprocessor(RDLSourceTestCase):
         with self.subTest("reg1_data4"):
             self.assertEqual(reg1_data4.inst.msb, 5)
             self.assertEqual(reg1_data4.inst.lsb, 4)
+
+
+class TestPerlWorker(RDLSourceTestCase):
+
+    def setUp(self):
+        if shutil.which("perl") is None:
+            self.skipTest("Perl is not installed")
+        self.pool = perl_worker.get_pool()
+        if self.pool is None:
+            self.skipTest("Perl workers are not supported on this platform")
+
+    def test_reuse(self):
+        self.compile(["rdl_testcases/preprocessor.rdl"], "top")
+        spawned = self.pool.spawned
+        for _ in range(3):
+            root = self.compile(["rdl_testcases/preprocessor.rdl"], "top")
+            reg1 = root.find_by_path("top.reg1")
+            self.assertEqual(len(list(reg1.fields())), 3)
+        self.assertEqual(self.pool.spawned, spawned)
+
+    def test_equivalence(self):
+        miniscripts = [
+            "rdlppp_utils::emit_ref(0);",
+            'for($i=0; $i<3; $i++) { rdlppp_utils::emit_text($i, "x$i\\n\\t\\"\\\\"); }',
+            # Globals do not leak from the previous miniscript
+            'rdlppp_utils::emit_text(0, defined($i) ? "leaked" : "clean");',
+            'rdlppp_utils::emit_text(0, "\\xC3\\xA9");',
+            'my $s = "caf\\x{e9}"; rdlppp_utils::emit_text(1, $s);',
+            'print "hello";',
+            '$ENV{RDLPPP_TEST} = "set"; rdlppp_utils::emit_ref(0);',
+            # Environment changes do not leak from the previous miniscript
+            'rdlppp_utils::emit_text(0, defined($ENV{RDLPPP_TEST}) ? "leaked" : "clean");',
+            'rdlppp_utils::emit_ref(0); die "failed";',
+        ]
+        for miniscript in miniscripts:
+            with self.subTest(miniscript):
+                expected = perl_worker._run_standalone(miniscript.encode("utf-8"), 5)
+                result = self.pool.run(miniscript.encode("utf-8"), 5)
+                self.assertEqual(result.returncode, expected.returncode)
+                if expected.returncode == 0:
+                    self.assertEqual(result.stdout, expected.stdout)
+                else:
+                    self.assertEqual(result.stdout, b"")
+                    self.assertTrue(result.stderr)
+
+    def test_error(self):
+        result = self.pool.run(b"this is not perl {", 5)
+        self.assertEqual(result.returncode, 1)
+        self.assertIn(b"syntax error", result.stderr)
+
+        # Worker is still usable
+        result = self.pool.run(b"rdlppp_utils::emit_ref(2);", 5)
+        self.assertEqual(json.loads(result.stdout), [{"type": "ref", "ref": 2}])
+
+    def test_compile_error(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "bad.rdl")
+            with open(path, "w") as f:
+                f.write("<% this is not perl { %>\naddrmap top {};\n")
+            rdlc = RDLCompiler(message_printer=TestPrinter())
+            with self.assertLogs() as cm:
+                with self.assertRaises(RDLCompileError):
+                    rdlc.compile_file(path)
+        self.assertIn("Perl syntax error", cm.records[0].getMessage())
+
+    def test_timeout(self):
+        self.pool.run(b"rdlppp_utils::emit_ref(0);", 5)
+        spawned = self.pool.spawned
+        with self.assertRaises(subprocess.TimeoutExpired):
+            self.pool.run(b"while(1) {}", 0.5)
+        result = self.pool.run(b"rdlppp_utils::emit_ref(0);", 5)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(self.pool.spawned, spawned + 1)
+
+
+class TestIncludeCache(RDLSourceTestCase):
+
+    def setUp(self):
+        self.src_dir = tempfile.mkdtemp()
+        self.write("leaf.rdl", "reg leaf_reg { field {} f; };\n")
+        self.write("common.rdl", '`include "leaf.rdl"\nreg common_reg { field {} f; };\n')
+        self.write("a.rdl", '`include "common.rdl"\naddrmap a { leaf_reg r1; common_reg r2; };\n')
+        self.write("b.rdl", '// b\n`include "common.rdl"\naddrmap b { leaf_reg r1; };\n')
+        self.rdlc = RDLCompiler(message_printer=TestPrinter())
+
+    def tearDown(self):
+        shutil.rmtree(self.src_dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.src_dir, name)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def path(self, name):
+        return os.path.join(self.src_dir, name)
+
+    def preprocess(self, name):
+        fpp = FilePreprocessor(self.rdlc.env, self.path(name), [])
+        return fpp.preprocess()
+
+    def get_lineage(self, seg_map, text, offset):
+        for segment in seg_map.segments:
+            if segment.start <= offset <= segment.end:
+                lineage = []
+                incl_ref = segment.incl_ref
+                while incl_ref is not None:
+                    lineage.append((os.path.basename(incl_ref.path), incl_ref.start))
+                    incl_ref = incl_ref.parent
+                return lineage
+        self.fail("Offset not found")
+
+    def test_reuse(self):
+        cache = self.rdlc.env.preprocessor_cache
+        text_a, seg_map_a = self.preprocess("a.rdl")
+        self.assertEqual((cache.hits, cache.misses), (0, 3))
+
+        text_b, seg_map_b = self.preprocess("b.rdl")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+
+        self.assertIn("reg leaf_reg", text_b)
+        self.assertIn("reg common_reg", text_b)
+
+        # Lineage is specific to each include site
+        self.assertEqual(
+            self.get_lineage(seg_map_a, text_a, text_a.index("reg leaf_reg")),
+            [("common.rdl", 0), ("a.rdl", 0)]
+        )
+        self.assertEqual(
+            self.get_lineage(seg_map_b, text_b, text_b.index("reg leaf_reg")),
+            [("common.rdl", 0), ("b.rdl", 5)]
+        )
+        self.assertEqual(
+            self.get_lineage(seg_map_b, text_b, text_b.index("reg common_reg")),
+            [("b.rdl", 5)]
+        )
+        self.assertEqual(self.get_lineage(seg_map_b, text_b, text_b.index("addrmap b")), [])
+
+        # Same result as an uncached run
+        uncached = RDLCompiler(message_printer=TestPrinter())
+        fpp = FilePreprocessor(uncached.env, self.path("b.rdl"), [])
+        self.assertEqual(fpp.preprocess()[0], text_b)
+
+    def test_modified(self):
+        cache = self.rdlc.env.preprocessor_cache
+        self.preprocess("a.rdl")
+        self.write("leaf.rdl", "reg leaf_reg { field {} f1; field {} f2; };\n")
+        text, _ = self.preprocess("a.rdl")
+        self.assertEqual((cache.hits, cache.misses), (2, 4))
+        self.assertIn("field {} f2;", text)
+
+    def test_compile(self):
+        self.rdlc.compile_file(self.path("a.rdl"))
+        root = self.rdlc.elaborate("a")
+        self.assertIsNotNone(root.find_by_path("a.r2.f"))
@@ -0,0 +1,83 @@
+import pickle
+import unittest
+
+from systemrdl.preprocessor.segment_map import SegmentMap, UnalteredSegment, MacroSegment, IncludeRef
+
+def linear_derive(seg_map, offset, is_end=False):
+    """
+    Reference implementation that scans all segments
+    """
+    for segment in seg_map.segments:
+        if offset <= segment.end:
+            if isinstance(segment, MacroSegment):
+                src_offset = segment.src_end if is_end else segment.src_start
+            else:
+                src_offset = segment.src_start + (offset - segment.start)
+            return (src_offset, segment.src, segment.incl_ref)
+    segment = seg_map.segments[-1]
+    return (segment.src_end, segment.src, segment.incl_ref)
+
+
+class TestSegmentMap(unittest.TestCase):
+
+    def build(self, n_segments):
+        seg_map = SegmentMap()
+        incl_ref = IncludeRef(10, 20, "top.rdl")
+        offset = 0
+        src_offset = 0
+        for i in range(n_segments):
+            # Mix of unaltered segments, macro expansions and empty segments
+            length = i % 7
+            if i % 3 == 0:
+                segment = MacroSegment(
+                    offset, offset + length - 1,
+                    src_offset, src_offset + 4, "file%d.rdl" % (i % 2)
+                )
+                src_offset += 5
+            else:
+                segment = UnalteredSegment(
+                    offset, offset + length - 1,
+                    src_offset, src_offset + length - 1, "file%d.rdl" % (i % 2),
+                    incl_ref if i % 2 else None
+                )
+                src_offset += length
+            offset += length
+            seg_map.segments.append(segment)
+        return seg_map, offset
+
+    def test_derive(self):
+        seg_map, length = self.build(500)
+        for offset in range(length + 5):
+            for is_end in (False, True):
+                self.assertEqual(
+                    seg_map.derive_source_offset(offset, is_end),
+                    linear_derive(seg_map, offset, is_end)
+                )
+
+    def test_batched(self):
+        seg_map, length = self.build(100)
+        offsets = list(reversed(range(length + 2)))
+        for is_end in (False, True):
+            self.assertEqual(
+                seg_map.derive_source_offsets(offsets, is_end),
+                [linear_derive(seg_map, offset, is_end) for offset in offsets]
+            )
+
+    def test_append(self):
+        seg_map, length = self.build(10)
+        self.assertEqual(seg_map.derive_source_offset(length + 3), linear_derive(seg_map, length + 3))
+
+        # Segments appended after a lookup are found
+        seg_map.segments.append(UnalteredSegment(length, length + 9, 100, 109, "new.rdl"))
+        self.assertEqual(seg_map.derive_source_offset(length + 3), (103, "new.rdl", None))
+
+    def test_pickle(self):
+        seg_map, length = self.build(50)
+        seg_map.derive_source_offset(0)
+        seg_map2 = pickle.loads(pickle.dumps(seg_map))
+        self.assertIsNone(seg_map2._end_offsets)
+        for offset in range(length):
+            self.assertEqual(
+                seg_map2.derive_source_offset(offset)[0],
+                seg_map.derive_source_offset(offset)[0]
+            )
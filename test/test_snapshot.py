@@ -0,0 +1,65 @@
+import os
+import tempfile
+import shutil
+
+from systemrdl.snapshot import save_snapshot, load_snapshot
+from systemrdl.node import RegNode
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+from .test_compile_cache import dump_design
+
+class TestSnapshot(RDLSourceTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "design.snap")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_equivalence(self):
+        testcases = [
+            (["rdl_testcases/enums.rdl"], "enum_test1"),
+            (["rdl_testcases/structs.rdl"], "struct_test"),
+            (["rdl_testcases/struct_compositions.rdl"], "top"),
+            (["rdl_testcases/parameters.rdl"], "myAmap"),
+            (["rdl_testcases/references_direct_lhs.rdl"], "top"),
+            (["rdl_testcases/references_dynamic_lhs.rdl"], "top"),
+            (["rdl_testcases/udp_15.2.2_ex1.rdl"], "foo"),
+            (["rdl_testcases/address_lookup.rdl"], "top"),
+        ]
+        for files, top_name in testcases:
+            with self.subTest(files[0]):
+                root = self.compile(files, top_name)
+                save_snapshot(root, self.path)
+                loaded = load_snapshot(self.path, message_printer=TestPrinter())
+                self.assertEqual(dump_design(loaded), dump_design(root))
+
+    def test_loaded_design(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "top"
+        )
+        save_snapshot(root, self.path)
+        loaded = load_snapshot(self.path)
+
+        # Children are not decoded until they are accessed
+        top_inst = loaded.inst.children[0]
+        self.assertNotIsInstance(top_inst.children, list)
+        self.assertEqual(len(top_inst.children), 7)
+        self.assertIsInstance(top_inst.children, list)
+
+        node = loaded.find_by_address(0x218)
+        self.assertEqual(node.get_path(), "top.rf[1].b")
+        self.assertEqual(node.get_property("regwidth"), 32)
+
+        alias = loaded.find_by_path("top.r0_alias")
+        self.assertIsInstance(alias, RegNode)
+        self.assertTrue(alias.inst.is_alias)
+        self.assertIs(alias.inst.alias_primary_inst, loaded.find_by_path("top.r0").inst)
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\x00" * 128)
+        with self.assertRaises(ValueError):
+            load_snapshot(self.path)
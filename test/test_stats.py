@@ -0,0 +1,112 @@
+import os
+import json
+import shutil
+
+from systemrdl import RDLCompiler, CompilerStats
+
+from .unittest_utils import RDLSourceTestCase, TestPrinter
+
+class RecordingStats(CompilerStats):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.events = []
+
+    def phase_started(self, name):
+        self.events.append(("start", name))
+
+    def phase_finished(self, name, phase):
+        self.events.append(("finish", name))
+
+
+class TestCompilerStats(RDLSourceTestCase):
+
+    def compile_with_stats(self, files, top_name, stats):
+        this_dir = os.path.dirname(os.path.realpath(__file__))
+        rdlc = RDLCompiler(message_printer=TestPrinter(), stats=stats)
+        for file in files:
+            rdlc.compile_file(os.path.join(this_dir, file))
+        return rdlc.elaborate(top_name)
+
+    def test_phases(self):
+        stats = RecordingStats()
+        self.compile_with_stats(["rdl_testcases/parameters.rdl"], "myAmap", stats)
+
+        self.assertEqual(
+            list(stats.phases.keys()),
+            [
+                "preprocess", "parse", "visit", "elaborate",
+                "elaborate.expressions", "elaborate.placement", "elaborate.validate",
+            ]
+        )
+        for phase in stats.phases.values():
+            self.assertEqual(phase.calls, 1)
+            self.assertGreater(phase.wall_time, 0)
+            self.assertIsNone(phase.peak_memory)
+
+        # Elaboration passes are nested within the elaborate phase
+        self.assertEqual(
+            stats.events[6:],
+            [
+                ("start", "elaborate"),
+                ("start", "elaborate.expressions"), ("finish", "elaborate.expressions"),
+                ("start", "elaborate.placement"), ("finish", "elaborate.placement"),
+                ("start", "elaborate.validate"), ("finish", "elaborate.validate"),
+                ("finish", "elaborate"),
+            ]
+        )
+        elaborate = stats.get_phase("elaborate")
+        self.assertGreaterEqual(
+            elaborate.wall_time,
+            stats.get_phase("elaborate.expressions").wall_time
+            + stats.get_phase("elaborate.placement").wall_time
+            + stats.get_phase("elaborate.validate").wall_time
+        )
+        self.assertIsNone(stats.get_phase("perl"))
+
+    def test_counters(self):
+        stats = CompilerStats()
+        self.compile_with_stats(["rdl_testcases/parameters.rdl"], "myAmap", stats)
+
+        # Instances with parameter overrides in parameters.rdl
+        self.assertEqual(stats.get_phase("visit").counters["deepcopies"], 5)
+
+        # myAmap, 4 regs, 4 fields and 2 mems. Arrays are not unrolled
+        n_nodes = 11
+        self.assertEqual(stats.get_phase("elaborate.expressions").counters["nodes"], n_nodes)
+        self.assertEqual(stats.get_phase("elaborate.placement").counters["nodes"], n_nodes)
+        self.assertEqual(stats.get_phase("elaborate.validate").counters["nodes"], n_nodes)
+        self.assertEqual(stats.get_phase("elaborate").counters["nodes"], 3 * n_nodes)
+
+        self.assertGreater(stats.get_phase("elaborate.expressions").counters["expr_evals"], 0)
+        self.assertEqual(
+            stats.counters["expr_evals"],
+            stats.get_phase("elaborate").counters["expr_evals"]
+        )
+
+        # Results can be serialized
+        d = json.loads(json.dumps(stats.to_dict()))
+        self.assertEqual(d["counters"]["deepcopies"], 5)
+        self.assertEqual(d["phases"][0]["name"], "preprocess")
+
+    def test_memory(self):
+        stats = CompilerStats(trace_memory=True)
+        self.compile_with_stats(["rdl_testcases/parameters.rdl"], "myAmap", stats)
+
+        for phase in stats.phases.values():
+            self.assertGreaterEqual(phase.peak_memory, 0)
+        self.assertGreater(stats.get_phase("visit").peak_memory, 0)
+        self.assertGreaterEqual(
+            stats.get_phase("elaborate").peak_memory,
+            stats.get_phase("elaborate.expressions").peak_memory
+        )
+
+    def test_perl(self):
+        if shutil.which("perl") is None:
+            self.skipTest("Perl is not installed")
+        stats = CompilerStats()
+        self.compile_with_stats(["rdl_testcases/preprocessor.rdl"], "top", stats)
+        self.assertEqual(stats.get_phase("perl").calls, 1)
+        self.assertGreaterEqual(
+            stats.get_phase("preprocess").wall_time,
+            stats.get_phase("perl").wall_time
+        )
@@ -0,0 +1,122 @@
+from systemrdl import RDLListener, RDLWalker, WalkerAction
+
+from .unittest_utils import RDLSourceTestCase
+
+#===============================================================================
+class RecordingListener(RDLListener):
+    """
+    Records every callback
+    """
+    def __init__(self):
+        self.events = []
+
+def _make_recorder(name):
+    def callback(self, node):
+        self.events.append((name, node.get_path()))
+    return callback
+
+for _name in list(vars(RDLListener)):
+    if _name.startswith(("enter_", "exit_")):
+        setattr(RecordingListener, _name, _make_recorder(_name))
+
+
+class RegCounter(RDLListener):
+    def __init__(self):
+        self.count = 0
+
+    def enter_Reg(self, node):
+        self.count += 1
+
+
+class SkipRegfiles(RDLListener):
+    def __init__(self):
+        self.paths = []
+
+    def enter_Component(self, node):
+        self.paths.append(node.get_path())
+
+    def enter_Regfile(self, node):
+        return WalkerAction.SkipDescendants
+
+
+class ReferenceWalker(RDLWalker):
+    """
+    Walker that overrides callback dispatching
+    """
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def do_enter(self, node, listener):
+        self.calls += 1
+        return super().do_enter(node, listener)
+
+#===============================================================================
+class TestWalker(RDLSourceTestCase):
+
+    def test_callback_order(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "top"
+        )
+        listener = RecordingListener()
+        RDLWalker().walk(root.find_by_path("top.rf"), listener)
+
+        self.assertEqual(listener.events[:6], [
+            ("enter_Component", "top.rf[]"),
+            ("enter_AddressableComponent", "top.rf[]"),
+            ("enter_Regfile", "top.rf[]"),
+            ("enter_Component", "top.rf[].a"),
+            ("enter_AddressableComponent", "top.rf[].a"),
+            ("enter_Reg", "top.rf[].a"),
+        ])
+        self.assertEqual(listener.events[6:12], [
+            ("enter_Component", "top.rf[].a.f1"),
+            ("enter_VectorComponent", "top.rf[].a.f1"),
+            ("enter_Field", "top.rf[].a.f1"),
+            ("exit_Field", "top.rf[].a.f1"),
+            ("exit_VectorComponent", "top.rf[].a.f1"),
+            ("exit_Component", "top.rf[].a.f1"),
+        ])
+        self.assertEqual(listener.events[-3:], [
+            ("exit_Regfile", "top.rf[]"),
+            ("exit_AddressableComponent", "top.rf[]"),
+            ("exit_Component", "top.rf[]"),
+        ])
+
+        # Root node does not trigger component callbacks
+        listener = RecordingListener()
+        RDLWalker().walk(root, listener)
+        self.assertNotIn(("enter_Component", ""), listener.events)
+
+    def test_walk(self):
+        root = self.compile(
+            ["rdl_testcases/address_lookup.rdl"],
+            "top"
+        )
+
+        counter = RegCounter()
+        RDLWalker(unroll=True).walk(root, counter)
+        self.assertEqual(counter.count, 2 + 6 + 4 + 2 + 8 + 1)
+
+        # Skipping descendants applies to all listeners
+        skipper = SkipRegfiles()
+        counter = RegCounter()
+        RDLWalker(unroll=True).walk(root, skipper, counter)
+        self.assertEqual(counter.count, 2 + 6 + 2 + 8 + 1)
+        self.assertIn("top.rf[1]", skipper.paths)
+        self.assertNotIn("top.rf[1].a", skipper.paths)
+
+        # Callbacks assigned to a listener object are honored
+        listener = RDLListener()
+        paths = []
+        listener.enter_Mem = lambda node: paths.append(node.get_path())
+        RDLWalker().walk(root, listener)
+        self.assertEqual(paths, ["top.ram"])
+
+        # Extended walkers use their own dispatch
+        walker = ReferenceWalker(unroll=True)
+        counter = RegCounter()
+        walker.walk(root, skipper, counter)
+        self.assertEqual(counter.count, 2 + 6 + 2 + 8 + 1)
+        self.assertGreater(walker.calls, 0)